@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+import argparse
+import itertools
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+from orchestrator.Provers import proverNames
+
+# Benchmark of the orchestration (scheduling, communication, consolidation, writing results) with simulated provers
+# (settings['simulatedProvers']): runs mpi-prover.py (or local-prover.py) on the first n syllogisms for every
+# combination of formula count, rank count and scheduler and reports makespan, throughput, idle fraction of the
+# ranks and peak memory of the master. With --latency none the provers answer at once, so the run measures only the
+# overhead of the orchestration. Formulas come from the given source, corpus files (pickle, UIDs or binary corpus)
+# are written by generate.py before the run
+
+# formula source -> (generate.py output option, setting with the path of the corpus file, file name)
+corpusFiles = {
+    'pickle': ('-P', 'formula_pickle_path', 'formulas.pickle'),
+    'uids': ('-U', 'formula_uid_path', 'formulas.uids'),
+    'binary': ('-b', 'formula_binary_path', 'formulas.corpus'),
+}
+
+# writes corpus of the first count syllogisms for the formula source, returns settings selecting it
+def writeCorpus(source: str, count: int, directory: str) -> dict:
+    if source == 'syllogisms':
+        return {'formula_source': 'syllogisms', 'syllogism_slice': [0, count, 1]}
+    option, setting, name = corpusFiles[source]
+    path = os.path.join(directory, name)
+    here = os.path.dirname(os.path.abspath(__file__))
+    with open(path, 'wb') as f:
+        # -d: all syllogisms, the same as syllogism_slice
+        subprocess.run([sys.executable, '-m', 'generator.generate', '-d', '-n', str(count), option], cwd=here,
+                       stdout=f, check=True)
+    return {'formula_source': source, setting: path}
+
+def runOnce(args, count: int, ranks: int, scheduler: str, directory: str) -> dict:
+    tracePath = os.path.join(directory, 'trace.jsonl')
+    simulated = {}
+    if args.latency != 'none':
+        simulated = {'latency': args.latency, 'mean': args.mean, 'sigma': args.sigma, 'timeoutRate': args.timeout_rate,
+                     'timeoutAfter': args.timeout_after, 'unknownRate': args.unknown_rate, 'cpu': args.cpu}
+    overrides = writeCorpus(args.source, count, directory)
+    overrides.update({
+        'output_file_path': os.path.join(directory, 'results.csv'),
+        'deduplicate': args.deduplicate,
+        # the same for every formula source ('auto' orders only the pickle source by cost)
+        'ordering': None,
+        'cache_path': None,
+        'journal_dir': None,
+        'trace_path': tracePath,
+        'adaptiveTimeout': None,
+        'scheduler': scheduler,
+        'proverRanks': None,
+        'localProcesses': ranks,
+        'batchSize': args.batch_size,
+        'proverConcurrency': args.concurrency,
+        'earlyCancellation': args.early_cancellation,
+        'simulatedProvers': {name: simulated for name in proverNames},
+    })
+    settingsPath = os.path.join(directory, 'settings.json')
+    with open(settingsPath, 'w', encoding='utf-8') as f:
+        json.dump(overrides, f)
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    if args.backend == 'mpi':
+        command = shlex.split(args.mpirun) + ['-np', str(ranks), sys.executable, os.path.join(here, 'mpi-prover.py')]
+    else:
+        command = [sys.executable, os.path.join(here, 'local-prover.py')]
+    command += ['--settings', settingsPath]
+
+    start = time.perf_counter()
+    run = subprocess.run(command, cwd=here, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    makespan = time.perf_counter() - start
+    if run.returncode != 0:
+        raise RuntimeError('%s failed (%d):\n%s' % (' '.join(command), run.returncode, run.stderr[-2000:]))
+
+    results = int(re.search(r'Final count of results: (\d+)', run.stdout).group(1))
+    masterRSS = int(re.search(r'Master peak RSS: (\d+)', run.stdout).group(1))
+    pipeline = float(re.search(r'Total execution time: ([\d.e+-]+)', run.stdout).group(1))
+
+    # time the ranks (their threads) spent in prove calls
+    busy = 0
+    with open(tracePath, encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            busy += record['end'] - record['start']
+    slots = ranks * args.concurrency
+    return {'formulas': count, 'ranks': ranks, 'scheduler': scheduler, 'source': args.source, 'results': results, 'makespan': makespan,
+            'pipeline': pipeline, 'throughput': results / makespan, 'idle': max(0.0, 1 - busy / (slots * pipeline)),
+            'masterRSS': masterRSS}
+
+def parseArgs():
+    parser = argparse.ArgumentParser(allow_abbrev=False)
+    parser.add_argument('--formulas', help='comma separated formula counts', default='1000,5000')
+    parser.add_argument('--ranks', help='comma separated rank (process) counts, multiples of 4 for group schedulers',
+                        default='4,8')
+    parser.add_argument('--schedulers', help='comma separated schedulers', default='static,dynamic,pools')
+    parser.add_argument('--source', help='where formulas come from (formula_source), corpus files are generated',
+                        choices=['syllogisms', 'uids', 'binary', 'pickle'], default='syllogisms')
+    parser.add_argument('--backend', help='mpi-prover.py or local-prover.py (scheduler is always pools)',
+                        choices=['mpi', 'local'], default='mpi')
+    parser.add_argument('--mpirun', help='command starting MPI programs', default='mpirun --oversubscribe')
+    parser.add_argument('--latency', help='latency distribution of the simulated provers, none answers at once',
+                        choices=['none', 'constant', 'uniform', 'exponential', 'lognormal'], default='exponential')
+    parser.add_argument('--mean', help='mean latency in seconds', type=float, default=0.01)
+    parser.add_argument('--sigma', help='sigma of the lognormal latency', type=float, default=1)
+    parser.add_argument('--timeout-rate', help='fraction of formulas running out of time', type=float, default=0)
+    parser.add_argument('--timeout-after', help='seconds a formula running out of time takes', type=float,
+                        default=0.1)
+    parser.add_argument('--unknown-rate', help='fraction of other formulas with unknown result', type=float, default=0)
+    parser.add_argument('--cpu', help='burn CPU instead of sleeping', action='store_true')
+    parser.add_argument('--batch-size', help='batch size', type=int, default=8)
+    parser.add_argument('--concurrency', help='formulas proved at once by every rank', type=int, default=1)
+    parser.add_argument('--early-cancellation', help='early cancellation mode', choices=['strict', 'threshold'],
+                        default=None)
+    parser.add_argument('--deduplicate', help='prove structurally equal formulas once', action='store_true')
+    parser.add_argument('--repeat', help='runs of every combination, the fastest one is reported', type=int,
+                        default=1)
+    parser.add_argument('--json', help='write results as JSON lines to this file')
+    return parser.parse_args()
+
+def main():
+    args = parseArgs()
+    counts = [int(c) for c in args.formulas.split(',')]
+    rankCounts = [int(r) for r in args.ranks.split(',')]
+    schedulers = args.schedulers.split(',') if args.backend == 'mpi' else ['pools']
+
+    print('Formula source:', args.source)
+    print('%9s %6s %9s %11s %11s %13s %7s %11s' % ('formulas', 'ranks', 'scheduler', 'makespan', 'pipeline',
+                                                  'throughput', 'idle', 'master RSS'))
+    rows = []
+    for count, ranks, scheduler in itertools.product(counts, rankCounts, schedulers):
+        runs = []
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory(prefix='benchmark_') as directory:
+                runs.append(runOnce(args, count, ranks, scheduler, directory))
+        row = min(runs, key=lambda r: r['makespan'])
+        rows.append(row)
+        print('%9d %6d %9s %9.2f s %9.2f s %9.1f f/s %5.1f %% %8.1f MB'
+              % (row['formulas'], row['ranks'], row['scheduler'], row['makespan'], row['pipeline'],
+                 row['throughput'], 100 * row['idle'], row['masterRSS'] / 1024), flush=True)
+
+    if args.json is not None:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(row) + '\n' for row in rows))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+import mmap
+import shutil
+import struct
+import tempfile
+
+from .Formula import Formula
+from .generate import generateSingle
+
+# Binary corpus of syllogisms, meant to be memory-mapped so that every reader touches only the formulas it needs.
+# Layout (little endian):
+#   header: magic, version, bitmask of string tables present, formula count
+#   UID table: count records of 8 bytes (7 ASCII characters of the UID, 1 reserved byte)
+#   string tables, one per format present, in the order of formats: count + 1 offsets (8 bytes each, relative to the
+#   start of the table's data) followed by the UTF-8 data of the rendered formulas
+MAGIC = b'SYLC'
+VERSION = 1
+header = struct.Struct('<4sHHI')
+uidRecord = struct.Struct('<7sx')
+offset = struct.Struct('<Q')
+# formats which can be stored pre-rendered, index is the bit of the bitmask
+formats = ('prolog', 'thf', 'unicode')
+renderers = {'prolog': Formula.toPrologTerm, 'thf': Formula.toTHF, 'unicode': Formula.toUnicodeString}
+
+class CorpusFileError(Exception):
+    pass
+
+# writes formulas (any iterable) to stream, including the string tables of the given formats.
+# Only UIDs and offsets are kept in memory, rendered strings are spooled to temporary files
+def writeCorpusFile(stream, fs, stringFormats=()):
+    for outputFormat in stringFormats:
+        if outputFormat not in formats:
+            raise CorpusFileError("Unknown format '%s'" % (outputFormat,))
+    stringFormats = [outputFormat for outputFormat in formats if outputFormat in stringFormats]
+    uids = bytearray()
+    offsets = {outputFormat: [0] for outputFormat in stringFormats}
+    data = {outputFormat: tempfile.TemporaryFile() for outputFormat in stringFormats}
+    count = 0
+    try:
+        for f in fs:
+            uids += uidRecord.pack(f.uid.encode('ascii'))
+            for outputFormat in stringFormats:
+                text = renderers[outputFormat](f).encode('utf-8')
+                data[outputFormat].write(text)
+                offsets[outputFormat].append(offsets[outputFormat][-1] + len(text))
+            count += 1
+
+        mask = sum(1 << formats.index(outputFormat) for outputFormat in stringFormats)
+        stream.write(header.pack(MAGIC, VERSION, mask, count))
+        stream.write(uids)
+        for outputFormat in stringFormats:
+            stream.write(struct.pack('<%dQ' % (count + 1,), *offsets[outputFormat]))
+            data[outputFormat].seek(0)
+            shutil.copyfileobj(data[outputFormat], stream)
+    finally:
+        for f in data.values():
+            f.close()
+
+class CorpusFile:
+    # read-only, memory-mapped corpus file written by writeCorpusFile
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) < header.size:
+            raise CorpusFileError('%s is not a corpus file' % (path,))
+        magic, version, mask, self.count = header.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise CorpusFileError('%s is not a corpus file of version %d' % (path, VERSION))
+
+        # position of offsets of every string table present
+        self.tables = {}
+        position = header.size + self.count * uidRecord.size
+        for bit, outputFormat in enumerate(formats):
+            if mask & (1 << bit):
+                self.tables[outputFormat] = position
+                dataSize, = offset.unpack_from(self.map, position + self.count * offset.size)
+                position += (self.count + 1) * offset.size + dataSize
+
+    def __len__(self) -> int:
+        return self.count
+
+    def uid(self, index: int) -> str:
+        if index < 0 or index >= self.count:
+            raise IndexError('corpus index out of range: %d' % (index,))
+        return uidRecord.unpack_from(self.map, header.size + index * uidRecord.size)[0].decode('ascii')
+
+    # returns pre-rendered formula or None when the file has no string table of the format
+    def text(self, index: int, outputFormat: str) -> str:
+        if outputFormat not in self.tables:
+            return None
+        if index < 0 or index >= self.count:
+            raise IndexError('corpus index out of range: %d' % (index,))
+        position = self.tables[outputFormat]
+        start, = offset.unpack_from(self.map, position + index * offset.size)
+        end, = offset.unpack_from(self.map, position + (index + 1) * offset.size)
+        dataStart = position + (self.count + 1) * offset.size
+        return self.map[dataStart + start:dataStart + end].decode('utf-8')
+
+    # formula is built from its UID, its pre-rendered forms are reused
+    def formula(self, index: int) -> Formula:
+        f = generateSingle(self.uid(index))
+        for outputFormat in self.tables:
+            f.cacheRendering(outputFormat, self.text(index, outputFormat))
+        return f
+
+    def close(self):
+        self.map.close()
@@ -1,90 +1,193 @@
 #!/usr/bin/env python3
 
+import weakref
+
 class Formula:
-    def __init__(self, kind: str, lhs: 'Formula' = None, rhs: 'Formula' = None, name: str = None):
-        self._kind = kind
-        self._lhs = lhs
-        self._rhs = rhs
-        self._name = name
-        self.constructionInfo = ''
-        self.isTheorem = None
-        self.proof = None
-        self.counter = None
-        self.uid = None
-
-    def renamePreds(self, predName: str, newName: str):
-        if(self._kind == 'pred' and self._name == predName):
-            self._name = newName
-            return
-        if self._lhs is not None:
-            self._lhs.renamePreds(predName, newName)
-        if self._rhs is not None:
-            self._rhs.renamePreds(predName, newName)
+    # Immutable, hash-consed formula node. Structurally equal nodes are the same object (interned), so identical
+    # subtrees are shared and equality of children is an identity check. Hash is computed once, on construction.
+    # Interned nodes carry no annotations, annotate() returns a private copy of the node which can hold them
+    __slots__ = ('_kind', '_lhs', '_rhs', '_name', '_hash', '_interned', '_rendered', '_metrics',
+                 'constructionInfo', 'isTheorem', 'proof', 'counter', 'uid', '__weakref__')
+    _structure = ('_kind', '_lhs', '_rhs', '_name', '_hash', '_interned')
+    _annotations = ('constructionInfo', 'isTheorem', 'proof', 'counter', 'uid')
+    # (kind, lhs, rhs, name) -> interned node, nodes disappear from the table once nothing references them
+    _table = weakref.WeakValueDictionary()
+
+    def __new__(cls, kind: str = None, lhs: 'Formula' = None, rhs: 'Formula' = None, name: str = None):
+        # no kind only when unpickling a formula pickled before nodes were interned, __setstate__ fills the node
+        if kind is None:
+            return cls._make(None, None, None, None, None, False)
+        # children are always interned nodes, even when built from annotated ones
+        if lhs is not None and not lhs._interned:
+            lhs = cls(lhs._kind, lhs._lhs, lhs._rhs, lhs._name)
+        if rhs is not None and not rhs._interned:
+            rhs = cls(rhs._kind, rhs._lhs, rhs._rhs, rhs._name)
+        key = (kind, lhs, rhs, name)
+        node = cls._table.get(key)
+        if node is None:
+            node = cls._make(kind, lhs, rhs, name, hash(key), True)
+            cls._table[key] = node
+        return node
+
+    @classmethod
+    def _make(cls, kind, lhs, rhs, name, hashValue, interned):
+        node = object.__new__(cls)
+        node._fill(kind, lhs, rhs, name, hashValue, interned)
+        return node
+
+    def _fill(self, kind, lhs, rhs, name, hashValue, interned):
+        for attribute, value in zip(Formula._structure, (kind, lhs, rhs, name, hashValue, interned)):
+            object.__setattr__(self, attribute, value)
+        for attribute in Formula._annotations:
+            object.__setattr__(self, attribute, None)
+        object.__setattr__(self, 'constructionInfo', '')
+        # output format -> rendered text of the node
+        object.__setattr__(self, '_rendered', {})
+        object.__setattr__(self, '_metrics', None)
+
+    # state of a formula pickled before nodes were interned (its __dict__): the node becomes an annotated node with
+    # interned children, as if built by Formula(...).annotate(...)
+    def __setstate__(self, state):
+        if isinstance(state, tuple):
+            # (__dict__, slots) form of the state
+            state = dict(state[0] or {}, **(state[1] or {}))
+        lhs = state['_lhs'].canonical() if state.get('_lhs') is not None else None
+        rhs = state['_rhs'].canonical() if state.get('_rhs') is not None else None
+        key = (state['_kind'], lhs, rhs, state.get('_name'))
+        self._fill(*key, hash(key), False)
+        for attribute in Formula._annotations:
+            if attribute in state:
+                object.__setattr__(self, attribute, state[attribute])
+
+    def __setattr__(self, attribute, value):
+        if attribute.startswith('_'):
+            raise AttributeError('Formula is immutable')
+        if self._interned:
+            raise AttributeError('Interned formula cannot be annotated, use annotate()')
+        object.__setattr__(self, attribute, value)
+
+    # returns a copy of this node (sharing its children) which holds the given annotations (constructionInfo, uid, ...)
+    def annotate(self, **annotations) -> 'Formula':
+        node = Formula._make(self._kind, self._lhs, self._rhs, self._name, self._hash, False)
+        # structure is the same, so is the rendered text
+        object.__setattr__(node, '_rendered', self._rendered)
+        for attribute, value in annotations.items():
+            setattr(node, attribute, value)
+        return node
+
+    # returns interned node structurally equal to this one (the node itself unless it is annotated)
+    def canonical(self) -> 'Formula':
+        return self if self._interned else Formula(self._kind, self._lhs, self._rhs, self._name)
+
+    def __reduce__(self):
+        if self._interned:
+            return Formula, (self._kind, self._lhs, self._rhs, self._name)
+        annotations = {attribute: getattr(self, attribute) for attribute in Formula._annotations}
+        return _restoreAnnotated, (self._kind, self._lhs, self._rhs, self._name, annotations)
+
+    def renamePreds(self, predName: str, newName: str) -> 'Formula':
+        # returns formula with renamed predicates, unchanged subtrees are shared with this one
+        if self._kind == 'pred':
+            return pred(newName) if self._name == predName else self
+        lhs = self._lhs.renamePreds(predName, newName) if self._lhs is not None else None
+        rhs = self._rhs.renamePreds(predName, newName) if self._rhs is not None else None
+        if lhs is self._lhs and rhs is self._rhs:
+            return self
+        return Formula(self._kind, lhs, rhs, self._name)
+
+    # returns (number of nodes, modal depth), computed once for every (interned) node without recursion
+    def metrics(self) -> (int, int):
+        root = self.canonical()
+        stack = [root]
+        while stack:
+            node = stack[-1]
+            children = [child for child in (node._lhs, node._rhs) if child is not None]
+            missing = [child for child in children if child._metrics is None]
+            if missing:
+                stack += missing
+                continue
+            stack.pop()
+            size = 1 + sum(child._metrics[0] for child in children)
+            depth = max((child._metrics[1] for child in children), default=0) + (node._kind in ('necc', 'poss'))
+            object.__setattr__(node, '_metrics', (size, depth))
+        return root._metrics
+
+    # kind -> (prefix, infix, suffix) of every output format, predicates are rendered by a function of their name
+    _formats = {
+        'unicode': ({
+            'neg': ('¬', None, ''),
+            'conj': ('(', '∧', ')'),
+            'disj': ('(', '∨', ')'),
+            'impl': ('(', '→', ')'),
+            'necc': ('□', None, ''),
+            'poss': ('◇', None, ''),
+            'exists': ('∃x', None, ''),
+            'forall': ('∀x', None, ''),
+        }, lambda name: name.upper() + 'x', 'UNDEFINED'),
+        'prolog': ({
+            'neg': ('(~ ', None, ')'),
+            'conj': ('(', ' , ', ')'),
+            'disj': ('(', ' ; ', ')'),
+            'impl': ('(', ' => ', ')'),
+            'necc': ('(# ', None, ')'),
+            'poss': ('(* ', None, ')'),
+            'exists': ('(ex X: ', None, ')'),
+            'forall': ('(all X: ', None, ')'),
+        }, lambda name: name.lower() + '(X)', 'UNDEFINED'),
+        'thf': ({
+            'neg': ('(~ ', None, ')'),
+            'conj': ('( ', ' & ', ' )'),
+            'disj': ('( ', ' | ', ' )'),
+            'impl': ('( ', ' => ', ' )'),
+            'necc': ('( $box @ ', None, ' )'),
+            'poss': ('( $dia @ ', None, ' )'),
+            # not sure about these :/ Could also be a combination of these: !> ?* ^ @+ @-
+            'exists': ('( ? [X: $i] : ', None, ' )'),
+            'forall': ('( ! [X: $i] : ', None, ' )'),
+        }, lambda name: '(' + name.lower() + ' @ X)', None),
+    }
+
+    # renders formula in the given format. Text of every node is built once by joining the texts of its children and
+    # kept in the node, so shared subtrees are rendered only once. Tree is traversed without recursion
+    def _render(self, outputFormat: str) -> str:
+        if outputFormat in self._rendered:
+            return self._rendered[outputFormat]
+        templates, renderPred, undefined = Formula._formats[outputFormat]
+        stack = [self]
+        while stack:
+            node = stack[-1]
+            children = [child for child in (node._lhs, node._rhs) if child is not None]
+            missing = [child for child in children if outputFormat not in child._rendered]
+            if missing:
+                stack += missing
+                continue
+            stack.pop()
+            if node._kind == 'pred':
+                text = renderPred(node._name)
+            elif node._kind in templates:
+                prefix, infix, suffix = templates[node._kind]
+                if node._lhs is None:
+                    text = ''.join((prefix, node._rhs._rendered[outputFormat], suffix))
+                else:
+                    text = ''.join((prefix, node._lhs._rendered[outputFormat], infix,
+                                    node._rhs._rendered[outputFormat], suffix))
+            else:
+                text = undefined
+            node._rendered[outputFormat] = text
+        return self._rendered[outputFormat]
+
+    # stores text of the formula rendered elsewhere (e.g. read from a corpus file)
+    def cacheRendering(self, outputFormat: str, text: str):
+        self._rendered[outputFormat] = text
 
     def toUnicodeString(self):
-        if(self._kind == 'pred'):
-            return self._name.upper() + 'x'
-        elif(self._kind == 'neg'):
-            return '¬' + self._rhs.toUnicodeString()
-        elif(self._kind == 'conj'):
-            return '(' + self._lhs.toUnicodeString() + '∧' + self._rhs.toUnicodeString() + ')'
-        elif(self._kind == 'disj'):
-            return '(' + self._lhs.toUnicodeString() + '∨' + self._rhs.toUnicodeString() + ')'
-        elif(self._kind == 'impl'):
-            return '(' + self._lhs.toUnicodeString() + '→' + self._rhs.toUnicodeString() + ')'
-        elif(self._kind == 'necc'):
-            return '□' + self._rhs.toUnicodeString()
-        elif(self._kind == 'poss'):
-            return '◇' + self._rhs.toUnicodeString()
-        elif(self._kind == 'exists'):
-            return '∃x'+ self._rhs.toUnicodeString()
-        elif(self._kind == 'forall'):
-            return '∀x' + self._rhs.toUnicodeString()
-        else:
-            return 'UNDEFINED'
+        return self._render('unicode')
 
     def toPrologTerm(self):
-        if(self._kind == 'pred'):
-            return self._name.lower() + '(X)'
-        elif(self._kind == 'neg'):
-            return '(~ ' + self._rhs.toPrologTerm() + ')'
-        elif(self._kind == 'conj'):
-            return '(' + self._lhs.toPrologTerm() + ' , ' + self._rhs.toPrologTerm() + ')'
-        elif(self._kind == 'disj'):
-            return '(' + self._lhs.toPrologTerm() + ' ; ' + self._rhs.toPrologTerm() + ')'
-        elif(self._kind == 'impl'):
-            return '(' + self._lhs.toPrologTerm() + ' => ' + self._rhs.toPrologTerm() + ')'
-        elif(self._kind == 'necc'):
-            return '(# ' + self._rhs.toPrologTerm() + ')'
-        elif(self._kind == 'poss'):
-            return '(* ' + self._rhs.toPrologTerm() + ')'
-        elif(self._kind == 'exists'):
-            return '(ex X: ' + self._rhs.toPrologTerm() + ')'
-        elif(self._kind == 'forall'):
-            return '(all X: ' + self._rhs.toPrologTerm() + ')'
-        else:
-            return 'UNDEFINED'
+        return self._render('prolog')
 
     def toTHF(self):
-        if self._kind == 'pred':
-            return '(' + self._name.lower() + ' @ X)'
-        elif self._kind == 'neg':
-            return '(~ ' + self._rhs.toTHF() + ')'
-        elif self._kind == 'conj':
-            return '( ' + self._lhs.toTHF() + ' & ' + self._rhs.toTHF() + ' )'
-        elif self._kind == 'disj':
-            return '( ' + self._lhs.toTHF() + ' | ' + self._rhs.toTHF() + ' )'
-        elif self._kind == 'impl':
-            return '( ' + self._lhs.toTHF() + ' => ' + self._rhs.toTHF() + ' )'
-        elif self._kind == 'necc':
-            return '( $box @ ' + self._rhs.toTHF() + ' )'
-        elif self._kind == 'poss':
-            return '( $dia @ ' + self._rhs.toTHF() + ' )'
-        # not sure about these :/ Could also be a combination of these: !> ?* ^ @+ @-
-        elif self._kind == 'exists':
-            return '( ? [X: $i] : ' + self._rhs.toTHF() + ' )'
-        elif self._kind == 'forall':
-            return '( ! [X: $i] : ' + self._rhs.toTHF() + ' )'
+        return self._render('thf')
 
     def __repr__(self):
         return 'Formula(kind=' + repr(self._kind)\
@@ -96,10 +199,19 @@ class Formula:
         return self.toUnicodeString()
 
     def __hash__(self):
-        return hash((self._kind, self._rhs, self._lhs, self._name))
+        return self._hash
 
     def __eq__(self, other):
-        return self._kind == other._kind and self._lhs == other._lhs and self._rhs == other._rhs and self._name == other._name
+        if self is other:
+            return True
+        if not isinstance(other, Formula):
+            return NotImplemented
+        # children are interned, comparing them by identity is enough
+        return self._hash == other._hash and self._kind == other._kind and self._lhs is other._lhs\
+            and self._rhs is other._rhs and self._name == other._name
+
+def _restoreAnnotated(kind: str, lhs: Formula, rhs: Formula, name: str, annotations: dict) -> Formula:
+    return Formula(kind, lhs, rhs, name).annotate(**annotations)
 
 def pred(name: str):
     return Formula(kind='pred', name=name)
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 
 import sys
-from copy import deepcopy
+import itertools
+import functools
 from .Templates import Templates
 from .Figures import Figures
 from .Formula import impl, conj, Formula
@@ -11,50 +12,89 @@ class UIDParseError(Exception):
 
 letters = ["A", "E", "I", "O"]
 
+modalTypes = [
+    "non modal",
+    "accidentaly",
+    "accidentaly (quod est)",
+    "necessarily",
+    "necessarily (quod est)",
+    "possibly",
+    "possibly (quod est)"
+]
+
+# syllogisms are ordered as if generated by nested loops over figure, major, minor, conclusion, major modal,
+# minor modal and conclusion modal (the last one changing the fastest). Index of a syllogism is a mixed-radix number
+# with these digits
+radices = (4, len(letters), len(letters), len(letters), len(modalTypes), len(modalTypes), len(modalTypes))
+syllogismCount = 1
+for radix in radices:
+    syllogismCount *= radix
+
+# returns (fig, majorType, majorModalType, minorType, minorModalType, conclusionType, conclusionModalType)
+# of the k-th syllogism
+def syllogismAt(k: int) -> (int, str, str, str, str, str, str):
+    if k < 0 or k >= syllogismCount:
+        raise IndexError('syllogism index out of range: %d' % (k,))
+    digits = []
+    for radix in reversed(radices):
+        k, digit = divmod(k, radix)
+        digits.append(digit)
+    (conclusionModal, minorModal, majorModal, conclusion, minor, major, fig) = digits
+    return (fig + 1, letters[major], modalTypes[majorModal], letters[minor], modalTypes[minorModal],
+            letters[conclusion], modalTypes[conclusionModal])
+
+def formulaAt(k: int) -> Formula:
+    return makeFormula(*syllogismAt(k))
+
+def uidAt(k: int) -> str:
+    return makeUID(*syllogismAt(k))
+
+# yields formulas lazily. s formulas are skipped, then every m-th one is taken, n at most (all when n is None).
+# Without noDuplicates only the selected formulas are constructed, with it duplicates are left out before applying
+# s, m and n (keeping the first occurrence), which needs every formula up to the last selected one
+def iterFormulas(n, m, s, noDuplicates):
+    stop = None if n is None else s + n * m
+    if not noDuplicates:
+        for k in range(s, syllogismCount if stop is None else min(stop, syllogismCount), m):
+            yield formulaAt(k)
+        return
+
+    def unique():
+        seen = set()
+        for k in range(syllogismCount):
+            fla = formulaAt(k)
+            if fla not in seen:
+                seen.add(fla)
+                yield fla
+    yield from itertools.islice(unique(), s, stop, m)
+
 def generate(n, m, s, noDuplicates):
-    modalTypes = [
-        "non modal",
-        "accidentaly",
-        "accidentaly (quod est)",
-        "necessarily",
-        "necessarily (quod est)",
-        "possibly",
-        "possibly (quod est)"
-    ]
-
-    if noDuplicates:
-        allFormulas = set()
-    else:
-        allFormulas = list() # [] would do the same but doing list() for consistency with set() above
-
-    for fig in range(1, 5):
-        for majorType in letters:
-            for minorType in letters:
-                for conclusionType in letters:
-                    for majorModalType in modalTypes:
-                        for minorModalType in modalTypes:
-                            for conclusionModalType in modalTypes:
-                                fla = makeFormula(fig,
-                                                  majorType, majorModalType,
-                                                  minorType, minorModalType,
-                                                  conclusionType, conclusionModalType)
-                                #if noDuplicates and full in allFormulas:
-                                    #idx = allFormulas.index(full)
-                                    #print('Duplicate formula:\nIn set: %s\nNew:    %s' % (allFormulas[idx].constructionInfo, full.constructionInfo), file=sys.stderr)
-                                    #continue
-                                if noDuplicates:
-                                    allFormulas.add(fla)
-                                else:
-                                    allFormulas.append(fla)
-                                if n is not None and len(allFormulas) >= s + n * m:
-                                    return list(allFormulas)
-    return list(allFormulas)
+    return list(iterFormulas(n, m, s, noDuplicates))
 
 def generateSingle(uid) -> str:
     (fig, majorType, majorModalType, minorType, minorModalType, conclusionType, conclusionModalType) = parseUID(uid)
     return makeFormula(fig, majorType, majorModalType, minorType, minorModalType, conclusionType, conclusionModalType)
 
+# formulas are immutable and interned, so the few distinct premises are renamed once and shared by all syllogisms
+@functools.lru_cache(maxsize=None)
+def premise(modalType, premiseType, first, second) -> Formula:
+    return Templates[modalType][premiseType].renamePreds("F", first).renamePreds("G", second)
+
 def makeFormula(fig, majorType, majorModalType, minorType, minorModalType, conclusionType, conclusionModalType):
+    major = premise(majorModalType, majorType, *Figures[fig]["M"])
+    minor = premise(minorModalType, minorType, *Figures[fig]["m"])
+    conclusion = premise(conclusionModalType, conclusionType, "S", "P")
+    full = impl( conj( major, minor ), conclusion )
+    return full.annotate(
+        # construction information
+        constructionInfo={'major': majorType, 'majorModal': majorModalType,
+                          'minor': minorType, 'minorModal': minorModalType,
+                          'conclusion': conclusionType, 'conclusionModal': conclusionModalType,
+                          'figure': fig},
+        # also contains construction information but in a much more concise form
+        uid=makeUID(fig, majorType, majorModalType, minorType, minorModalType, conclusionType, conclusionModalType))
+
+def makeUID(fig, majorType, majorModalType, minorType, minorModalType, conclusionType, conclusionModalType) -> str:
     modalTypeMap = {
         "non modal": "0",
         "accidentaly": "a",
@@ -64,25 +104,7 @@ def makeFormula(fig, majorType, majorModalType, minorType, minorModalType, concl
         "possibly": "p",
         "possibly (quod est)": "P"
     }
-
-    major = deepcopy(Templates[majorModalType][majorType])
-    minor = deepcopy(Templates[minorModalType][minorType])
-    conclusion = deepcopy(Templates[conclusionModalType][conclusionType])
-    major.renamePreds("F", Figures[fig]["M"][0])
-    major.renamePreds("G", Figures[fig]["M"][1])
-    minor.renamePreds("F", Figures[fig]["m"][0])
-    minor.renamePreds("G", Figures[fig]["m"][1])
-    conclusion.renamePreds("F", "S")
-    conclusion.renamePreds("G", "P")
-    full = impl( conj( major, minor ), conclusion )
-    # construction information
-    full.constructionInfo = {'major': majorType, 'majorModal': majorModalType,
-                             'minor': minorType, 'minorModal': minorModalType,
-                             'conclusion': conclusionType, 'conclusionModal': conclusionModalType,
-                             'figure': fig}
-    # also contains construction information but in a much more concise form
-    full.uid = "%d%c%c%c%c%c%c" % (fig, majorType, modalTypeMap[majorModalType], minorType, modalTypeMap[minorModalType], conclusionType, modalTypeMap[conclusionModalType])
-    return full
+    return "%d%c%c%c%c%c%c" % (fig, majorType, modalTypeMap[majorModalType], minorType, modalTypeMap[minorModalType], conclusionType, modalTypeMap[conclusionModalType])
 
 def parseUID(uid: str) -> (int, str, str, str, str, str, str):
     if len(uid) != 7:
@@ -119,33 +141,58 @@ def parseUID(uid: str) -> (int, str, str, str, str, str, str):
         raise UIDParseError("Unrecognized modal premise type")
     return fig, majorType, majorModalType, minorType, minorModalType, conclusionType, conclusionModalType
 
-def printUnicode(fs: list):
+# formulas are printed as they come, fs can be any iterable
+def printUnicode(fs):
     for f in fs:
         print(f.toUnicodeString())
 
-def printReprs(fs: list):
+def printReprs(fs):
     for f in fs:
         print(repr(f))
         assert eval(repr(f)) == f, "Formula.__repr__() is not up to date"
 
-def printProlog(fs: list):
+def printProlog(fs):
     for f in fs:
         print(f.toPrologTerm())
 
-def printPickle(fs: list):
+class PickledList:
+    # pickled as a list, items are taken from the iterable while the pickle is being written
+    def __init__(self, items):
+        self.items = items
+
+    def __reduce__(self):
+        return list, (), None, iter(self.items)
+
+def printPickle(fs):
     import pickle
-    pickle.dump(fs, sys.stdout.buffer, protocol=-1)
+    pickle.dump(PickledList(fs), sys.stdout.buffer, protocol=-1)
 
-def printTHF(fs: list):
+def printTHF(fs):
     for f in fs:
         print(f.toTHF())
 
+def printUIDs(fs):
+    for f in fs:
+        print(f.uid)
+
+def printCorpusFile(fs, stringFormats):
+    from .CorpusFile import writeCorpusFile
+    writeCorpusFile(sys.stdout.buffer, fs, stringFormats)
+
 def positive_int(value):
     ival = int(value)
     if ival <= 0:
         raise argparse.ArgumentTypeError("invalid positive int value: '%s'" % (value,))
     return ival
 
+def string_formats(value):
+    from .CorpusFile import formats
+    stringFormats = [f for f in value.split(',') if f]
+    for f in stringFormats:
+        if f not in formats:
+            raise argparse.ArgumentTypeError("invalid string format: '%s' (choose from %s)" % (f, ', '.join(formats)))
+    return stringFormats
+
 def parseArgs():
     parser = argparse.ArgumentParser(allow_abbrev=False)
     parser.add_argument('-n', help='number of formulas to output (taken from the start) (default behaviour is to output all formulas)', type=positive_int)
@@ -160,15 +207,18 @@ def parseArgs():
     outputFormatGroup.add_argument('-p', '--prolog', dest='outputFormat', action='store_const', const='p')
     outputFormatGroup.add_argument('-P', '--pickle', dest='outputFormat', action='store_const', const='P')
     outputFormatGroup.add_argument('-t', '--thf', dest='outputFormat', action='store_const', const='t')
+    outputFormatGroup.add_argument('-U', '--uids', dest='outputFormat', action='store_const', const='U')
+    outputFormatGroup.add_argument('-b', '--binary', dest='outputFormat', action='store_const', const='b')
+    parser.add_argument('--strings', help='comma separated formats (prolog, thf, unicode) stored pre-rendered in the binary corpus', type=string_formats, default=[])
 
     args = parser.parse_args()
-    return args.outputFormat, args.n, args.m, args.s, args.d, args.i
+    return args.outputFormat, args.n, args.m, args.s, args.d, args.i, args.strings
     
 if __name__ == '__main__':
     import argparse
 
     # default output format is pickle
-    (outputFormat, n, m, s, noDuplicates, uid) = parseArgs()
+    (outputFormat, n, m, s, noDuplicates, uid, stringFormats) = parseArgs()
     if uid is not None:
         try:
             fs = [generateSingle(uid)]
@@ -176,15 +226,19 @@ if __name__ == '__main__':
             print("'%s' is not recognized as valid UID: %s" % (uid, e), file=sys.stderr)
             exit(1)
     else:
-        fs = generate(n, m, s, noDuplicates)
+        fs = iterFormulas(n, m, s, noDuplicates)
 
     if outputFormat == 'u':
-        printUnicode(fs[s::m])
+        printUnicode(fs)
     elif outputFormat == 'r':
-        printReprs(fs[s::m])
+        printReprs(fs)
     elif outputFormat == 'p':
-        printProlog(fs[s::m])
+        printProlog(fs)
     elif outputFormat == 'P':
-        printPickle(fs[s::m])
+        printPickle(fs)
     elif outputFormat == 't':
-        printTHF(fs[s::m])
+        printTHF(fs)
+    elif outputFormat == 'U':
+        printUIDs(fs)
+    elif outputFormat == 'b':
+        printCorpusFile(fs, stringFormats)
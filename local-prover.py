@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+from orchestrator.Provers import proverBuilders, proverNames, printStats, chooseTimeouts, allocateProverRanks,\
+    simulatedProverBuilders, overrideSettings
+from orchestrator.Master import Master, makeCorpus
+from orchestrator.Trace import TraceWriter
+from prover.ResultCache import ResultCache
+from settings import settings
+
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import multiprocessing.util
+import os
+import time
+import argparse
+
+# Runs all the provers on a single machine without MPI: every prover has its own pool of processes (like the 'pools'
+# scheduler of mpi-prover.py) pulling batches of the prover's queue, results are joined per formula in this process.
+# There is no early cancellation, so results of all provers match mpi-prover.py with earlyCancellation None (with
+# output_order 'index' rows are in the same order too)
+
+# prover of the worker process, its corpus and writer of its trace records, set up by initWorker
+prover = None
+corpus = None
+tracer = None
+
+def initWorker(proverIndex):
+    global prover, corpus, tracer
+    # process id takes place of the rank
+    builders = proverBuilders
+    if settings['simulatedProvers'] is not None:
+        builders = simulatedProverBuilders(settings['simulatedProvers'])
+    prover = builders[proverIndex](os.getpid())
+    assert prover.name == proverNames[proverIndex], 'proverNames do not match proverBuilders'
+    if settings['cache_path'] is not None:
+        prover.cache = ResultCache(settings['cache_path'], settings['cache_journal_mode'])
+    # formulas from the pickle come with the batches
+    corpus = makeCorpus()
+    multiprocessing.util.Finalize(None, prover.close, exitpriority=10)
+    if settings['trace_path'] is not None:
+        prover.trace = []
+        tracer = TraceWriter(settings['trace_path'], os.getpid())
+        multiprocessing.util.Finalize(None, tracer.close, exitpriority=10)
+
+def describeProver():
+    return prover.name, prover.logic, prover.domain
+
+def proveBatch(batch, timeout):
+    # returns results [(index, result)] and stats of the worker after the batch
+    prover.stats['timeout'] = timeout
+    batch = corpus.unpack(batch)
+    results = prover.proveMany([f for _, f in batch], timeout, settings['proverConcurrency'])
+    results = [(i, result) for (i, _), result in zip(batch, results)]
+    if tracer is not None:
+        tracer.write(prover.takeTrace())
+    return results, os.getpid(), dict(prover.stats)
+
+# number of formulas the worker went through according to its stats
+def handled(stats) -> int:
+    return stats['processed'] + stats['skipped'] + stats['cached']
+
+def parseArgs():
+    parser = argparse.ArgumentParser(allow_abbrev=False)
+    parser.add_argument('--resume', help='skip formulas which already have results in the journal of the previous run',
+                        action='store_true')
+    parser.add_argument('--settings', help='JSON file with settings overriding the ones from settings.py')
+    return parser.parse_args()
+
+def main():
+    args = parseArgs()
+    if args.settings is not None:
+        overrideSettings(args.settings)
+    execStart = time.perf_counter()
+
+    assert settings['ordering'] in [None, 'cost', 'auto'], "Unknown ordering '%s'" % (settings['ordering'],)
+    assert settings['output_order'] in [None, 'index'], "Unknown output order '%s'" % (settings['output_order'],)
+    size = settings['localProcesses'] or (sum(settings['proverRanks']) if settings['proverRanks'] is not None
+                                          else os.cpu_count())
+    proverCounts = allocateProverRanks(max(size, len(proverBuilders)), settings['proverRanks'])
+
+    if settings['trace_path'] is not None:
+        TraceWriter.clear(settings['trace_path'])
+    pools = [ProcessPoolExecutor(count, initializer=initWorker, initargs=(p,)) for p, count in enumerate(proverCounts)]
+    try:
+        provers = [pool.submit(describeProver).result() for pool in pools]
+        timeouts = chooseTimeouts(provers)
+        for name, (timeout, source) in timeouts.items():
+            print('Timeout of %s: %d s (%s)' % (name, timeout, source))
+
+        corpus = makeCorpus()
+        print('Formula source:', settings['formula_source'])
+        print('Base timeout:', settings['timeout'])
+        print('Logic:', settings['logic'])
+        print('Domain:', settings['domain'])
+        print('Prover processes:', ', '.join('%s %d' % p for p in zip(proverNames, proverCounts)))
+        print('Result cache:', settings['cache_path'])
+        print('Journal:', settings['journal_dir'])
+        print('Trace:', settings['trace_path'])
+        master = Master(corpus, provers, timeouts, args.resume, joinProvers=True)
+        print('Batch size:', settings['batchSize'])
+
+        # every prover goes through all the formulas, keeping two batches per process submitted
+        batchSize = settings['batchSize']
+        nextIndex = [0] * len(pools)
+        running = {}
+        def submit(p):
+            batch = master.indices[nextIndex[p]:nextIndex[p] + batchSize]
+            nextIndex[p] += len(batch)
+            if batch:
+                running[pools[p].submit(proveBatch, corpus.pack(batch), timeouts[proverNames[p]][0])] = p
+        for p, count in enumerate(proverCounts):
+            for _ in range(2 * count):
+                submit(p)
+
+        # latest stats of every worker and time when the pool of each prover finished
+        stats = [{} for _ in pools]
+        finished = [execStart] * len(pools)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                p = running.pop(future)
+                results, pid, workerStats = future.result()
+                # stats are cumulative, batches of the same worker finishing together may come in any order
+                previous = stats[p].get(pid)
+                if previous is None or handled(workerStats) >= handled(previous):
+                    stats[p][pid] = workerStats
+                finished[p] = time.perf_counter()
+                master.join([(i, p, result) for i, result in results])
+                submit(p)
+    finally:
+        for pool in pools:
+            pool.shutdown()
+    master.close()
+    if settings['trace_path'] is not None:
+        print('Trace records:', TraceWriter.merge(settings['trace_path']))
+
+    for p, name in enumerate(proverNames):
+        # stats of all processes of the prover together
+        total = {key: sum(s[key] for s in stats[p].values()) for key in ['timeProcessing', 'timeProving', 'processed',
+                                                                         'conclusionReached', 'skipped', 'cancelled',
+                                                                         'cached', 'failed', 'problemFiles', 'timeWall',
+                                                                         'timeCPU', 'restarts']}
+        total['peakRSS'] = max((s['peakRSS'] for s in stats[p].values()), default=0)
+        total['timeout'] = timeouts[name][0]
+        printStats('Pool', p, finished[p] - execStart, name, total)
+    print('Total execution time:', time.perf_counter() - execStart, 's')
+
+if __name__ == '__main__':
+    main()
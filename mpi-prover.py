@@ -1,203 +1,334 @@
 from mpi4py import MPI
-from prover.MleancopProver import MleancopProver
-from prover.MleantapProver import MleantapProver
-from prover.Leo3Prover import Leo3Prover
-from prover.TPGProver import TPGProver
-from generator import Formula
+from orchestrator.Provers import proverBuilders, proverNames, printStats, chooseTimeouts, allocateProverRanks,\
+    simulatedProverBuilders, overrideSettings
+from orchestrator.Consolidation import isDecided, consolidateResult
+from orchestrator.Journal import Journal
+from orchestrator.Master import Master, makeCorpus
+from orchestrator.Pools import assignRanks
+from orchestrator.Trace import TraceWriter
+from prover.ResultCache import ResultCache
 from settings import settings
 
 import time
-import math
-import csv
-import sys
-
-proverBuilders = [
-    lambda wr: MleancopProver(wr, mleancop_dir=settings['mleancop_dir'],
-                         logic=settings['logic'],
-                         domain=settings['domain']),
-    lambda wr: MleantapProver(wr, mleantap_path=settings['mleantap_path'],
-                         prolog_path=settings['swipl_path'],
-                         logic=settings['logic'],
-                         domain=settings['domain']),
-    lambda wr: Leo3Prover(wr, leo3_jar_path=settings['leo3_jar_path'],
-                     java_path=settings['java_path'],
-                     logic=settings['logic'],
-                     domain=settings['domain']),
-    lambda wr: TPGProver(wr, tpg_dir=settings['tpg_dir'],
-                    node_path=settings['node_path'],
-                    logic=settings['logic'],
-                    domain=settings['domain']),
-]
-
-def readPickle():
-    import pickle
-    with open(settings['formula_pickle_path'], 'rb') as f:
-        return pickle.load(f)
-
-def printStats(role, wr, time, prover, report):
-    stats = '''
-=======================================
-    %s %d lasted for:    %.2f s
-    Prover:                 %s
-    Stats:
-        running time:       %.2f s
-        proving time:       %.2f s
-        processed:          %d
-        conclusion reached: %d
-=======================================''' % (role, wr, time, prover,
-                                              report['timeProcessing'],
-                                              report['timeProving'],
-                                              report['processed'],
-                                              report['conclusionReached'])
-    print(stats)
-
-def consolidateResult(*results):
-    # check if all results are for the same formula
-    fs = [r[0] for r in results]
-    assert all([fs[0] == f for f in fs])
-
-    # count prover results
-    l = [r[1] for r in results]
-    countOfTheoremResults = l.count(True)
-    countOfNonTheoremResults = l.count(False)
-    countOfUnknownResults = l.count(None)
-
-    # (formula, consolidated result, prover[0] result, prover[0] proof, prover[1] result, prover[1] proof, ...)
-    consolidatedResult = [results[0][0], None]
-
-    # contradiction?
-    if countOfTheoremResults > 0 and countOfNonTheoremResults > 0:
-        print('Contradiction:', mleancop[1], mleantap[1], leo2[1], leo3[1], file=sys.stderr)
-        consolidatedResult[1] = 'Unknown'
-    elif countOfTheoremResults >= settings['theoremThreshold']:
-        consolidatedResult[1] = 'Theorem'
-    elif countOfNonTheoremResults >= settings['nonTheoremThreshold']:
-        consolidatedResult[1] = 'Non-Theorem'
-    else:
-        consolidatedResult[1] = 'Unknown'
+import threading
+import argparse
+
+# tags of the messages exchanged between group leaders and the master when scheduling dynamically
+BATCH_REQUEST_TAG = 1
+BATCH_TAG = 2
+# tag of the messages exchanged between members of the work group when cancelling decided formulas early
+VERDICT_TAG = 3
+# tag of consolidated results of a batch sent by group leader to the master
+RESULT_TAG = 4
+
+class VerdictExchange:
+    # members of a work group tell each other results of formulas from the current batch as soon as they have them,
+    # so that everybody can stop working on formulas whose consolidated result is already decided
+    def __init__(self, workComm, batchSize, possibleResults):
+        self.comm = workComm
+        self.possibleResults = possibleResults
+        self.verdicts = [{} for _ in range(batchSize)]
+        self.expected = (workComm.Get_size() - 1) * batchSize
+        self.requests = []
+        # formulas of the batch may be proved by several threads at once
+        self.lock = threading.RLock()
+
+    def receive(self, block=False):
+        with self.lock:
+            while self.expected > 0 and (block or self.comm.iprobe(source=MPI.ANY_SOURCE, tag=VERDICT_TAG)):
+                position, proverIndex, verdict = self.comm.recv(source=MPI.ANY_SOURCE, tag=VERDICT_TAG)
+                self.verdicts[position][proverIndex] = verdict
+                self.expected -= 1
+
+    def publish(self, position, verdict):
+        rank = self.comm.Get_rank()
+        with self.lock:
+            self.verdicts[position][rank] = verdict
+            self.requests += [self.comm.isend((position, rank, verdict), dest=r, tag=VERDICT_TAG)
+                              for r in range(self.comm.Get_size()) if r != rank]
+
+    def isDecided(self, position):
+        with self.lock:
+            self.receive()
+            return isDecided(self.verdicts[position], self.possibleResults)
+
+    def finish(self):
+        # all messages of the batch have to be received before the next batch starts
+        self.receive(block=True)
+        MPI.Request.waitall(self.requests)
+
+def serveBatches(dispatchComm, corpus, indices, batchSize):
+    # runs in a separate thread on the master. Every request from a group leader is answered with the next batch of
+    # formulas taken from indices (packed by the corpus), empty batch tells the leader that there is nothing left to do.
+    # Request names the queue it is for (index of the prover when every prover has its own pool of ranks, None
+    # otherwise), every queue goes through all the indices
+    nextIndex = {}
+    finishedLeaders = 0
+    status = MPI.Status()
+    while finishedLeaders < dispatchComm.Get_size():
+        queue = dispatchComm.recv(source=MPI.ANY_SOURCE, tag=BATCH_REQUEST_TAG, status=status)
+        start = nextIndex.get(queue, 0)
+        batch = corpus.pack(indices[start:start + batchSize])
+        nextIndex[queue] = start + len(batch)
+        if not batch:
+            finishedLeaders += 1
+        dispatchComm.send(batch, dest=status.Get_source(), tag=BATCH_TAG)
+
+def requestBatch(dispatchComm, queue=None):
+    dispatchComm.send(queue, dest=0, tag=BATCH_REQUEST_TAG)
+    return dispatchComm.recv(source=0, tag=BATCH_TAG)
+
+def proveBatches(prover, workComm, corpus, nextBatch, timeout, report, tracer=None):
+    # whole group works on the same batch, leader obtains it by calling nextBatch and shares it with the group,
+    # every member unpacks the (index, formula) pairs from it.
+    # Leader passes list of (index, results of all group members) of every batch to report.
+    # Trace records of the batch are written by tracer
+    cancellation = settings['earlyCancellation'] is not None and workComm.Get_size() > 1
+    if cancellation:
+        # workComm rank is the index of the prover
+        possibleResults = workComm.allgather(prover.possibleResults)
+    while True:
+        batch = nextBatch() if workComm.Get_rank() == 0 else None
+        batch = workComm.bcast(batch, root=0)
+        if not batch:
+            return
+        batch = corpus.unpack(batch)
 
-    for r in results:
-        if r[1] is None:
-            proverResult = 'Unknown'
-        elif r[1]:
-            proverResult = 'Theorem'
+        formulas = [f for _, f in batch]
+        if not cancellation:
+            results = prover.proveMany(formulas, timeout, settings['proverConcurrency'])
         else:
-            proverResult = 'Non-Theorem'
-        proverProof = r[2]
+            exchange = VerdictExchange(workComm, len(batch), possibleResults)
+            results = prover.proveMany(formulas, timeout, settings['proverConcurrency'],
+                                       cancelled=exchange.isDecided,
+                                       done=lambda position, result: exchange.publish(position, result[1]))
+            exchange.finish()
+        if tracer is not None:
+            tracer.write(prover.takeTrace())
+        results = workComm.gather(results, root=0)
 
-        consolidatedResult += [proverResult, proverProof]
+        if workComm.Get_rank() == 0:
+            # get a list of tuples: (first prover res, second prover res, ...)
+            zippedResults = list(zip(*results))
+            report([(i, r) for (i, _), r in zip(batch, zippedResults)])
 
-    return tuple(consolidatedResult)
+class ResultCollector:
+    # passes results sent by group leaders to master as they arrive, either from a separate thread (receive with block)
+    # or between batches of the master (receive without block, static scheduler). Empty list tells that the leader has
+    # no more results. With pools results are of single provers
+    def __init__(self, resultComm, master, pools, leaders):
+        self.comm = resultComm
+        self.master = master
+        self.pools = pools
+        # leaders which have not finished yet
+        self.leaders = leaders
+
+    def receive(self, block=False):
+        while self.leaders > 0 and (block or self.comm.iprobe(source=MPI.ANY_SOURCE, tag=RESULT_TAG)):
+            results = self.comm.recv(source=MPI.ANY_SOURCE, tag=RESULT_TAG)
+            if not results:
+                self.leaders -= 1
+            self.add(results)
+
+    def add(self, results):
+        if self.pools:
+            self.master.join(results)
+        else:
+            self.master.write(results)
+
+def parseArgs():
+    parser = argparse.ArgumentParser(allow_abbrev=False)
+    parser.add_argument('--resume', help='skip formulas which already have results in the journal of the previous run',
+                        action='store_true')
+    parser.add_argument('--settings', help='JSON file with settings overriding the ones from settings.py')
+    return parser.parse_args()
 
 def main():
+    args = parseArgs()
+    if args.settings is not None:
+        overrideSettings(args.settings)
     execStart = time.perf_counter()
     worldRank = MPI.COMM_WORLD.Get_rank()
 
-    assert (MPI.COMM_WORLD.Get_size() % len(proverBuilders)) == 0,\
-        ('Number of processors is not divisible by number of provers – some formulas would not be checked by ' + \
-        'all provers (procs: %d ; provers: %d)') % (MPI.COMM_WORLD.Get_size(), len(proverBuilders))
+    assert settings['scheduler'] in ['static', 'dynamic', 'pools'], "Unknown scheduler '%s'" % (settings['scheduler'],)
+    assert settings['earlyCancellation'] in [None, 'strict', 'threshold'],\
+        "Unknown early cancellation mode '%s'" % (settings['earlyCancellation'],)
+    assert settings['ordering'] in [None, 'cost', 'auto'], "Unknown ordering '%s'" % (settings['ordering'],)
+    assert settings['output_order'] in [None, 'index'], "Unknown output order '%s'" % (settings['output_order'],)
+    pools = settings['scheduler'] == 'pools'
+    # master hands out batches on demand
+    dynamic = settings['scheduler'] in ['dynamic', 'pools']
 
-    # communicator only for leaders, there will be one leader in each work group
-    if worldRank % len(proverBuilders) == 0:
-        executiveColor = 1
+    if pools:
+        # every prover has its own pool of ranks, every rank works alone (as a leader of a group of its own) on batches
+        # of its prover's queue. Master joins results of the provers per formula
+        proverCounts = MPI.COMM_WORLD.bcast(allocateProverRanks(MPI.COMM_WORLD.Get_size(), settings['proverRanks'])
+                                            if worldRank == 0 else None, root=0)
+        proverIndex = assignRanks(proverCounts)[worldRank]
+        executiveComm = MPI.COMM_WORLD
+        workComm = MPI.COMM_SELF
     else:
-        executiveColor = MPI.UNDEFINED
-    executiveComm = MPI.COMM_WORLD.Split(color=executiveColor, key=0)
+        assert (MPI.COMM_WORLD.Get_size() % len(proverBuilders)) == 0,\
+            ('Number of processors is not divisible by number of provers – some formulas would not be checked by ' + \
+            'all provers (procs: %d ; provers: %d)') % (MPI.COMM_WORLD.Get_size(), len(proverBuilders))
+        proverIndex = worldRank % len(proverBuilders)
+
+        # communicator only for leaders, there will be one leader in each work group
+        if worldRank % len(proverBuilders) == 0:
+            executiveColor = 1
+        else:
+            executiveColor = MPI.UNDEFINED
+        executiveComm = MPI.COMM_WORLD.Split(color=executiveColor, key=0)
+
+        # worker communicators: groups of processes, each for single prover, leader included
+        # key makes sure group leader will get rank 0
+        workComm = MPI.COMM_WORLD.Split(color=int(worldRank / len(proverBuilders)), key=worldRank % len(proverBuilders))
 
-    # worker communicators: groups of processes, each for single prover, leader included
-    # key makes sure group leader will get rank 0
-    workComm = MPI.COMM_WORLD.Split(color=int(worldRank / len(proverBuilders)), key=worldRank % len(proverBuilders))
-    
+    # when scheduling dynamically master collects results and answers batch requests from separate threads while it
+    # works as a group leader, static master collects results between its batches
+    if dynamic:
+        assert MPI.Query_thread() == MPI.THREAD_MULTIPLE, 'Master needs MPI_THREAD_MULTIPLE support'
+    elif settings['earlyCancellation'] is not None and (settings['proverConcurrency'] or 1) > 1:
+        # verdicts are exchanged from the threads of proveMany, one at a time
+        assert MPI.Query_thread() >= MPI.THREAD_SERIALIZED,\
+            'Early cancellation with proverConcurrency needs MPI_THREAD_SERIALIZED support'
+    if executiveComm != MPI.COMM_NULL:
+        resultComm = executiveComm.Dup()
+        if dynamic:
+            dispatchComm = executiveComm.Dup()
+
+    # choose a prover builder lambda and run it to obtain prover object
+    builders = proverBuilders
+    if settings['simulatedProvers'] is not None:
+        builders = simulatedProverBuilders(settings['simulatedProvers'])
+    prover = builders[proverIndex](worldRank)
+    assert prover.name == proverNames[proverIndex], 'proverNames do not match proverBuilders'
+    if settings['cache_path'] is not None:
+        prover.cache = ResultCache(settings['cache_path'], settings['cache_journal_mode'])
+
+    # master chooses timeouts for all provers and shares them, so that all ranks of a prover use the same one
+    provers = sorted(set(MPI.COMM_WORLD.allgather((proverIndex, prover.name, prover.logic, prover.domain))))
+    provers = [(name, logic, domain) for _, name, logic, domain in provers]
+    timeouts = chooseTimeouts(provers) if worldRank == 0 else None
+    if worldRank == 0 and settings['trace_path'] is not None:
+        TraceWriter.clear(settings['trace_path'])
+    timeouts = MPI.COMM_WORLD.bcast(timeouts, root=0)
     if worldRank == 0:
-        print('Start read')
-        tstart = time.perf_counter()
-        fs = readPickle()
-        tend = time.perf_counter()
-        print('End read:', tend - tstart, 's')
+        for name, (timeout, source) in timeouts.items():
+            print('Timeout of %s: %d s (%s)' % (name, timeout, source))
+    prover.stats['timeout'] = timeouts[prover.name][0]
+
+    # every rank streams trace records of its prover to a part of the trace, master merges them at the end
+    tracer = None
+    if settings['trace_path'] is not None:
+        prover.trace = []
+        tracer = TraceWriter(settings['trace_path'], worldRank)
+
+    # every rank has its corpus, formulas from the pickle are read only by the master
+    corpus = makeCorpus()
 
-        print('Formula count:', len(fs))
+    if worldRank == 0:
+        print('Formula source:', settings['formula_source'])
         print('Base timeout:', settings['timeout'])
         print('Logic:', settings['logic'])
         print('Domain:', settings['domain'])
+        print('Scheduler:', settings['scheduler'])
+        if pools:
+            print('Prover ranks:', ', '.join('%s %d' % p for p in zip(proverNames, proverCounts)))
+        print('Early cancellation:', settings['earlyCancellation'])
+        print('Result cache:', settings['cache_path'])
+        print('Journal:', settings['journal_dir'])
+        print('Trace:', settings['trace_path'])
+
+        # with pools master joins and journals results itself
+        master = Master(corpus, provers, timeouts, args.resume, joinProvers=pools)
 
-        # split formulas list into as many pieces as there are groups.
-        # Data being scattered must contain exactly as many elements as there are processors
-        pieceSize = math.ceil(len(fs) / executiveComm.Get_size())
-        formulas = [fs[i:i + pieceSize] for i in range(0, len(fs), pieceSize)]
+        if dynamic:
+            collector = ResultCollector(resultComm, master, pools, resultComm.Get_size())
+            collectorThread = threading.Thread(target=collector.receive, args=(True,))
+            collectorThread.start()
+            print('Batch size:', settings['batchSize'])
+            dispatcher = threading.Thread(target=serveBatches,
+                                          args=(dispatchComm, corpus, master.indices, settings['batchSize']))
+            dispatcher.start()
+            formulas = None
+        else:
+            # split formulas into as many pieces as there are groups.
+            # Data being scattered must contain exactly as many elements as there are processors
+            formulas = [corpus.pack(piece) for piece in master.partition(executiveComm.Get_size())]
+            formulas += [[]] * (executiveComm.Get_size() - len(formulas))
+            # results of the master itself do not go through resultComm
+            collector = ResultCollector(resultComm, master, pools, resultComm.Get_size() - 1)
     else:
         formulas = None
 
-    if executiveComm != MPI.COMM_NULL:
-        formulas = executiveComm.scatter(formulas, root=0)
-
-    formulas = workComm.bcast(formulas, root=0)
+    if dynamic:
+        nextBatch = lambda: requestBatch(dispatchComm, proverIndex if pools else None)
+    else:
+        if executiveComm != MPI.COMM_NULL:
+            formulas = executiveComm.scatter(formulas, root=0)
+            # chunk of the group is processed in batches, so that results can be journaled on the way
+            batchSize = settings['batchSize']
+            chunks = [formulas[i:i + batchSize] for i in range(0, len(formulas), batchSize)] + [[]]
+        nextBatch = lambda: chunks.pop(0)
 
-    # choose a prover builder lambda and run it to obtain prover object
-    prover = proverBuilders[worldRank % len(proverBuilders)](worldRank)
-
-    # decreasing used timeout by multiplying by value from here
-    timeoutModifiers = {
-        'LEO-III': 0.6,
-        'MleanTAP': 0.8,
-        'MleanCoP': 1,
-        'TPG': 1
-    }
+    # group leaders consolidate and record results of their group and send them to the master,
+    # with pools results of the prover are sent as they are. Sends do not wait for the master (which may be proving
+    # a batch of its own), they are completed once the group is done
+    sends = []
+    journal = None
+    if executiveComm != MPI.COMM_NULL and settings['journal_dir'] is not None and not pools:
+        journal = Journal(settings['journal_dir'], 'group_%d' % (worldRank,))
+    def report(results):
+        if pools:
+            results = [(i, proverIndex, r[0]) for i, r in results]
+        else:
+            assert all(len(r) == len(proverBuilders) for _, r in results),\
+                'len(results) != len(proverBuilders): %d' % (len(proverBuilders),)
+            results = [(i, consolidateResult(*r)) for i, r in results]
+        if journal is not None:
+            journal.append([(i, result[0].uid, result[1:]) for i, result in results])
+        if worldRank == 0 and not dynamic:
+            collector.add(results)
+            collector.receive()
+        else:
+            sends.append(resultComm.isend(results, dest=0, tag=RESULT_TAG))
+            # forget sends which are already done
+            sends[:] = [request for request in sends if not request.Test()]
     # PROVE
-    # ensuring that timeout is an integer, don't know how the provers would react to floating point values
-    results = [prover.prove(f, int(settings['timeout'] * timeoutModifiers[prover.name])) for f in formulas]
-
-    results = workComm.gather(results, root=0)
+    proveBatches(prover, workComm, corpus, nextBatch, prover.stats['timeout'], report, tracer)
+    prover.close()
 
-    # workers are done here
-    if executiveComm == MPI.COMM_NULL:
-        execEnd = time.perf_counter()
-        printStats('Worker', worldRank, execEnd - execStart, prover.name, prover.stats)
-        return
-
-    zippedResults = []
-    
-    # get a list of tuples: (first prover res, second prover res, ...)
-    zippedResults = list(zip(*results))
-        
-    # group leader consolidates results
-    assert len(results) == len(proverBuilders), 'len(results) != len(proverBuilders): %d != %d' % (len(results), len(proverBuilders))
-    consolidatedResults = [consolidateResult(*r) for r in zippedResults]
+    if executiveComm != MPI.COMM_NULL:
+        # no more results from this group
+        if worldRank != 0 or dynamic:
+            sends.append(resultComm.isend([], dest=0, tag=RESULT_TAG))
+        MPI.Request.waitall(sends)
+        if journal is not None:
+            journal.close()
+    if worldRank == 0:
+        # all results have to be in before any rank waits for the others
+        if dynamic:
+            dispatcher.join()
+            collectorThread.join()
+        else:
+            collector.receive(block=True)
 
-    consolidatedResults = executiveComm.gather(consolidatedResults, root=0)
+    if tracer is not None:
+        tracer.close()
+        # all parts have to be complete before the master merges them
+        MPI.COMM_WORLD.Barrier()
 
-    # leaders are done, only master remains
+    # workers and leaders are done here, only master remains
     if worldRank != 0:
         execEnd = time.perf_counter()
-        printStats('Leader', worldRank, execEnd - execStart, prover.name, prover.stats)
+        printStats('Worker' if executiveComm == MPI.COMM_NULL else 'Leader', worldRank, execEnd - execStart,
+                   prover.name, prover.stats)
         return
 
-    # flatten consolidated results
-    consolidatedResults = [result for groupResults in consolidatedResults for result in groupResults]
-
-    # add syllogism information to formula results
-    syllogismResults = [(result[0].constructionInfo['figure'],
-                         result[0].constructionInfo['major'],
-                         result[0].constructionInfo['majorModal'],
-                         result[0].constructionInfo['minor'],
-                         result[0].constructionInfo['minorModal'],
-                         result[0].constructionInfo['conclusion'],
-                         result[0].constructionInfo['conclusionModal']
-                         ) + result for result in consolidatedResults]
-
-    print('Final count of results:', len(consolidatedResults))
-    with open(settings['output_file_path'], 'w', newline='') as csvfile:
-        csvwriter = csv.writer(csvfile)
-        # write header
-        csvwriter.writerow(('Figure',
-                            'Major', 'Major modal',
-                            'Minor', 'Minor modal',
-                            'Conclusion', 'Conclusion modal',
-                            'Formula', 'Final',
-                            'MleanCoP result', 'MleanCoP proof',
-                            'MleanTAP result', 'MleanTAP proof',
-                            'LEO-III result', 'LEO-III proof',
-                            'TPG result', 'TPG proof'))
-        csvwriter.writerows(syllogismResults)
+    master.close()
+    if tracer is not None:
+        print('Trace records:', TraceWriter.merge(settings['trace_path']))
     execEnd = time.perf_counter()
     printStats('Master', worldRank, execEnd - execStart, prover.name, prover.stats)
     print('Total execution time:', execEnd - execStart, 's')
@@ -0,0 +1,60 @@
+import sys
+import itertools
+
+from settings import settings
+
+def consolidateVerdicts(verdicts):
+    # verdicts: prover results (True, False or None) of a single formula
+    countOfTheoremResults = verdicts.count(True)
+    countOfNonTheoremResults = verdicts.count(False)
+
+    if countOfTheoremResults > 0 and countOfNonTheoremResults > 0:
+        return 'Contradiction'
+    elif countOfTheoremResults >= settings['theoremThreshold']:
+        return 'Theorem'
+    elif countOfNonTheoremResults >= settings['nonTheoremThreshold']:
+        return 'Non-Theorem'
+    else:
+        return 'Unknown'
+
+def isDecided(verdicts, possibleResults):
+    # verdicts: known prover results of a single formula, missing ones are not in the dictionary
+    # possibleResults: results every prover is able to produce
+    known = list(verdicts.values())
+    # threshold: contradictions which might still come are ignored
+    if settings['earlyCancellation'] == 'threshold' and consolidateVerdicts(known) != 'Unknown':
+        return True
+
+    # strict (and threshold not reached yet): no combination of results of the remaining provers may change the
+    # consolidated result
+    remaining = [possibleResults[i] for i in range(len(possibleResults)) if i not in verdicts]
+    outcomes = set(consolidateVerdicts(known + list(r)).replace('Contradiction', 'Unknown')
+                   for r in itertools.product(*remaining))
+    return len(outcomes) == 1
+
+def consolidateResult(*results):
+    # check if all results are for the same formula
+    fs = [r[0] for r in results]
+    assert all([fs[0] == f for f in fs])
+
+    # (formula, consolidated result, prover[0] result, prover[0] proof, prover[1] result, prover[1] proof, ...)
+    consolidatedResult = [results[0][0], None]
+
+    # contradiction?
+    consolidatedResult[1] = consolidateVerdicts([r[1] for r in results])
+    if consolidatedResult[1] == 'Contradiction':
+        print('Contradiction:', str(results[0][0]), [r[1] for r in results], file=sys.stderr)
+        consolidatedResult[1] = 'Unknown'
+
+    for r in results:
+        if r[1] is None:
+            proverResult = 'Unknown'
+        elif r[1]:
+            proverResult = 'Theorem'
+        else:
+            proverResult = 'Non-Theorem'
+        proverProof = r[2]
+
+        consolidatedResult += [proverResult, proverProof]
+
+    return tuple(consolidatedResult)
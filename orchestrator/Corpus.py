@@ -0,0 +1,103 @@
+from abc import ABC, abstractmethod
+import pickle
+
+from generator.Formula import Formula
+from generator.generate import formulaAt, uidAt, generateSingle, syllogismCount
+from generator.CorpusFile import CorpusFile
+
+class Corpus(ABC):
+    # Formulas to be proved, addressed by index. Master works only with indices: batches it sends to the groups are
+    # made by pack() and turned into (index, formula) pairs by unpack() on every rank of the group.
+    # Subclasses which build formulas locally send just the indices
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @abstractmethod
+    def formula(self, index: int) -> Formula:
+        pass
+
+    def uid(self, index: int) -> str:
+        return self.formula(index).uid
+
+    def pack(self, indices):
+        return indices
+
+    # groups structurally equal formulas. Returns dictionary: index of the first formula of every group -> indices of
+    # the other formulas of the group, formulas without duplicates are left out
+    def duplicates(self) -> dict:
+        first = {}
+        duplicates = {}
+        for i in range(len(self)):
+            j = first.setdefault(self.formula(i).canonical(), i)
+            if j != i:
+                duplicates.setdefault(j, []).append(i)
+        return duplicates
+
+    def unpack(self, batch) -> list:
+        return [(i, self.formula(i)) for i in batch]
+
+class PickleCorpus(Corpus):
+    # pickled list of formulas, only the master reads it (load) and formulas travel with the batches
+    def __init__(self, path: str):
+        self.path = path
+        self.formulas = None
+
+    def load(self):
+        with open(self.path, 'rb') as f:
+            self.formulas = pickle.load(f)
+
+    def __len__(self) -> int:
+        return len(self.formulas)
+
+    def formula(self, index: int) -> Formula:
+        return self.formulas[index]
+
+    def pack(self, indices) -> list:
+        return [(i, self.formulas[i]) for i in indices]
+
+    def unpack(self, batch) -> list:
+        return batch
+
+class SyllogismCorpus(Corpus):
+    # syllogisms given by a range of their indices (see generator.generate.syllogismAt)
+    def __init__(self, syllogisms: range = range(syllogismCount)):
+        self.syllogisms = syllogisms
+
+    def __len__(self) -> int:
+        return len(self.syllogisms)
+
+    def formula(self, index: int) -> Formula:
+        return formulaAt(self.syllogisms[index])
+
+    def uid(self, index: int) -> str:
+        return uidAt(self.syllogisms[index])
+
+class UIDCorpus(Corpus):
+    # text file with one syllogism UID per line, every rank reads the (small) file itself
+    def __init__(self, path: str):
+        with open(path, encoding='utf-8') as f:
+            self.uids = [line.strip() for line in f if line.strip()]
+
+    def __len__(self) -> int:
+        return len(self.uids)
+
+    def formula(self, index: int) -> Formula:
+        return generateSingle(self.uids[index])
+
+    def uid(self, index: int) -> str:
+        return self.uids[index]
+
+class BinaryCorpus(Corpus):
+    # binary corpus file (see generator.CorpusFile) memory-mapped by every rank
+    def __init__(self, path: str):
+        self.file = CorpusFile(path)
+
+    def __len__(self) -> int:
+        return len(self.file)
+
+    def formula(self, index: int) -> Formula:
+        return self.file.formula(index)
+
+    def uid(self, index: int) -> str:
+        return self.file.uid(index)
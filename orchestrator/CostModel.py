@@ -0,0 +1,68 @@
+from prover.ResultCache import ResultCache
+
+class CostModel:
+    # Predicts how long a work group needs to prove a formula (the slowest of its provers), in seconds when there is
+    # history in the result cache. Formulas proved before cost what the cache says (limited by the current timeouts),
+    # the others the mean cost of cached formulas with the same syntactic features (number of nodes, modal depth) or,
+    # when there are none, number of nodes weighted by modal depth and scaled to seconds by the history
+    def __init__(self, cache: ResultCache = None, timeouts: dict = None):
+        # formula key -> {prover name: time}
+        self.history = cache.formulaTimes([(name, logic, domain) for name, (logic, domain, _) in timeouts.items()])\
+            if cache is not None else {}
+        # prover name -> (logic, domain, timeout)
+        self.timeouts = timeouts or {}
+        # index -> cost of formulas with history, filled by costs()
+        self.known = {}
+
+    @staticmethod
+    def heuristic(features: (int, int)) -> float:
+        size, depth = features
+        return size * (1 + depth)
+
+    # returns dictionary: index -> predicted cost
+    def costs(self, corpus, indices) -> dict:
+        features = {}
+        known = self.known = {}
+        for i in indices:
+            formula = corpus.formula(i)
+            features[i] = formula.metrics()
+            if self.history:
+                times = self.history.get(ResultCache.formulaKey(formula))
+                if times is not None and len(times) == len(self.timeouts):
+                    known[i] = max(min(time, self.timeouts[name][2]) for name, time in times.items())
+
+        # mean cost of known formulas per features, seconds per heuristic unit
+        sums = {}
+        for i, cost in known.items():
+            total, count = sums.get(features[i], (0, 0))
+            sums[features[i]] = (total + cost, count + 1)
+        heuristicTotal = sum(self.heuristic(features[i]) for i in known)
+        scale = sum(known.values()) / heuristicTotal if known and heuristicTotal else 1
+
+        costs = {}
+        for i in indices:
+            if i in known:
+                costs[i] = known[i]
+            elif features[i] in sums:
+                total, count = sums[features[i]]
+                costs[i] = total / count
+            else:
+                costs[i] = self.heuristic(features[i]) * scale
+        return costs
+
+    # longest expected first
+    @staticmethod
+    def order(indices, costs: dict) -> list:
+        return sorted(indices, key=lambda i: costs[i], reverse=True)
+
+    # splits indices into parts with similar total costs (longest processing time first), order within every part is
+    # kept longest first
+    @staticmethod
+    def partition(indices, costs: dict, parts: int) -> list:
+        loads = [0] * parts
+        partitions = [[] for _ in range(parts)]
+        for i in CostModel.order(indices, costs):
+            part = loads.index(min(loads))
+            partitions[part].append(i)
+            loads[part] += costs[i]
+        return partitions
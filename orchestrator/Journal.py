@@ -0,0 +1,66 @@
+import glob
+import json
+import os
+
+class Journal:
+    # Append-only record of consolidated results, one JSON line per formula: index of the formula, its uid and the
+    # consolidated result without the formula. Every writer (e.g. group leader) has its own file in the journal
+    # directory, so no locking is needed. Records are flushed to disk after every append
+    def __init__(self, directory: str, name: str):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, name + '.jsonl')
+        self.file = None
+
+    def append(self, records: list):
+        # records: list of (index, uid, result) tuples
+        if not records:
+            return
+        if self.file is None:
+            self.dropTornLine()
+            self.file = open(self.path, 'a', encoding='utf-8')
+        self.file.write(''.join(json.dumps({'index': index, 'uid': uid, 'result': list(result)}) + '\n'
+                                for index, uid, result in records))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    # cuts the file after its last newline, so that a line left incomplete when the run was killed while writing it
+    # is not joined with the first appended record (records would skip both)
+    def dropTornLine(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(position - 65536, 0)
+                f.seek(start)
+                newline = f.read(position - start).rfind(b'\n')
+                if newline >= 0:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position < end:
+                f.truncate(position)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    # yields (index, uid, result) records from all files of the directory
+    @staticmethod
+    def records(directory: str):
+        for path in sorted(glob.glob(os.path.join(directory, '*.jsonl'))):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # last line of the file may be incomplete when the run was killed while writing it
+                        continue
+                    yield record['index'], record['uid'], tuple(record['result'])
+
+    @staticmethod
+    def clear(directory: str):
+        for path in glob.glob(os.path.join(directory, '*.jsonl')):
+            os.remove(path)
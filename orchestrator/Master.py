@@ -0,0 +1,134 @@
+import math
+import resource
+import threading
+import time
+
+from prover.ResultCache import ResultCache
+from orchestrator.Corpus import PickleCorpus, SyllogismCorpus, UIDCorpus, BinaryCorpus
+from orchestrator.Consolidation import consolidateResult
+from orchestrator.CostModel import CostModel
+from orchestrator.Journal import Journal
+from orchestrator.Pools import ResultJoiner
+from orchestrator.ResultWriter import ResultWriter
+from generator.generate import syllogismCount
+from settings import settings
+
+def makeCorpus():
+    assert settings['formula_source'] in ['pickle', 'uids', 'binary', 'syllogisms'],\
+        "Unknown formula source '%s'" % (settings['formula_source'],)
+    if settings['formula_source'] == 'pickle':
+        return PickleCorpus(settings['formula_pickle_path'])
+    elif settings['formula_source'] == 'uids':
+        return UIDCorpus(settings['formula_uid_path'])
+    elif settings['formula_source'] == 'binary':
+        return BinaryCorpus(settings['formula_binary_path'])
+    else:
+        return SyllogismCorpus(range(syllogismCount)[slice(*settings['syllogism_slice'])])
+
+class Master:
+    # Part of the run done by the master, the same for every backend. Prepares the work: writes results of the previous
+    # run when resuming, leaves out duplicate formulas and orders the remaining ones (indices). Then writes consolidated
+    # results as they come, fanning them out to duplicates. With joinProvers results of single provers are joined per
+    # formula, consolidated and journaled here.
+    # provers: list of (name, logic, domain), timeouts: name -> (timeout, how it was chosen)
+    def __init__(self, corpus, provers: list, timeouts: dict, resume: bool, joinProvers: bool = False):
+        self.corpus = corpus
+        # results may be written from another thread than the one which prepares the run
+        self.lock = threading.Lock()
+        if isinstance(corpus, PickleCorpus):
+            print('Start read')
+            tstart = time.perf_counter()
+            corpus.load()
+            tend = time.perf_counter()
+            print('End read:', tend - tstart, 's')
+        print('Formula count:', len(corpus))
+        # formulas of the other sources are built by the ranks, by the master only when deduplicating or ordering by
+        # cost is asked for explicitly
+        lazy = not isinstance(corpus, PickleCorpus)
+        self.deduplicate = not lazy if settings['deduplicate'] == 'auto' else settings['deduplicate']
+        ordering = (None if lazy else 'cost') if settings['ordering'] == 'auto' else settings['ordering']
+
+        # formulas structurally equal to another one are not proved, they get the result of the first one
+        self.duplicates = {}
+        self.duplicateCount = 0
+        if self.deduplicate:
+            tstart = time.perf_counter()
+            self.duplicates = corpus.duplicates()
+            self.duplicateCount = sum(len(d) for d in self.duplicates.values())
+            print('Distinct formulas:', len(corpus) - self.duplicateCount, '(%.2f s)' % (time.perf_counter() - tstart,))
+
+        # results are written as they come, starting with the ones finished by the previous run
+        self.writer = ResultWriter(settings['output_file_path'], settings['output_order'] == 'index')
+        done = set()
+        if settings['journal_dir'] is not None:
+            if resume:
+                for index, uid, result in Journal.records(settings['journal_dir']):
+                    assert index < len(corpus) and corpus.uid(index) == uid,\
+                        'Journal does not belong to the formulas (index %d, uid %s)' % (index, uid)
+                    if index not in done:
+                        rows = self.fanOut(index, (corpus.formula(index),) + result)
+                        done.add(index)
+                        done.update(self.duplicates.get(index, ()))
+                        self.writer.write(rows)
+                print('Resumed results:', len(done))
+            else:
+                Journal.clear(settings['journal_dir'])
+        # duplicates of formulas still to be proved which are not done yet
+        self.duplicates = {i: [j for j in d if j not in done] for i, d in self.duplicates.items() if i not in done}
+        excluded = done.union(*self.duplicates.values())
+        self.indices = [i for i in range(len(corpus)) if i not in excluded] if excluded else range(len(corpus))
+
+        # longest expected first, so that hard formulas do not make a long tail at the end of the run
+        self.costs = None
+        if ordering == 'cost':
+            tstart = time.perf_counter()
+            cache = None
+            if settings['cache_path'] is not None:
+                cache = ResultCache(settings['cache_path'], settings['cache_journal_mode'])
+            costModel = CostModel(cache, {name: (logic, domain, timeouts[name][0]) for name, logic, domain in provers})
+            self.costs = costModel.costs(corpus, self.indices)
+            if cache is not None:
+                cache.close()
+            self.indices = costModel.order(self.indices, self.costs)
+            print('Ordering: cost (%.2f s, %d formulas with history, %.1f expected cost)'
+                  % (time.perf_counter() - tstart, len(costModel.known), sum(self.costs.values())))
+
+        self.joiner = ResultJoiner(len(provers)) if joinProvers else None
+        self.journal = None
+        if joinProvers and settings['journal_dir'] is not None:
+            self.journal = Journal(settings['journal_dir'], 'master')
+
+    # splits indices into pieces, with similar expected costs when ordering by cost
+    def partition(self, pieces: int) -> list:
+        if self.costs is not None:
+            return CostModel.partition(self.indices, self.costs, pieces)
+        pieceSize = math.ceil(len(self.indices) / pieces)
+        return [self.indices[i:i + pieceSize] for i in range(0, len(self.indices), pieceSize)]
+
+    def fanOut(self, index, result):
+        # (index, result) of the formula followed by the same result for each of its duplicates (with their own formula
+        # objects, so that syllogism information is right)
+        return [(index, result)] + [(i, (self.corpus.formula(i),) + tuple(result[1:]))
+                                    for i in self.duplicates.get(index, ())]
+
+    # results: list of (index, consolidated result)
+    def write(self, results: list):
+        with self.lock:
+            self.writer.write([row for i, result in results for row in self.fanOut(i, result)])
+
+    # results: list of (index, prover index, result of the prover)
+    def join(self, results: list):
+        with self.lock:
+            results = [(i, consolidateResult(*joined)) for i, joined in self.joiner.add(results)]
+            if self.journal is not None:
+                self.journal.append([(i, result[0].uid, result[1:]) for i, result in results])
+            self.writer.write([row for i, result in results for row in self.fanOut(i, result)])
+
+    def close(self):
+        self.writer.close()
+        if self.journal is not None:
+            self.journal.close()
+        print('Final count of results:', self.writer.count)
+        if self.deduplicate:
+            print('Results of duplicate formulas reused:', self.duplicateCount)
+        print('Master peak RSS:', resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, 'kB')
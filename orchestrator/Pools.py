@@ -0,0 +1,41 @@
+import itertools
+
+# splits size ranks among provers proportionally to weights (e.g. mean time a prover needs per formula),
+# every prover gets at least one rank. Returns list of rank counts
+def allocateRanks(size: int, weights: list) -> list:
+    assert size >= len(weights), 'Every prover needs at least one rank (ranks: %d ; provers: %d)' % (size, len(weights))
+    total = sum(weights)
+    shares = [size * w / total for w in weights] if total > 0 else [size / len(weights)] * len(weights)
+    counts = [max(1, int(share)) for share in shares]
+    # largest remainders get the ranks left, ranks over the limit are taken from the smallest remainders
+    byRemainder = sorted(range(len(weights)), key=lambda p: shares[p] - int(shares[p]), reverse=True)
+    for p in itertools.cycle(byRemainder):
+        if sum(counts) >= size:
+            break
+        counts[p] += 1
+    while sum(counts) > size:
+        p = next(p for p in reversed(byRemainder) if counts[p] > 1)
+        counts[p] -= 1
+    return counts
+
+# returns index of the prover of every rank, ranks of a prover are consecutive
+def assignRanks(counts: list) -> list:
+    return [p for p, count in enumerate(counts) for _ in range(count)]
+
+class ResultJoiner:
+    # Joins results of single provers per formula, formula is complete once every prover sent its result
+    def __init__(self, proverCount: int):
+        self.proverCount = proverCount
+        # index -> list of results, one per prover (None when not there yet)
+        self.partial = {}
+
+    # adds results (index, prover index, result), returns list of (index, [result of every prover]) which got complete
+    def add(self, results: list) -> list:
+        complete = []
+        for i, proverIndex, result in results:
+            joined = self.partial.setdefault(i, [None] * self.proverCount)
+            joined[proverIndex] = result
+            if all(r is not None for r in joined):
+                del self.partial[i]
+                complete.append((i, joined))
+        return complete
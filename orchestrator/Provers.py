@@ -0,0 +1,145 @@
+from prover.MleancopProver import MleancopProver
+from prover.MleantapProver import MleantapProver
+from prover.Leo3Prover import Leo3Prover
+from prover.TPGProver import TPGProver
+from prover.Prover import NoProver
+from prover.SimulatedProver import SimulatedProver
+from prover.ResultCache import ResultCache
+from orchestrator.Timeouts import adaptiveTimeout
+from orchestrator.Pools import allocateRanks
+from settings import settings
+
+import json
+
+proverBuilders = [
+    lambda wr: MleancopProver(wr, mleancop_dir=settings['mleancop_dir'],
+                         logic=settings['logic'],
+                         domain=settings['domain'],
+                         persistent=settings['mleancop_persistent'],
+                         prolog_path=settings['swipl_path'],
+                         portfolio=settings['mleancop_portfolio']),
+    lambda wr: MleantapProver(wr, mleantap_path=settings['mleantap_path'],
+                         prolog_path=settings['swipl_path'],
+                         logic=settings['logic'],
+                         domain=settings['domain'],
+                         persistent=settings['mleantap_persistent']),
+    lambda wr: Leo3Prover(wr, leo3_jar_path=settings['leo3_jar_path'],
+                     java_path=settings['java_path'],
+                     logic=settings['logic'],
+                     domain=settings['domain'],
+                     persistent=settings['leo3_persistent']),
+    lambda wr: TPGProver(wr, tpg_dir=settings['tpg_dir'],
+                    node_path=settings['node_path'],
+                    logic=settings['logic'],
+                    domain=settings['domain'],
+                    persistent=settings['tpg_persistent']),
+]
+
+# names of the provers built by proverBuilders (in the same order)
+proverNames = ['MleanCoP', 'MleanTAP', 'LEO-III', 'TPG']
+proverClasses = [MleancopProver, MleantapProver, Leo3Prover, TPGProver]
+
+# builders of stand-ins of the provers according to settings['simulatedProvers']: dictionary prover name -> parameters
+# of SimulatedProver, provers left out (or with no parameters) are replaced by NoProver
+def simulatedProverBuilders(simulatedProvers: dict) -> list:
+    def builder(name, proverClass, parameters):
+        def build(wr):
+            prover = SimulatedProver(wr, name, **parameters) if parameters else NoProver(wr, name)
+            prover.possibleResults = proverClass.possibleResults
+            return prover
+        return build
+    return [builder(name, proverClass, simulatedProvers.get(name))
+            for name, proverClass in zip(proverNames, proverClasses)]
+
+# updates settings from a JSON file (object with keys of settings to be changed)
+def overrideSettings(path: str):
+    with open(path, encoding='utf-8') as f:
+        overrides = json.load(f)
+    unknown = [key for key in overrides if key not in settings]
+    assert not unknown, 'Unknown settings: %s' % (', '.join(unknown),)
+    settings.update(overrides)
+
+# decreasing used timeout by multiplying by value from here (unless it is learned from the cache)
+timeoutModifiers = {
+    'LEO-III': 0.6,
+    'MleanTAP': 0.8,
+    'MleanCoP': 1,
+    'TPG': 1
+}
+
+def printStats(role, wr, time, prover, report):
+    stats = '''
+=======================================
+    %s %d lasted for:    %.2f s
+    Prover:                 %s
+    Stats:
+        running time:       %.2f s
+        proving time:       %.2f s
+        processed:          %d
+        conclusion reached: %d
+        skipped:            %d
+        cancelled:          %d
+        cached:             %d
+        failed:             %d
+        problem files:      %d
+        process wall time:  %.2f s
+        process CPU time:   %.2f s
+        peak RSS:           %d kB
+        worker restarts:    %d
+        timeout:            %d s
+=======================================''' % (role, wr, time, prover,
+                                              report['timeProcessing'],
+                                              report['timeProving'],
+                                              report['processed'],
+                                              report['conclusionReached'],
+                                              report['skipped'],
+                                              report['cancelled'],
+                                              report['cached'],
+                                              report['failed'],
+                                              report['problemFiles'],
+                                              report['timeWall'],
+                                              report['timeCPU'],
+                                              report['peakRSS'],
+                                              report['restarts'],
+                                              report['timeout'])
+    print(stats)
+
+def chooseTimeouts(provers):
+    # provers: list of (name, logic, domain). Returns dictionary: name -> (timeout, how it was chosen).
+    # Timeouts are learned from the result cache when it has enough conclusive results of the prover (from runs with at
+    # least its static timeout), otherwise the base timeout is scaled by the static modifier of the prover
+    cache = None
+    if settings['adaptiveTimeout'] is not None and settings['cache_path'] is not None:
+        cache = ResultCache(settings['cache_path'], settings['cache_journal_mode'])
+    timeouts = {}
+    for name, logic, domain in provers:
+        # only runs with at least the static timeout of the prover are not capped by a learned one (no base timeout
+        # is the same as infinite one)
+        staticTimeout = int(settings['timeout'] * timeoutModifiers[name]) or float('inf')
+        times = cache.proofTimes(name, logic, domain, staticTimeout) if cache is not None else []
+        timeout = adaptiveTimeout(times, settings['adaptiveTimeout'], settings['adaptiveTimeoutMinSamples'],
+                                  1, settings['timeout']) if cache is not None else None
+        if timeout is not None:
+            timeouts[name] = (timeout, 'p%g of %d cached proofs' % (settings['adaptiveTimeout'] * 100, len(times)))
+        else:
+            # ensuring that timeout is an integer, don't know how the provers would react to floating point values
+            timeouts[name] = (int(settings['timeout'] * timeoutModifiers[name]), 'static')
+    if cache is not None:
+        cache.close()
+    return timeouts
+
+def allocateProverRanks(size, configured=None):
+    # returns number of ranks (processes) of every prover: configured ones or proportional to the mean time the provers
+    # needed per formula according to the result cache (the same for all provers without history of every one of them)
+    if configured is not None:
+        assert len(configured) == len(proverBuilders) and sum(configured) == size,\
+            'Ranks of every prover have to be given, %d in total' % (size,)
+        return list(configured)
+    weights = [1] * len(proverBuilders)
+    if settings['cache_path'] is not None:
+        cache = ResultCache(settings['cache_path'], settings['cache_journal_mode'])
+        meanTimes = cache.meanTimes()
+        cache.close()
+        if all(meanTimes.get(name) for name in proverNames):
+            weights = [meanTimes[name] for name in proverNames]
+    return allocateRanks(size, weights)
@@ -0,0 +1,68 @@
+import csv
+import io
+import os
+
+class ResultWriter:
+    # CSV file of consolidated results, rows are written (and flushed) as results arrive so the whole result set
+    # never has to be kept in memory. Results are tuples (formula, final, first prover result, first prover proof, ...)
+    # With ordered rows come out in the order of corpus indices: they are streamed to a side file (path.unordered)
+    # first and copied to the CSV file in order on close, only index and position of every row are kept in memory
+    header = ('Figure',
+              'Major', 'Major modal',
+              'Minor', 'Minor modal',
+              'Conclusion', 'Conclusion modal',
+              'Formula', 'Final',
+              'MleanCoP result', 'MleanCoP proof',
+              'MleanTAP result', 'MleanTAP proof',
+              'LEO-III result', 'LEO-III proof',
+              'TPG result', 'TPG proof')
+
+    def __init__(self, path: str, ordered: bool = False):
+        self.path = path
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.header)
+        self.count = 0
+        # (index, offset, length) of every row in the side file
+        self.positions = None
+        if ordered:
+            self.positions = []
+            self.unordered = open(path + '.unordered', 'w+b')
+
+    # syllogism information followed by the result
+    @staticmethod
+    def row(result: tuple) -> tuple:
+        info = result[0].constructionInfo
+        return (info['figure'],
+                info['major'],
+                info['majorModal'],
+                info['minor'],
+                info['minorModal'],
+                info['conclusion'],
+                info['conclusionModal']
+                ) + tuple(result)
+
+    # results: list of (index, result)
+    def write(self, results: list):
+        if self.positions is None:
+            self.writer.writerows(self.row(result) for _, result in results)
+            self.file.flush()
+        else:
+            for index, result in results:
+                text = io.StringIO(newline='')
+                csv.writer(text).writerow(self.row(result))
+                data = text.getvalue().encode('utf-8')
+                self.positions.append((index, self.unordered.tell(), len(data)))
+                self.unordered.write(data)
+            self.unordered.flush()
+        self.count += len(results)
+
+    def close(self):
+        if self.positions is not None:
+            self.positions.sort()
+            for _, offset, length in self.positions:
+                self.unordered.seek(offset)
+                self.file.write(self.unordered.read(length).decode('utf-8'))
+            self.unordered.close()
+            os.remove(self.path + '.unordered')
+        self.file.close()
@@ -0,0 +1,12 @@
+import math
+
+# nearest-rank quantile of sorted values
+def quantile(values: list, q: float) -> float:
+    return values[min(len(values) - 1, max(0, math.ceil(q * len(values)) - 1))]
+
+# returns timeout (whole seconds, minimum <= timeout <= maximum) within which the successQuantile of the past
+# conclusive results was reached, None when there are fewer than minSamples of them
+def adaptiveTimeout(times: list, successQuantile: float, minSamples: int, minimum: int, maximum: int) -> int:
+    if len(times) < minSamples or not times:
+        return None
+    return int(min(max(math.ceil(quantile(sorted(times), successQuantile)), minimum), maximum))
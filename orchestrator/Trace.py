@@ -0,0 +1,39 @@
+import glob
+import json
+import os
+
+class TraceWriter:
+    # Trace records of prove calls (see Prover.prove) as JSON lines. Every rank (or process) streams its records to
+    # a part file of its own, parts are merged into the trace file once all of them are closed
+    def __init__(self, path: str, part):
+        self.file = open('%s.%s.part' % (path, part), 'w', encoding='utf-8')
+        self.count = 0
+
+    def write(self, records: list):
+        if not records:
+            return
+        self.file.write(''.join(json.dumps(record) + '\n' for record in records))
+        self.file.flush()
+        self.count += len(records)
+
+    def close(self):
+        self.file.close()
+
+    # removes parts left by a previous run
+    @staticmethod
+    def clear(path: str):
+        for part in glob.glob(glob.escape(path) + '.*.part'):
+            os.remove(part)
+
+    # concatenates all the parts into the trace file and removes them, returns number of records
+    @staticmethod
+    def merge(path: str) -> int:
+        count = 0
+        with open(path, 'w', encoding='utf-8') as trace:
+            for part in sorted(glob.glob(glob.escape(path) + '.*.part')):
+                with open(part, encoding='utf-8') as f:
+                    for line in f:
+                        trace.write(line)
+                        count += 1
+                os.remove(part)
+        return count
@@ -1,13 +1,18 @@
 import subprocess
-import tempfile
+import sys
 import os
 import time
 
-from .Prover import Prover
+from .Prover import Prover, ProverConfigError, ProverError, ProofCancelled
+from .Worker import WorkerPool, WorkerError
 from generator.Formula import Formula
 
 class Leo3Prover(Prover):
-    def __init__(self, worldRank: int, leo3_jar_path: str = './leo3.jar', java_path: str = 'java', logic: str = None, domain: str = None):
+    # Leo-III never reports non-theorems
+    possibleResults = (True, None)
+
+    def __init__(self, worldRank: int, leo3_jar_path: str = './leo3.jar', java_path: str = 'java', logic: str = None, domain: str = None,
+                 persistent: bool = False, worker_path: str = None, main_class: str = 'leo.Main'):
         super().__init__(worldRank, 'LEO-III')
 
         if logic not in ['k', 't', 'd', 's4', 's5', None]:
@@ -36,41 +41,80 @@ class Leo3Prover(Prover):
         self.leo3_jar_path = leo3_jar_path
         self.java_path = java_path
 
-    def prove(self, formula: Formula, timeout: int = None) -> (Formula, bool, str):
+        # persistent mode: JVM with LEO-III loaded proves all formulas of the rank (one JVM per formula proved at once)
+        self.worker = None
+        if persistent:
+            worker_path = worker_path or os.path.join(os.path.dirname(leo3_jar_path), 'Leo3Worker.java')
+            self.worker = WorkerPool(self.name, self.wr,
+                                 [self.java_path, '-Djava.security.manager=allow', '-cp', self.leo3_jar_path,
+                                  worker_path, main_class],
+                                 endMarker='% LEO3WORKER END')
+
+    def close(self):
+        super().close()
+        if self.worker is not None:
+            self.worker.close()
+
+    def proveFormula(self, formula: Formula, timeout: int = None) -> (Formula, bool, str):
         procStart = time.perf_counter()
+        # stats are right also when the prover fails (ProverError, CalledProcessError) before these are set
+        proveStart = proveEnd = procStart
+        parsedOutput = None
         try:
             # using dash to read from stdin did not work, using temporary file instead
-            problemFile = self.generateProblemFile(formula)
-            args = [self.java_path, '-jar', self.leo3_jar_path,
-                    # using - as filename to read the stdin did not work :( tries to find the file called -
-                    problemFile,
-                    '-v', '0',   # decrease output
-                    '-p']        # output proof
-            if timeout:
-                args.append('-t')
-                args.append(str(timeout))
-            proveStart = time.perf_counter()
-            leo3 = subprocess.run(args,
-                                  universal_newlines=True,
-                                  stdout=subprocess.PIPE,
-                                  stderr=subprocess.PIPE,
-                                  check=True,
-                                  timeout=(2 * timeout or None))
-            proveEnd = time.perf_counter()
-            parsedOutput = self.parseOutput(leo3.stdout)
+            problemFile = self.writeProblemFile(self.problem(formula))
+            if self.worker is not None:
+                proveStart = time.perf_counter()
+                lines = self.worker.request('%d\t%s\n' % (timeout or 0, problemFile),
+                                            timeout=(2 * timeout if timeout else None),
+                                            cancelled=self.cancelCheck, pollInterval=self.pollInterval,
+                                            usage=self.recordUsage)
+                proveEnd = time.perf_counter()
+                # last line is the end marker with exit status of LEO-III
+                status = int(lines[-1].split(' ')[-1])
+                if status != 0:
+                    raise ProverError('leo3', self.wr, 'LEO-III exited with status %d' % (status,))
+                output = '\n'.join(lines[:-1])
+            else:
+                args = [self.java_path, '-jar', self.leo3_jar_path,
+                        # using - as filename to read the stdin did not work :( tries to find the file called -
+                        problemFile,
+                        '-v', '0',   # decrease output
+                        '-p']        # output proof
+                if timeout:
+                    args.append('-t')
+                    args.append(str(timeout))
+                proveStart = time.perf_counter()
+                leo3 = self.runProcess(args,
+                                       universal_newlines=True,
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE,
+                                       check=True,
+                                       timeout=(2 * timeout if timeout else None))
+                proveEnd = time.perf_counter()
+                output = leo3.stdout
+            parsedOutput = self.parseOutput(output)
             return formula, parsedOutput[0], parsedOutput[1]
         except subprocess.TimeoutExpired:
             proveEnd = time.perf_counter()
             parsedOutput = None
             return formula, None, None
+        except WorkerError as e:
+            proveEnd = time.perf_counter()
+            parsedOutput = None
+            self.markFailed(e)
+            return formula, None, None
+        except ProofCancelled:
+            proveEnd = time.perf_counter()
+            parsedOutput = None
+            raise
         finally:
-            os.remove(problemFile)
-
             procEnd = time.perf_counter()
-            self.stats['processed'] += 1
-            self.stats['conclusionReached'] += 1 if parsedOutput is not None and parsedOutput[0] else 0
-            self.stats['timeProcessing'] += procEnd - procStart
-            self.stats['timeProving'] += proveEnd - proveStart
+            self.updateStats(processed=1,
+                             conclusionReached=1 if parsedOutput is not None and parsedOutput[0] else 0,
+                             timeProcessing=procEnd - procStart,
+                             timeProving=proveEnd - proveStart)
+            self.recordPhases(serialize=proveStart - procStart, prove=proveEnd - proveStart, parse=procEnd - proveEnd)
 
     def parseOutput(self, output: str) -> (bool, str, str):
         lines = output.strip().split('\n')
@@ -95,7 +139,7 @@ class Leo3Prover(Prover):
             return True, proof
         return None, None
 
-    def generateProblemFile(self, formula: Formula):
+    def problem(self, formula: Formula) -> str:
         problem = '''
         thf(modal_logic_descr,logic,(
             $modal :=
@@ -112,8 +156,4 @@ class Leo3Prover(Prover):
 
         thf(prob, conjecture, %s ).
         ''' % (self.domain, self.logic, formula.toTHF())
-        
-        fd, filename = tempfile.mkstemp(prefix='leo3_%d_' % (self.wr,), text=True)
-        with open(fd, 'w') as probF:
-            probF.write(problem)
-        return filename
+        return problem
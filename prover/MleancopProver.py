@@ -1,14 +1,14 @@
 import subprocess
 import sys
-import tempfile
-import os
 import time
 
-from .Prover import Prover, ProverConfigError
+from .Prover import Prover, ProverConfigError, ProofCancelled
+from .Worker import WorkerPool, WorkerError
 from generator.Formula import Formula
 
 class MleancopProver(Prover):
-    def __init__(self, worldRank, logic: str = 's5', domain: str = 'const', mleancop_dir: str = None):
+    def __init__(self, worldRank, logic: str = 's5', domain: str = 'const', mleancop_dir: str = None,
+                 persistent: bool = False, prolog_path: str = None, prolog_options: list = None, portfolio: int = 1):
         super().__init__(worldRank, 'MleanCoP')
         if logic not in ['d', 't', 's4', 's5', 'multi', None]:
             raise ProverConfigError('mleancop', self.wr, "Value '%s' is not recognized as 'logic' value" % (logic,))
@@ -18,26 +18,58 @@ class MleancopProver(Prover):
         self.logic = logic
         self.domain = domain
         self.mleancop_dir = mleancop_dir or './'
+        # number of strategies mleancop.py runs at once
+        self.portfolio = portfolio
 
-    def prove(self, formula: Formula, timeout: int = None) -> (Formula, bool, str):
+        # persistent mode: swipl with MleanCoP loaded runs the strategy schedule for all formulas of the rank
+        # (one swipl per formula proved at once)
+        self.worker = None
+        if persistent:
+            # same goals as in mleancop.py
+            self.worker = WorkerPool(self.name, self.wr,
+                                 [prolog_path or 'swipl'] + (prolog_options or ['--no-debug', '--stack-limit=340m'])
+                                 + [
+                                     '-g', 'assert((print(A):-write(A))).',
+                                     '-g', "assert(prolog('swi')).",
+                                     '-g', "['%s/mleancop_main.pl']." % (self.mleancop_dir,),
+                                     '-g', "asserta(logic('%s'))." % (self.logic,),
+                                     '-g', "asserta(domain('$%s'))." % (self.domain,),
+                                     '-g', "['%s/mleancop_server.pl']." % (self.mleancop_dir,),
+                                     '-g', 'serve',
+                                     '-t', 'halt.'
+                                 ],
+                                 endMarker='% MLEANCOP END', interruptible=True)
+
+    def close(self):
+        super().close()
+        if self.worker is not None:
+            self.worker.close()
+
+    def proveFormula(self, formula: Formula, timeout: int = None) -> (Formula, bool, str):
+        if self.worker is not None:
+            return self.proveByWorker(formula, timeout)
+        return self.proveByProcess(formula, timeout)
+
+    def proveByProcess(self, formula: Formula, timeout: int = None) -> (Formula, bool, str):
         procStart = time.perf_counter()
         try:
-            problemFile = self.generateProblemFile(formula)
-            
+            problemFile = self.writeProblemFile(self.problem(formula))
+
             args = [self.mleancop_dir + 'mleancop.py', '-q',
                     '--mleancop-path', self.mleancop_dir or '.',
                     '--logic', self.logic,
                     '--domain', self.domain,
+                    '--portfolio', str(self.portfolio),
                     problemFile]
             if timeout != 0:
                 args.append(str(timeout))
 
             proveStart = time.perf_counter()
-            mleancop = subprocess.run(args,
-                                      universal_newlines=True,           # to be able to get output as a string
-                                      stdout=subprocess.PIPE,            # capture stdout
-                                      stderr=subprocess.PIPE,            # capture stderr
-                                      timeout=(2 * timeout or None))      # set hard timeout
+            mleancop = self.runProcess(args,
+                                       universal_newlines=True,           # to be able to get output as a string
+                                       stdout=subprocess.PIPE,            # capture stdout
+                                       stderr=subprocess.PIPE,            # capture stderr
+                                       timeout=(2 * timeout if timeout else None))  # set hard timeout
             proveEnd = time.perf_counter()
 
             # output anything that is not a warning to stderr
@@ -46,37 +78,76 @@ class MleancopProver(Prover):
                 if (not line.startswith('Warning')) and line.strip():
                     print(line, file=sys.stderr)
                     
-            # parse stdout
-            lines = mleancop.stdout.strip().split('\n')
-            status = lines[0].split(' ')[-1]
-            statusMap = {
-                'Theorem': True,
-                'Non-Theorem': False,
-                'Timeout': None
-            }
-            isTheorem = statusMap[status]
-            if isTheorem:
-                proof = '\n'.join(lines[2:-1])
-            else:
-                proof = None
-                
+            isTheorem, proof = self.parseOutput(mleancop.stdout)
             return formula, isTheorem, proof
         except subprocess.TimeoutExpired:
             proveEnd = time.perf_counter()
-            print('[WARNING] Rank: %d mleancop: swipl process left dangling!' % self.wr, file=sys.stderr)
+            isTheorem = None
             return formula, None, None
+        except ProofCancelled:
+            proveEnd = time.perf_counter()
+            isTheorem = None
+            raise
         finally:
-            os.remove(problemFile)
+            procEnd = time.perf_counter()
+            # update stats
+            self.updateStats(processed=1,
+                             conclusionReached=1 if isTheorem is not None else 0,
+                             timeProcessing=procEnd - procStart,
+                             timeProving=proveEnd - proveStart)
+            self.recordPhases(serialize=proveStart - procStart, prove=proveEnd - proveStart, parse=procEnd - proveEnd)
 
+    def proveByWorker(self, formula: Formula, timeout: int = None) -> (Formula, bool, str):
+        procStart = time.perf_counter()
+        try:
+            proveStart = time.perf_counter()
+            # strategies are time limited by swipl itself, hard timeout only restarts the worker when it hangs
+            lines = self.worker.request('prove_request( problem , %s , %d ).\n' % (formula.toPrologTerm(), timeout or 0),
+                                        timeout=(2 * timeout if timeout else None),
+                                        cancelled=self.cancelCheck, pollInterval=self.pollInterval,
+                                        usage=self.recordUsage)
+            proveEnd = time.perf_counter()
+            isTheorem, proof = self.parseOutput('\n'.join(lines[:-1]))
+            return formula, isTheorem, proof
+        except subprocess.TimeoutExpired:
+            proveEnd = time.perf_counter()
+            isTheorem = None
+            return formula, None, None
+        except WorkerError as e:
+            proveEnd = time.perf_counter()
+            isTheorem = None
+            self.markFailed(e)
+            return formula, None, None
+        except ProofCancelled:
+            proveEnd = time.perf_counter()
+            isTheorem = None
+            raise
+        finally:
             procEnd = time.perf_counter()
             # update stats
-            self.stats['processed'] += 1
-            self.stats['conclusionReached'] += 1 if isTheorem is not None else 0
-            self.stats['timeProcessing'] += procEnd - procStart
-            self.stats['timeProving'] += proveEnd - proveStart
+            self.updateStats(processed=1,
+                             conclusionReached=1 if isTheorem is not None else 0,
+                             timeProcessing=procEnd - procStart,
+                             timeProving=proveEnd - proveStart)
+            self.recordPhases(serialize=proveStart - procStart, prove=proveEnd - proveStart, parse=procEnd - proveEnd)
+
+    # parses output of mleancop.py, returns (result, proof)
+    def parseOutput(self, output: str) -> (bool, str):
+        lines = output.strip().split('\n')
+        status = lines[0].split(' ')[-1]
+        statusMap = {
+            'Theorem': True,
+            'Non-Theorem': False,
+            'Timeout': None,
+            'Cancelled': None
+        }
+        isTheorem = statusMap[status]
+        if isTheorem:
+            proof = '\n'.join(lines[2:-1])
+        else:
+            proof = None
+        return isTheorem, proof
 
-    def generateProblemFile(self, formula: Formula) -> str:
-        fd, filename = tempfile.mkstemp(prefix='mleancop_%d_' % (self.wr,), text=True)
-        with open(fd, 'w') as probF:
-            probF.write('f( %s ).' % (formula.toPrologTerm(),))
-        return filename
+    # mleancop.py reads the problem only from a file
+    def problem(self, formula: Formula) -> str:
+        return 'f( %s ).' % (formula.toPrologTerm(),)
@@ -1,12 +1,15 @@
 import subprocess
 import sys
+import os
 import time
 
-from .Prover import Prover, ProverConfigError
+from .Prover import Prover, ProverConfigError, ProofCancelled
+from .Worker import WorkerPool, WorkerError
 from generator.Formula import Formula
 
 class MleantapProver(Prover):
-    def __init__(self, worldRank, logic=None, domain=None, prolog_path=None, prolog_options=None, mleantap_path=None):
+    def __init__(self, worldRank, logic=None, domain=None, prolog_path=None, prolog_options=None, mleantap_path=None,
+                 persistent=False, server_path=None):
         super().__init__(worldRank, 'MleanTAP')
         if logic not in ['d', 't', 's4', 's5', None]:
             raise ProverConfigError('mleantap', self.wr, "Value '%s' is not recognized as 'logic' value" % (logic,))
@@ -22,21 +25,47 @@ class MleantapProver(Prover):
         # just in case
         self.mleantap_path = mleantap_path or './mleantap13_swi.pl'
 
-    def prove(self, formula: Formula, timeout: int = None) -> (Formula, bool, str):
+        # persistent mode: swipl with MleanTAP loaded proves all formulas of the rank (one per formula proved at once)
+        self.worker = None
+        if persistent:
+            server_path = server_path or os.path.join(os.path.dirname(self.mleantap_path), 'mleantap_server.pl')
+            self.worker = WorkerPool(self.name, self.wr,
+                                 [self.prolog_path] + self.prolog_options
+                                 + [
+                                     '-g', "['%s']." % (self.mleantap_path,),
+                                     '-g', "asserta(logic(%s))." % (self.logic,),
+                                     '-g', "asserta(domain(%s))." % (self.domain,),
+                                     '-g', "['%s']." % (server_path,),
+                                     '-g', "serve",
+                                     '-t', "halt."
+                                 ],
+                                 endMarker='% MLEANTAP RESULT', interruptible=True)
+
+    def close(self):
+        super().close()
+        if self.worker is not None:
+            self.worker.close()
+
+    def proveFormula(self, formula: Formula, timeout: int = None) -> (Formula, bool, str):
+        if self.worker is not None:
+            return self.proveByWorker(formula, timeout)
+        return self.proveByProcess(formula, timeout)
+
+    def proveByProcess(self, formula: Formula, timeout: int = None) -> (Formula, bool, str):
         procStart = time.perf_counter()
         try:
             proveStart = time.perf_counter()
-            mleantap = subprocess.run([self.prolog_path] + self.prolog_options
-                                      + [
-                                          '-g', "['%s']." % (self.mleantap_path,),
-                                          '-g', "asserta(logic(%s))." % (self.logic,),
-                                          '-g', "asserta(domain(%s))." % (self.domain,),
-                                          '-g', "( prove( %s ) -> halt(0) ; halt(1) )." % (formula.toPrologTerm(),),
-                                          '-t', "halt."
-                                      ],
-                                      universal_newlines=True,           # to be able to get output as a string
-                                      stdout=subprocess.PIPE,            # capture stdout (remove noise)
-                                      timeout=timeout or None)            # set timeout (only hard timeout)
+            mleantap = self.runProcess([self.prolog_path] + self.prolog_options
+                                       + [
+                                           '-g', "['%s']." % (self.mleantap_path,),
+                                           '-g', "asserta(logic(%s))." % (self.logic,),
+                                           '-g', "asserta(domain(%s))." % (self.domain,),
+                                           '-g', "( prove( %s ) -> halt(0) ; halt(1) )." % (formula.toPrologTerm(),),
+                                           '-t', "halt."
+                                       ],
+                                       universal_newlines=True,           # to be able to get output as a string
+                                       stdout=subprocess.PIPE,            # capture stdout (remove noise)
+                                       timeout=timeout or None)            # set timeout (only hard timeout)
             proveEnd = time.perf_counter()
             if mleantap.returncode == 0:
                 conclusionReached = True
@@ -45,18 +74,67 @@ class MleantapProver(Prover):
                 conclusionReached = True
                 return formula, False, None
             else:
+                # neither halt(0) nor halt(1), an error of swipl
                 conclusionReached = False
+                self.markFailed('[MleanTAP %d] swipl exited with status %d' % (self.wr, mleantap.returncode))
                 return formula, None, None
         except subprocess.TimeoutExpired:
             proveEnd = time.perf_counter()
             conclusionReached = False
             return formula, None, None
+        except ProofCancelled:
+            proveEnd = time.perf_counter()
+            conclusionReached = False
+            raise
+        finally:
+            procEnd = time.perf_counter()
+            # save stats
+            self.updateStats(processed=1,
+                             conclusionReached=1 if conclusionReached else 0,
+                             timeProcessing=procEnd - procStart,
+                             timeProving=proveEnd - proveStart)
+            self.recordPhases(serialize=proveStart - procStart, prove=proveEnd - proveStart, parse=procEnd - proveEnd)
+
+    def proveByWorker(self, formula: Formula, timeout: int = None) -> (Formula, bool, str):
+        procStart = time.perf_counter()
+        try:
+            proveStart = time.perf_counter()
+            # time limit is enforced by swipl itself, hard timeout only restarts the worker when the query hangs
+            lines = self.worker.request('prove_request( %s , %d ).\n' % (formula.toPrologTerm(), timeout or 0),
+                                        timeout=(2 * timeout if timeout else None),
+                                        cancelled=self.cancelCheck, pollInterval=self.pollInterval,
+                                        usage=self.recordUsage)
+            proveEnd = time.perf_counter()
+            status = lines[-1].split(' ')[-1]
+            statusMap = {
+                'theorem': True,
+                'non-theorem': False,
+                'timeout': None,
+                'cancelled': None,
+                'error': None
+            }
+            conclusionReached = statusMap[status] is not None
+            if status in ['cancelled', 'error']:
+                self.markFailed('[MleanTAP %d] worker replied %s' % (self.wr, status))
+            return formula, statusMap[status], None
+        except subprocess.TimeoutExpired:
+            proveEnd = time.perf_counter()
+            conclusionReached = False
+            return formula, None, None
+        except WorkerError as e:
+            proveEnd = time.perf_counter()
+            conclusionReached = False
+            self.markFailed(e)
+            return formula, None, None
+        except ProofCancelled:
+            proveEnd = time.perf_counter()
+            conclusionReached = False
+            raise
         finally:
             procEnd = time.perf_counter()
             # save stats
-            self.stats['processed'] += 1
-            self.stats['conclusionReached'] += 1 if conclusionReached else 0
-            self.stats['timeProcessing'] += procEnd - procStart
-            self.stats['timeProving'] += proveEnd - proveStart
-            
-        
+            self.updateStats(processed=1,
+                             conclusionReached=1 if conclusionReached else 0,
+                             timeProcessing=procEnd - procStart,
+                             timeProving=proveEnd - proveStart)
+            self.recordPhases(serialize=proveStart - procStart, prove=proveEnd - proveStart, parse=procEnd - proveEnd)
@@ -0,0 +1,107 @@
+import io
+import locale
+import os
+import selectors
+import signal
+import subprocess
+import time
+
+class GroupPopen(subprocess.Popen):
+    # Prover process started in a process group of its own, so that it can be killed together with all the processes
+    # it started (swipl started by mleancop.py etc.). Process is reaped by reap (with os.wait4 instead of waitpid of
+    # wait and poll), which keeps its resource usage (including its children it waited for) in rusage. Output of
+    # the captured pipes is read by collect instead of communicate, which would reap the process itself
+    def __init__(self, args, **kwargs):
+        self.rusage = None
+        self.textMode = any(kwargs.get(option) for option in ('text', 'universal_newlines', 'encoding', 'errors'))
+        self.encoding = kwargs.get('encoding') or locale.getpreferredencoding(False)
+        self.errors = kwargs.get('errors') or 'strict'
+        super().__init__(args, start_new_session=True, **kwargs)
+        # captured pipe -> chunks read from it by collect, its selector has the pipes which are still open
+        self.outputs = {pipe: [] for pipe in (self.stdout, self.stderr) if pipe is not None}
+        self.selector = None
+
+    # reaps the process when it has finished (waits for it with block), returns its return code or None when it runs
+    def reap(self, block: bool = True) -> int:
+        if self.returncode is not None:
+            return self.returncode
+        try:
+            pid, status, rusage = os.wait4(self.pid, 0 if block else os.WNOHANG)
+        except ChildProcessError:
+            # reaped elsewhere, usage is lost
+            self.returncode = 0
+            return self.returncode
+        if pid != self.pid:
+            return None
+        self.rusage = rusage
+        self.returncode = os.waitstatus_to_exitcode(status)
+        return self.returncode
+
+    # reads output of the captured pipes until they are closed and the process is reaped (returns True) or timeout
+    # (in seconds, None for no limit) expires (returns False)
+    def collect(self, timeout: float = None) -> bool:
+        end = time.perf_counter() + timeout if timeout is not None else None
+        if self.selector is None:
+            self.selector = selectors.DefaultSelector()
+            for pipe in self.outputs:
+                self.selector.register(pipe, selectors.EVENT_READ)
+        while True:
+            remaining = max(end - time.perf_counter(), 0) if end is not None else None
+            if not self.selector.get_map():
+                if self.reap(block=end is None) is not None:
+                    return True
+                if remaining == 0:
+                    return False
+                time.sleep(min(remaining, 0.01))
+                continue
+            events = self.selector.select(timeout=remaining)
+            for key, _ in events:
+                chunk = os.read(key.fileobj.fileno(), 65536)
+                if chunk:
+                    self.outputs[key.fileobj].append(chunk)
+                else:
+                    self.selector.unregister(key.fileobj)
+            if not events and remaining == 0:
+                return False
+
+    # (stdout, stderr) read by collect, None for pipes which are not captured
+    def output(self) -> tuple:
+        def decode(pipe):
+            if pipe is None:
+                return None
+            data = b''.join(self.outputs[pipe])
+            if not self.textMode:
+                return data
+            return io.TextIOWrapper(io.BytesIO(data), encoding=self.encoding, errors=self.errors).read()
+        return decode(self.stdout), decode(self.stderr)
+
+    # kills the process and everything left in its process group
+    def killGroup(self):
+        try:
+            os.killpg(self.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def __exit__(self, *args):
+        if self.selector is not None:
+            self.selector.close()
+        return super().__exit__(*args)
+
+    # returns (CPU time in seconds, peak RSS in kB) of the reaped process or None
+    def usage(self) -> (float, int):
+        if self.rusage is None:
+            return None
+        return self.rusage.ru_utime + self.rusage.ru_stime, self.rusage.ru_maxrss
+
+# returns (CPU time in seconds, peak RSS in kB) of the running process (and its reaped children) so far or None when
+# it is not available (process is gone, no /proc)
+def processUsage(pid: int) -> (float, int):
+    try:
+        with open('/proc/%d/stat' % (pid,)) as f:
+            # fields after the command name, utime, stime, cutime and cstime are 14th to 17th field of the line
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open('/proc/%d/status' % (pid,)) as f:
+            peakRSS = next((int(line.split()[1]) for line in f if line.startswith('VmHWM:')), 0)
+    except (OSError, ValueError, IndexError):
+        return None
+    return sum(int(ticks) for ticks in fields[11:15]) / os.sysconf('SC_CLK_TCK'), peakRSS
@@ -1,7 +1,23 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from .Processes import GroupPopen
 from generator.Formula import Formula
 
 class Prover(ABC):
+    # results prover is able to produce: True – theorem, False – non-theorem, None – unknown
+    possibleResults = (True, False, None)
+    # how often (in seconds) running prover process checks whether the proof got cancelled
+    pollInterval = 0.1
+    # directory of problem files for provers which read problems only from files, in memory when possible
+    problemDir = '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else tempfile.gettempdir()
+
     def __init__(self, worldrank: int, name: str):
         self.wr = worldrank
         self.name = name
@@ -10,18 +26,232 @@ class Prover(ABC):
             'conclusionReached': 0,
             'timeProcessing': 0,
             'timeProving': 0,
+            'skipped': 0,
+            'cancelled': 0,
+            'cached': 0,
+            # proofs which ended by an error of the prover (unknown result which is not cached)
+            'failed': 0,
+            'problemFiles': 0,
+            # wall time, CPU time (user and system) and peak resident set size (kB) of prover processes
+            'timeWall': 0,
+            'timeCPU': 0,
+            'peakRSS': 0,
+            # persistent prover processes started again after a timeout, a crash or a cancellation they did not stop
+            'restarts': 0,
         }
+        # stats are updated by all the threads of proveMany
+        self.statsLock = threading.Lock()
+        # cancelCheck of the proof running in the current thread and its problem file
+        self.local = threading.local()
+        # problem files of all the threads, removed by close
+        self.problemFiles = []
+        # threads of proveMany are kept between calls (together with their problem files)
+        self.executor = None
+        self.executorSize = 0
+        # logic and domain prover is configured for (part of the result cache key)
+        self.logic = None
+        self.domain = None
+        # optional ResultCache consulted before running the prover
+        self.cache = None
+        # list of trace records of prove calls when tracing (see prove), taken by takeTrace
+        self.trace = None
+
+    # returns: (formula, result, proof)
+    # New results (conclusive ones and timeouts, not failed proofs, see markFailed) are added to the cache, which writes them on flush (done by proveMany and close).
+    # cancelled: optional function, proof is skipped or stopped (resulting in unknown result) once it returns True.
+    # When tracing, record of the call is added to trace: uid, prover, rank, timeout, start and end (epoch seconds),
+    # outcome (proved, cached, skipped, cancelled or failed), verdict and durations of the phases of the proof: spawn (of the
+    # prover process, part of prove), serialize (writing the problem), prove, parse (of the output), CPU time and
+    # peak RSS of the prover process
+    def prove(self, formula: Formula, timeout: int = None, cancelled=None) -> (Formula, bool, str):
+        record = None
+        if self.trace is not None:
+            record = {'uid': formula.uid, 'prover': self.name, 'rank': self.wr, 'timeout': timeout,
+                      'start': time.time(), 'spawn': 0, 'serialize': 0, 'prove': 0, 'parse': 0, 'cpu': 0, 'peakRSS': 0}
+        self.local.record = record
+        try:
+            outcome, result = self.proveWithOutcome(formula, timeout, cancelled)
+        finally:
+            self.local.record = None
+        if record is not None:
+            record.update(end=time.time(), outcome=outcome, verdict=result[1])
+            with self.statsLock:
+                self.trace.append(record)
+        return result
+
+    def proveWithOutcome(self, formula: Formula, timeout: int, cancelled) -> (str, tuple):
+        if cancelled is not None and cancelled():
+            self.updateStats(skipped=1)
+            return 'skipped', (formula, None, None)
+
+        if self.cache is not None:
+            cached = self.cache.lookup(formula, self.name, self.logic, self.domain, timeout)
+            if cached is not None:
+                self.updateStats(cached=1)
+                return 'cached', (formula, cached[0], cached[1])
+
+        self.cancelCheck = cancelled
+        self.local.failed = False
+        try:
+            start = time.perf_counter()
+            result = self.proveFormula(formula, timeout)
+            if self.local.failed:
+                self.updateStats(failed=1)
+                return 'failed', result
+            if self.cache is not None:
+                self.cache.add(formula, self.name, self.logic, self.domain, timeout, result[1], result[2],
+                               time.perf_counter() - start)
+            return 'proved', result
+        except ProofCancelled:
+            self.updateStats(cancelled=1)
+            return 'cancelled', (formula, None, None)
+        finally:
+            self.cancelCheck = None
+
+    # proves formulas, at most concurrency of them at once (one at a time when None) in threads of the calling process.
+    # Returns list of (formula, result, proof) in the order of formulas, their new results are written to the cache
+    # at once in the end.
+    # cancelled: optional function of position of the formula in formulas, see prove.
+    # done: optional function called with position and result as soon as the formula is finished
+    def proveMany(self, formulas: list, timeout: int = None, concurrency: int = None, cancelled=None,
+                  done=None) -> list:
+        def proveAt(position):
+            result = self.prove(formulas[position], timeout,
+                                cancelled=(lambda: cancelled(position)) if cancelled is not None else None)
+            if done is not None:
+                done(position, result)
+            return result
+
+        try:
+            if not concurrency or concurrency <= 1 or len(formulas) <= 1:
+                return [proveAt(position) for position in range(len(formulas))]
+            if self.executorSize != concurrency:
+                if self.executor is not None:
+                    self.executor.shutdown()
+                self.executor = ThreadPoolExecutor(concurrency)
+                self.executorSize = concurrency
+            return list(self.executor.map(proveAt, range(len(formulas))))
+        finally:
+            if self.cache is not None:
+                self.cache.flush()
+
+    # marks the proof running in the current thread as failed (error of the prover, crash of its process), its unknown
+    # result is not an outcome of the formula and is not cached
+    def markFailed(self, error=None):
+        if error is not None:
+            print('[WARNING]', error, file=sys.stderr)
+        self.local.failed = True
+
+    @property
+    def cancelCheck(self):
+        return getattr(self.local, 'cancelCheck', None)
+
+    @cancelCheck.setter
+    def cancelCheck(self, cancelled):
+        self.local.cancelCheck = cancelled
+
+    def updateStats(self, **increments):
+        with self.statsLock:
+            for key, increment in increments.items():
+                self.stats[key] += increment
+
+    # accounts a call of a prover process (or a request of a worker process), spawn is the time it took to start it,
+    # restarts the number of worker processes the request restarted
+    def recordUsage(self, wall: float, cpu: float, peakRSS: int, spawn: float = 0, restarts: int = 0):
+        with self.statsLock:
+            self.stats['restarts'] += restarts
+            self.stats['timeWall'] += wall
+            self.stats['timeCPU'] += cpu
+            self.stats['peakRSS'] = max(self.stats['peakRSS'], peakRSS)
+        record = getattr(self.local, 'record', None)
+        if record is not None:
+            record['spawn'] += spawn
+            record['cpu'] += cpu
+            record['peakRSS'] = max(record['peakRSS'], peakRSS)
+
+    # adds durations of phases (serialize, prove, parse) to the trace record of the proof running in the thread
+    def recordPhases(self, **durations):
+        record = getattr(self.local, 'record', None)
+        if record is not None:
+            for phase, duration in durations.items():
+                record[phase] += duration
+
+    # returns trace records collected so far and starts a new list
+    def takeTrace(self) -> list:
+        with self.statsLock:
+            trace, self.trace = self.trace, []
+        return trace
 
     # returns: (formula, result, proof)
     @abstractmethod
-    def prove(self, formula: Formula, timeout: int = None) -> (Formula, bool, str):
+    def proveFormula(self, formula: Formula, timeout: int = None) -> (Formula, bool, str):
         pass
 
+    # releases resources held by the prover (e.g. persistent prover processes)
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+            self.executorSize = 0
+        if self.cache is not None:
+            self.cache.close()
+        for problemFile in self.problemFiles:
+            os.remove(problemFile)
+        self.problemFiles = []
+
+    # writes problem to the problem file of the current thread and returns its path. The file is created once and
+    # rewritten for every formula, so that proofs do not create and remove files (each of them is counted in stats)
+    def writeProblemFile(self, problem: str) -> str:
+        problemFile = getattr(self.local, 'problemFile', None)
+        if problemFile is None:
+            fd, problemFile = tempfile.mkstemp(prefix='%s_%d_' % (self.name.lower(), self.wr), dir=self.problemDir,
+                                               text=True)
+            os.close(fd)
+            self.local.problemFile = problemFile
+            with self.statsLock:
+                self.problemFiles.append(problemFile)
+        with open(problemFile, 'w') as probF:
+            probF.write(problem)
+        self.updateStats(problemFiles=1)
+        return problemFile
+
+    # replacement of subprocess.run which also stops the process when the proof gets cancelled. Process runs in its own
+    # process group which is killed once it finishes, so that no process started by the prover is left behind.
+    # Raises subprocess.TimeoutExpired on timeout and ProofCancelled on cancellation
+    def runProcess(self, args: list, timeout: float = None, check: bool = False, **kwargs) -> subprocess.CompletedProcess:
+        start = time.perf_counter()
+        with GroupPopen(args, **kwargs) as proc:
+            spawn = time.perf_counter() - start
+            deadline = start + timeout if timeout else None
+            try:
+                while True:
+                    wait = self.pollInterval if self.cancelCheck is not None else None
+                    if deadline is not None:
+                        remaining = max(deadline - time.perf_counter(), 0)
+                        wait = remaining if wait is None else min(wait, remaining)
+                    if proc.collect(wait):
+                        break
+                    if deadline is not None and time.perf_counter() >= deadline:
+                        raise subprocess.TimeoutExpired(args, timeout)
+                    if self.cancelCheck is not None and self.cancelCheck():
+                        raise ProofCancelled(self.name, self.wr, 'proof cancelled')
+            finally:
+                proc.killGroup()
+                proc.reap()
+                cpu, peakRSS = proc.usage() or (0, 0)
+                self.recordUsage(time.perf_counter() - start, cpu, peakRSS, spawn)
+        stdout, stderr = proc.output()
+        if check and proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, args, stdout, stderr)
+        return subprocess.CompletedProcess(args, proc.returncode, stdout, stderr)
+
 class NoProver(Prover):
-    def __init__(self, worldRank):
-        super().__init__(worldRank, 'NoProver')
+    # answers unknown at once, can stand in for a real prover (given its name) to measure the rest of the run
+    def __init__(self, worldRank, name: str = 'NoProver'):
+        super().__init__(worldRank, name)
 
-    def prove(self, formula: Formula, timeout: int = None) -> (Formula, bool, str):
+    def proveFormula(self, formula: Formula, timeout: int = None) -> (Formula, bool, str):
+        self.updateStats(processed=1)
         return formula, None, None
 
 class ProverConfigError(Exception):
@@ -31,3 +261,7 @@ class ProverConfigError(Exception):
 class ProverError(Exception):
     def __init__(self, prover: str, rank: int, msg: str):
         super().__init__('[%s %d] %s' % (prover, rank, msg))
+
+class ProofCancelled(Exception):
+    def __init__(self, prover: str, rank: int, msg: str):
+        super().__init__('[%s %d] %s' % (prover, rank, msg))
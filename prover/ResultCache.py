@@ -0,0 +1,100 @@
+import hashlib
+import sqlite3
+import threading
+
+from generator.Formula import Formula
+
+class ResultCache:
+    # On-disk (SQLite) cache of prover results. Entries are keyed by formula (hash of its canonical Prolog term),
+    # prover name, logic, domain and timeout the prover was given. Conclusive result is reused when it was reached
+    # within the requested timeout, unknown result only when the cached run had at least the requested timeout.
+    # New entries are buffered by add and written together by flush, in one transaction.
+    # journalMode: SQLite journal mode, 'WAL' only for a file on a local disk (see settings['cache_journal_mode'])
+    def __init__(self, path: str, journalMode: str = 'DELETE'):
+        self.path = path
+        # many ranks may share the same file, waiting for the lock instead of failing.
+        # Connection is shared by the threads of Prover.proveMany, one at a time
+        self.db = sqlite3.connect(path, timeout=300, check_same_thread=False)
+        self.lock = threading.Lock()
+        # entries added since the last flush
+        self.pending = []
+        self.db.execute('PRAGMA journal_mode=%s' % (journalMode,))
+        if journalMode.upper() == 'WAL':
+            # commits do not wait for the disk, still safe with WAL
+            self.db.execute('PRAGMA synchronous=NORMAL')
+        with self.db:
+            self.db.execute('''CREATE TABLE IF NOT EXISTS results (
+                                   formula TEXT NOT NULL,
+                                   prover TEXT NOT NULL,
+                                   logic TEXT NOT NULL,
+                                   domain TEXT NOT NULL,
+                                   timeout REAL NOT NULL,
+                                   result INTEGER,
+                                   proof TEXT,
+                                   time REAL NOT NULL,
+                                   PRIMARY KEY (formula, prover, logic, domain, timeout))''')
+
+    @staticmethod
+    def formulaKey(formula: Formula) -> str:
+        return hashlib.sha256(formula.toPrologTerm().encode('utf-8')).hexdigest()
+
+    # returns (result, proof) or None when there is no usable entry
+    def lookup(self, formula: Formula, prover: str, logic: str, domain: str, timeout: float = None) -> (bool, str):
+        # no timeout is the same as infinite one
+        timeout = timeout or float('inf')
+        with self.lock:
+            row = self.db.execute('''SELECT result, proof FROM results
+                                     WHERE formula = ? AND prover = ? AND logic = ? AND domain = ?
+                                       AND ((result IS NOT NULL AND time <= ?) OR (result IS NULL AND timeout >= ?))
+                                     ORDER BY result IS NULL, time
+                                     LIMIT 1''',
+                                  (self.formulaKey(formula), prover, str(logic), str(domain), timeout, timeout)
+                                  ).fetchone()
+        if row is None:
+            return None
+        return (None if row[0] is None else bool(row[0])), row[1]
+
+    # returns dictionary: prover name -> mean time of its cached results
+    def meanTimes(self) -> dict:
+        return dict(self.db.execute('SELECT prover, AVG(time) FROM results GROUP BY prover'))
+
+    # shortest time of every formula the prover reached a conclusive result for, counting only runs which had at least
+    # minTimeout, so that times are neither repeated nor capped by the lower timeouts they led to
+    def proofTimes(self, prover: str, logic: str, domain: str, minTimeout: float = 0) -> list:
+        return [row[0] for row in self.db.execute('''SELECT MIN(time) FROM results
+                                                     WHERE prover = ? AND logic = ? AND domain = ? AND result IS NOT NULL
+                                                       AND timeout >= ?
+                                                     GROUP BY formula''',
+                                                  (prover, str(logic), str(domain), minTimeout))]
+
+    # returns dictionary: formula key -> {prover name: shortest time} for the given provers, (name, logic, domain)
+    def formulaTimes(self, provers: list) -> dict:
+        times = {}
+        for name, logic, domain in provers:
+            for formula, time in self.db.execute('''SELECT formula, MIN(time) FROM results
+                                                    WHERE prover = ? AND logic = ? AND domain = ?
+                                                    GROUP BY formula''',
+                                                 (name, str(logic), str(domain))):
+                times.setdefault(formula, {})[name] = time
+        return times
+
+    # buffers the entry, it is written (and visible to lookup) after the next flush
+    def add(self, formula: Formula, prover: str, logic: str, domain: str, timeout: float, result: bool, proof: str,
+            time: float):
+        entry = (self.formulaKey(formula), prover, str(logic), str(domain), timeout or float('inf'),
+                 None if result is None else int(result), proof, time)
+        with self.lock:
+            self.pending.append(entry)
+
+    # writes the buffered entries
+    def flush(self):
+        with self.lock:
+            if not self.pending:
+                return
+            with self.db:
+                self.db.executemany('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)', self.pending)
+            self.pending = []
+
+    def close(self):
+        self.flush()
+        self.db.close()
@@ -0,0 +1,90 @@
+import math
+import random
+import time
+
+from .Prover import NoProver, ProverConfigError, ProofCancelled
+from generator.Formula import Formula
+
+class SimulatedProver(NoProver):
+    # Stand-in of a real prover for benchmarks of the orchestration: instead of proving it sleeps (or keeps the CPU
+    # busy) for a time drawn from the latency distribution. Every formula gets the same latency and verdict in every
+    # run, verdicts of all provers of a formula agree (no contradictions).
+    # latency: 'constant', 'uniform' (0 to 2 * mean), 'exponential' or 'lognormal' (with sigma), in seconds
+    # timeoutRate: fraction of formulas the prover runs out of time on, they take timeoutAfter seconds (the timeout
+    # given to prove when None) and end with unknown result
+    # unknownRate: fraction of the other formulas which end with unknown result anyway
+    # cpu: burn CPU instead of sleeping
+    # possibleResults of the prover it stands in for can be set on the instance
+    distributions = ['constant', 'uniform', 'exponential', 'lognormal']
+
+    def __init__(self, worldRank, name: str, latency: str = 'exponential', mean: float = 0.01, sigma: float = 1,
+                 timeoutRate: float = 0, timeoutAfter: float = None, unknownRate: float = 0, cpu: bool = False,
+                 seed: int = 0):
+        super().__init__(worldRank, name)
+        if latency not in self.distributions:
+            raise ProverConfigError(name, self.wr, "Value '%s' is not recognized as 'latency' value" % (latency,))
+        self.latency = latency
+        self.mean = mean
+        self.sigma = sigma
+        self.timeoutRate = timeoutRate
+        self.timeoutAfter = timeoutAfter
+        self.unknownRate = unknownRate
+        self.cpu = cpu
+        self.seed = seed
+
+    def draw(self, r: random.Random) -> float:
+        if self.latency == 'constant':
+            return self.mean
+        elif self.latency == 'uniform':
+            return r.uniform(0, 2 * self.mean)
+        elif self.latency == 'exponential':
+            return r.expovariate(1 / self.mean) if self.mean > 0 else 0
+        else:
+            # mean of the lognormal distribution is exp(mu + sigma^2 / 2)
+            return r.lognormvariate(math.log(self.mean) - self.sigma ** 2 / 2, self.sigma) if self.mean > 0 else 0
+
+    # waits (or works) until the deadline, stopping early when the proof gets cancelled
+    def spend(self, seconds: float):
+        deadline = time.perf_counter() + seconds
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return
+            if self.cancelCheck is not None and self.cancelCheck():
+                raise ProofCancelled(self.name, self.wr, 'proof cancelled')
+            step = min(remaining, self.pollInterval)
+            if self.cpu:
+                stepEnd = time.perf_counter() + step
+                while time.perf_counter() < stepEnd:
+                    pass
+            else:
+                time.sleep(step)
+
+    def proveFormula(self, formula: Formula, timeout: int = None) -> (Formula, bool, str):
+        procStart = time.perf_counter()
+        r = random.Random('%s %s %d' % (formula.uid, self.name, self.seed))
+        truth = random.Random('%s %d' % (formula.uid, self.seed)).random() < 0.5
+        timedOut = r.random() < self.timeoutRate
+        if timedOut:
+            latency = self.timeoutAfter if self.timeoutAfter is not None else (timeout or 0)
+        else:
+            latency = self.draw(r)
+            if timeout:
+                timedOut = latency > timeout
+                latency = min(latency, timeout)
+        verdict = None if timedOut or r.random() < self.unknownRate else truth
+        if verdict not in self.possibleResults:
+            verdict = None
+        try:
+            self.spend(latency)
+            return formula, verdict, 'simulated proof' if verdict else None
+        except ProofCancelled:
+            verdict = None
+            raise
+        finally:
+            procEnd = time.perf_counter()
+            self.updateStats(processed=1,
+                             conclusionReached=1 if verdict is not None else 0,
+                             timeProcessing=procEnd - procStart,
+                             timeProving=procEnd - procStart)
+            self.recordPhases(prove=procEnd - procStart)
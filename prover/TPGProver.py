@@ -1,18 +1,22 @@
 import subprocess
 import sys
+import json
 import time
 
-from .Prover import Prover, ProverConfigError
+from .Prover import Prover, ProverConfigError, ProofCancelled
+from .Worker import WorkerPool, WorkerError
 from generator.Formula import Formula
 
 class TPGProver(Prover):
-    def __init__(self, worldRank, logic=None, domain=None, node_path=None, tpg_dir=None):
+    def __init__(self, worldRank, logic=None, domain=None, node_path=None, tpg_dir=None, persistent=False):
         super().__init__(worldRank, 'TPG')
         if logic not in ['s5', None]: # supporting only s5 for now because I am lazy
             raise ProverConfigError('tpg', self.wr, "Value '%s' is not recognized as 'logic' value" % (logic,))
         if domain not in ['const', None]: # no other domain is supported
             raise ProverConfigError('tpg', self.wr, "Value '%s' is not recognized as 'domain' value" % (domain,))
 
+        self.logic = 's5'
+        self.domain = 'const'
         # r – reflexive, m – symmetric, t – transitive
         self.accessibility = 'rmt' # no ifs because I am too lazy to implement other logics
         # expecting node to be in $PATH if not passed
@@ -20,28 +24,49 @@ class TPGProver(Prover):
         # just in case
         self.tpg_dir = tpg_dir or '.'
 
-    def prove(self, formula: Formula, timeout: int = None) -> (Formula, bool, str):
+        # persistent mode: node process proves all formulas of the rank (one per formula proved at once)
+        self.worker = None
+        if persistent:
+            self.worker = WorkerPool(self.name, self.wr, [self.node_path, self.tpg_dir + 'index.js', '--serve'],
+                                 endMarker='TPG-REPLY ', interruptible=True)
+
+    def close(self):
+        super().close()
+        if self.worker is not None:
+            self.worker.close()
+
+    def proveFormula(self, formula: Formula, timeout: int = None) -> (Formula, bool, str):
+        if self.worker is not None:
+            return self.proveByWorker(formula, timeout)
+        return self.proveByProcess(formula, timeout)
+
+    def proveByProcess(self, formula: Formula, timeout: int = None) -> (Formula, bool, str):
         procStart = time.perf_counter()
         try:
             proveStart = time.perf_counter()
-            tpg = subprocess.run([self.node_path, self.tpg_dir + 'index.js',
-                                  formula.toUnicodeString(),
-                                  self.accessibility],
-                                 universal_newlines=True, # to be able to get output as a string
-                                 stdout=subprocess.PIPE,  # capture stdout (remove noise)
-                                 timeout=timeout or None)  # set timeout (only hard timeout)
+            tpg = self.runProcess([self.node_path, self.tpg_dir + 'index.js',
+                                   formula.toUnicodeString(),
+                                   self.accessibility],
+                                  universal_newlines=True, # to be able to get output as a string
+                                  stdout=subprocess.PIPE,  # capture stdout (remove noise)
+                                  timeout=timeout or None)  # set timeout (only hard timeout)
             proveEnd = time.perf_counter()
 
+            lines = tpg.stdout.split('\n')
+            if not lines[0].startswith('STATUS: '):
+                # TPG crashed before printing the result (like the worker replying Error)
+                conclusionReached = False
+                self.markFailed('[TPG %d] TPG exited with status %d' % (self.wr, tpg.returncode))
+                return formula, None, None
+
             # if conclusion is not reached, timeout happens, exception is raised and this is not executed
             conclusionReached = True
 
-            lines = tpg.stdout.split('\n')
-
             # first line, second token
             status = lines[0].split(' ')[1]
-            # second line is PROOF START and last line is PROOF END (right number from : is inclusive)
-            # Need to take the first line in the resulting list
-            proof = lines[2:-2][0]
+            # second line is PROOF START and the last two are PROOF END and the empty rest after the final newline, the
+            # proof is everything in between (the same text as the proof of the worker reply)
+            proof = '\n'.join(lines[2:-2])
             statusMap = {
                 'Theorem' : True,
                 'Non-Theorem': False
@@ -52,10 +77,63 @@ class TPGProver(Prover):
             proveEnd = time.perf_counter()
             conclusionReached = False
             return formula, None, None
+        except ProofCancelled:
+            proveEnd = time.perf_counter()
+            conclusionReached = False
+            raise
+        finally:
+            procEnd = time.perf_counter()
+            # save stats
+            self.updateStats(processed=1,
+                             conclusionReached=1 if conclusionReached else 0,
+                             timeProcessing=procEnd - procStart,
+                             timeProving=proveEnd - proveStart)
+            self.recordPhases(serialize=proveStart - procStart, prove=proveEnd - proveStart, parse=procEnd - proveEnd)
+
+    def proveByWorker(self, formula: Formula, timeout: int = None) -> (Formula, bool, str):
+        procStart = time.perf_counter()
+        try:
+            proveStart = time.perf_counter()
+            request = json.dumps({'formula': formula.toUnicodeString(),
+                                  'accessibility': self.accessibility,
+                                  'timeout': timeout or 0})
+            # node stops the proof after timeout itself, hard timeout only restarts the worker when it hangs
+            lines = self.worker.request(request + '\n',
+                                        timeout=(2 * timeout if timeout else None),
+                                        cancelled=self.cancelCheck, pollInterval=self.pollInterval,
+                                        usage=self.recordUsage)
+            proveEnd = time.perf_counter()
+
+            reply = json.loads(lines[-1][len('TPG-REPLY '):])
+            statusMap = {
+                'Theorem' : True,
+                'Non-Theorem': False,
+                'Timeout': None,
+                'Cancelled': None,
+                'Error': None
+            }
+            conclusionReached = statusMap[reply['status']] is not None
+            if reply['status'] in ['Cancelled', 'Error']:
+                self.markFailed('[TPG %d] worker replied %s' % (self.wr, reply['status']))
+            return formula, statusMap[reply['status']], reply['proof']
+        except subprocess.TimeoutExpired:
+            proveEnd = time.perf_counter()
+            conclusionReached = False
+            return formula, None, None
+        except WorkerError as e:
+            proveEnd = time.perf_counter()
+            conclusionReached = False
+            self.markFailed(e)
+            return formula, None, None
+        except ProofCancelled:
+            proveEnd = time.perf_counter()
+            conclusionReached = False
+            raise
         finally:
             procEnd = time.perf_counter()
             # save stats
-            self.stats['processed'] += 1
-            self.stats['conclusionReached'] += 1 if conclusionReached else 0
-            self.stats['timeProcessing'] += procEnd - procStart
-            self.stats['timeProving'] += proveEnd - proveStart
+            self.updateStats(processed=1,
+                             conclusionReached=1 if conclusionReached else 0,
+                             timeProcessing=procEnd - procStart,
+                             timeProving=proveEnd - proveStart)
+            self.recordPhases(serialize=proveStart - procStart, prove=proveEnd - proveStart, parse=procEnd - proveEnd)
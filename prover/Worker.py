@@ -0,0 +1,186 @@
+import os
+import selectors
+import signal
+import subprocess
+import threading
+import time
+
+from .Prover import ProofCancelled, ProverError
+from .Processes import GroupPopen, processUsage
+
+class Worker:
+    # Long-lived prover process which reads requests from its stdin and writes replies to its stdout.
+    # Reply consists of lines, the last one starts with endMarker. Process is started on the first request and
+    # restarted whenever a request times out or dies, so a hung proof never blocks the rank.
+    # interruptible: process stops the proof on SIGINT and ends the reply early, cancelled request then keeps the
+    # process (restarting it only when the reply does not come within abortTimeout), otherwise it is restarted
+    abortTimeout = 5
+
+    def __init__(self, prover: str, rank: int, args: list, endMarker: str, cwd: str = None,
+                 interruptible: bool = False):
+        self.prover = prover
+        self.wr = rank
+        self.args = args
+        self.endMarker = endMarker
+        self.cwd = cwd
+        self.interruptible = interruptible
+        self.proc = None
+        self.buffer = b''
+        self.restarts = 0
+        # (CPU time, peak RSS) of the last process when it got closed
+        self.lastUsage = None
+
+    def start(self):
+        self.proc = GroupPopen(self.args,
+                               cwd=self.cwd,
+                               stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL)
+        self.buffer = b''
+
+    def close(self):
+        if self.proc is None:
+            return
+        self.proc.killGroup()
+        self.proc.reap()
+        # so that the interrupted request can still be accounted
+        self.lastUsage = self.proc.usage()
+        for stream in (self.proc.stdin, self.proc.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        self.proc = None
+
+    # process is started again on the next request
+    def reset(self):
+        self.close()
+        self.restarts += 1
+
+    # sends request and returns lines of the reply (end marker line included)
+    # raises subprocess.TimeoutExpired when the reply does not come in time, ProofCancelled when cancelled returns True
+    # while waiting and WorkerError when the process dies.
+    # usage: optional function called with wall time, CPU time, peak RSS and start time of the process for the request
+    # and number of restarts of the process it caused
+    def request(self, payload: str, timeout: float = None, cancelled=None, pollInterval: float = 0.1,
+                usage=None) -> list:
+        start = time.perf_counter()
+        restarts = self.restarts
+        if self.proc is None or self.proc.reap(block=False) is not None:
+            self.close()
+            self.start()
+        spawn = time.perf_counter() - start
+        before = processUsage(self.proc.pid) if usage is not None else None
+        try:
+            return self.exchange(payload, timeout, cancelled, pollInterval)
+        finally:
+            after = processUsage(self.proc.pid) if self.proc is not None else self.lastUsage
+            if before is not None and after is not None:
+                usage(time.perf_counter() - start, after[0] - before[0], after[1], spawn, self.restarts - restarts)
+
+    def exchange(self, payload: str, timeout: float, cancelled, pollInterval: float) -> list:
+        try:
+            self.proc.stdin.write(payload.encode('utf-8'))
+            self.proc.stdin.flush()
+        except BrokenPipeError:
+            self.reset()
+            raise WorkerError(self.prover, self.wr, 'worker process died before receiving the request')
+
+        deadline = time.perf_counter() + timeout if timeout else None
+        lines = []
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.proc.stdout, selectors.EVENT_READ)
+            while True:
+                if self.takeLines(lines):
+                    return lines
+
+                wait = pollInterval if cancelled is not None else None
+                if deadline is not None:
+                    remaining = max(deadline - time.perf_counter(), 0)
+                    wait = remaining if wait is None else min(wait, remaining)
+                if selector.select(timeout=wait):
+                    chunk = os.read(self.proc.stdout.fileno(), 65536)
+                    if not chunk:
+                        self.reset()
+                        raise WorkerError(self.prover, self.wr, 'worker process died while proving')
+                    self.buffer += chunk
+                elif deadline is not None and time.perf_counter() >= deadline:
+                    self.reset()
+                    raise subprocess.TimeoutExpired(self.args, timeout)
+                elif cancelled is not None and cancelled():
+                    if self.interruptible:
+                        self.abort(lines)
+                    else:
+                        self.reset()
+                    raise ProofCancelled(self.prover, self.wr, 'proof cancelled')
+
+    # stops the proof by SIGINT and reads the rest of its reply (lines read so far), so that the process can take the
+    # next request. Process is restarted when the reply does not come in time
+    def abort(self, lines: list):
+        try:
+            self.proc.send_signal(signal.SIGINT)
+            self.readReply(lines, time.perf_counter() + self.abortTimeout)
+        except (OSError, WorkerError, subprocess.TimeoutExpired):
+            self.reset()
+
+    def readReply(self, lines: list, deadline: float):
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.proc.stdout, selectors.EVENT_READ)
+            while not self.takeLines(lines):
+                if selector.select(timeout=max(deadline - time.perf_counter(), 0)):
+                    chunk = os.read(self.proc.stdout.fileno(), 65536)
+                    if not chunk:
+                        raise WorkerError(self.prover, self.wr, 'worker process died while aborting')
+                    self.buffer += chunk
+                elif time.perf_counter() >= deadline:
+                    raise subprocess.TimeoutExpired(self.args, self.abortTimeout)
+
+    # moves complete lines which are already buffered to lines, returns True once the end marker line is taken
+    def takeLines(self, lines: list) -> bool:
+        while b'\n' in self.buffer:
+            line, self.buffer = self.buffer.split(b'\n', 1)
+            line = line.decode('utf-8', errors='replace')
+            lines.append(line)
+            if line.startswith(self.endMarker):
+                return True
+        return False
+
+class WorkerError(ProverError):
+    pass
+
+class WorkerPool:
+    # Workers of a prover, with the same interface as a single Worker. Every request takes an idle worker, a new one is
+    # started when all of them are busy, so there are as many worker processes as formulas proved at once
+    def __init__(self, prover: str, rank: int, args: list, endMarker: str, cwd: str = None,
+                 interruptible: bool = False):
+        self.prover = prover
+        self.wr = rank
+        self.args = args
+        self.endMarker = endMarker
+        self.cwd = cwd
+        self.interruptible = interruptible
+        self.lock = threading.Lock()
+        self.workers = []
+        self.idle = []
+
+    @property
+    def restarts(self) -> int:
+        return sum(worker.restarts for worker in self.workers)
+
+    def request(self, payload: str, timeout: float = None, cancelled=None, pollInterval: float = 0.1,
+                usage=None) -> list:
+        with self.lock:
+            if self.idle:
+                worker = self.idle.pop()
+            else:
+                worker = Worker(self.prover, self.wr, self.args, self.endMarker, self.cwd, self.interruptible)
+                self.workers.append(worker)
+        try:
+            return worker.request(payload, timeout, cancelled, pollInterval, usage)
+        finally:
+            with self.lock:
+                self.idle.append(worker)
+
+    def close(self):
+        for worker in self.workers:
+            worker.close()
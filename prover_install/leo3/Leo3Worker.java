@@ -0,0 +1,98 @@
+import java.io.BufferedReader;
+import java.io.ByteArrayOutputStream;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.io.InputStreamReader;
+import java.io.OutputStream;
+import java.io.PrintStream;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.nio.charset.StandardCharsets;
+import java.security.Permission;
+
+// Keeps LEO-III loaded in a single JVM and proves problems read from the standard input, one request per line:
+//     <timeout in seconds, 0 for none> TAB <problem file>
+// Everything LEO-III prints for the problem is followed by the line "% LEO3WORKER END <exit status>".
+//
+// Usage (runs directly from the source file):
+//     java -Djava.security.manager=allow -cp leo3.jar Leo3Worker.java [main class of LEO-III]
+//
+// Needs JDK 12 to 23: System.exit of LEO-III is trapped by a security manager, JDK 11 does not know the value 'allow'
+// of java.security.manager (and fails to start) and from JDK 24 on security manager cannot be installed at all
+public class Leo3Worker {
+    static final String END_MARKER = "% LEO3WORKER END";
+
+    // thrown instead of terminating the JVM when LEO-III calls System.exit
+    static class ExitTrapped extends SecurityException {
+        final int status;
+
+        ExitTrapped(int status) {
+            super("System.exit(" + status + ")");
+            this.status = status;
+        }
+    }
+
+    // System.out is replaced once, before LEO-III (and Scala console) get hold of it, and output of every problem
+    // is then captured by switching the target stream
+    static class Redirect extends OutputStream {
+        volatile OutputStream target = OutputStream.nullOutputStream();
+
+        public void write(int b) throws IOException { target.write(b); }
+        public void write(byte[] b, int off, int len) throws IOException { target.write(b, off, len); }
+        public void flush() throws IOException { target.flush(); }
+    }
+
+    public static void main(String[] args) throws Exception {
+        String mainClass = args.length > 0 ? args[0] : "leo.Main";
+
+        PrintStream protocol = new PrintStream(new FileOutputStream(FileDescriptor.out), true, "UTF-8");
+        Redirect redirect = new Redirect();
+        System.setOut(new PrintStream(redirect, true, "UTF-8"));
+        try {
+            System.setSecurityManager(new SecurityManager() {
+                @Override
+                public void checkExit(int status) { throw new ExitTrapped(status); }
+                @Override
+                public void checkPermission(Permission perm) {}
+            });
+        } catch (UnsupportedOperationException e) {
+            System.err.println("Leo3Worker: security manager is not supported by this JVM (JDK 12 to 23 is needed), "
+                               + "System.exit of LEO-III cannot be trapped");
+            System.exit(2);
+        }
+
+        Method leoMain = Class.forName(mainClass).getMethod("main", String[].class);
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        String line;
+        while ((line = in.readLine()) != null) {
+            String[] request = line.split("\t", 2);
+            String[] leoArgs = request[0].equals("0")
+                ? new String[] {request[1], "-v", "0", "-p"}
+                : new String[] {request[1], "-v", "0", "-p", "-t", request[0]};
+
+            ByteArrayOutputStream output = new ByteArrayOutputStream();
+            redirect.target = output;
+            int status = 0;
+            try {
+                leoMain.invoke(null, (Object) leoArgs);
+            } catch (InvocationTargetException e) {
+                if (e.getCause() instanceof ExitTrapped) {
+                    status = ((ExitTrapped) e.getCause()).status;
+                } else {
+                    status = 1;
+                    e.getCause().printStackTrace();
+                }
+            }
+            System.out.flush();
+            redirect.target = OutputStream.nullOutputStream();
+
+            String text = output.toString("UTF-8");
+            protocol.print(text);
+            if (!text.isEmpty() && !text.endsWith("\n")) {
+                protocol.println();
+            }
+            protocol.println(END_MARKER + " " + status);
+        }
+    }
+}
@@ -16,6 +16,9 @@ import subprocess
 import sys
 import argparse
 import signal
+import threading
+import time
+import concurrent.futures
 
 from settings import settings, validateSettings
 
@@ -26,19 +29,36 @@ timeout = 200
 # interface settings
 printSettings = True
 
+# strategy settings, whether they are complete and their share of the timeout
+strategies = [
+    ("[cut,scut,comp(7)]",      True,  20),
+    ("[def,cut]",               False, 20),
+    ("[nodef]",                 True,  10),
+    ("[reo(23),cut,scut]",      False, 10),
+    ("[reo(31),cut,scut]",      False, 10),
+    ("[reo(47),cut,scut]",      False, 10),
+    ("[reo(25),def,cut,scut]",  False,  5),
+    ("[reo(42),conj,cut,scut]", False,  5),
+    ("[conj,def,cut,scut]",     False,  5),
+    ("[def]",                   True,  99),
+]
+
+def mleancopArgs(opts):
+    return [settings['prolog-path']] + settings['prolog-options'] + \
+        ['-g', 'assert((print(A):-write(A))).',
+         '-g', 'assert(prolog(\'%s\')).' % (settings['prolog'],),
+         '-g', '[\'%s/mleancop_main.pl\'].' % (settings['mleancop-path'],),
+         '-g', 'asserta(logic(\'%s\')).' % (settings['logic'],),
+         '-g', 'asserta(domain(\'$%s\')).' % (settings['domain'],),
+         '-g', 'mleancop_main(\'%s\',%s,_).' % (problemFile, opts),
+         '-t', 'halt.'
+         ]
+
 def mleancop(opts, comp, time_pc):
     # because percentages apparently have 194 parts, not 100
     partial_timeout = timeout / 194 * time_pc
     try:
-        proc = subprocess.run([settings['prolog-path']] + settings['prolog-options'] +
-                              ['-g', 'assert((print(A):-write(A))).',
-                               '-g', 'assert(prolog(\'%s\')).' % (settings['prolog'],),
-                               '-g', '[\'%s/mleancop_main.pl\'].' % (settings['mleancop-path'],),
-                               '-g', 'asserta(logic(\'%s\')).' % (settings['logic'],),
-                               '-g', 'asserta(domain(\'$%s\')).' % (settings['domain'],),
-                               '-g', 'mleancop_main(\'%s\',%s,_).' % (problemFile, opts),
-                               '-t', 'halt.'
-                               ],
+        proc = subprocess.run(mleancopArgs(opts),
                               universal_newlines=True,
                               check=True,
                               stdout=subprocess.PIPE,
@@ -47,25 +67,76 @@ def mleancop(opts, comp, time_pc):
     except subprocess.TimeoutExpired:
         return
 
-    theoremOrUnsatisfiable = findInOutput(proc.stdout, ' Theorem', ' Unsatisfiable')
+    status = findStatus(proc.stdout, comp)
+    if status is not None:
+        report(proc.stdout, status)
+
+    # no answer for some reason
+
+# returns exit status for the output of a strategy: 0 – theorem, 1 – non-theorem, None – no answer
+def findStatus(output, comp):
+    theoremOrUnsatisfiable = findInOutput(output, ' Theorem', ' Unsatisfiable')
     if comp:
-        nonTheoremOrSatisfiable = findInOutput(proc.stdout, ' Non-Theorem', ' Satisfiable')
+        nonTheoremOrSatisfiable = findInOutput(output, ' Non-Theorem', ' Satisfiable')
     else:
         nonTheoremOrSatisfiable = None
 
-    if theoremOrUnsatisfiable or nonTheoremOrSatisfiable:
-        if settings['print-proof']:
-            print(proc.stdout)
-        if settings['save-proof']:
-            with open(problemFile + '.proof', 'w') as f:
-                f.write(proc.stdout)
-
-        if theoremOrUnsatisfiable:
-            sys.exit(0)
-        else:
-            sys.exit(1)
-
-    # no answer for some reason
+    if theoremOrUnsatisfiable:
+        return 0
+    if nonTheoremOrSatisfiable:
+        return 1
+    return None
+
+def report(output, status):
+    if settings['print-proof']:
+        print(output)
+    if settings['save-proof']:
+        with open(problemFile + '.proof', 'w') as f:
+            f.write(output)
+    sys.exit(status)
+
+def portfolio(width):
+    # runs up to width strategies at once in the order of the schedule. Each of them gets width times its share of
+    # the timeout, but never more than what is left of the whole timeout. First conclusive answer wins, processes of
+    # the other strategies are killed
+    end = time.perf_counter() + timeout
+    procs = []
+    lock = threading.Lock()
+    stopped = threading.Event()
+
+    def runStrategy(opts, comp, time_pc):
+        with lock:
+            if stopped.is_set():
+                return None
+            proc = subprocess.Popen(mleancopArgs(opts), universal_newlines=True, stdout=subprocess.PIPE)
+            procs.append(proc)
+        partial_timeout = min(timeout / 194 * time_pc * width, end - time.perf_counter())
+        try:
+            output, _ = proc.communicate(timeout=max(partial_timeout, 0))
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            return None
+        if proc.returncode != 0:
+            return None
+        status = findStatus(output, comp)
+        return None if status is None else (output, status)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=width) as executor:
+        futures = [executor.submit(runStrategy, *strategy) for strategy in strategies]
+        answer = None
+        for future in concurrent.futures.as_completed(futures):
+            answer = future.result()
+            if answer is not None:
+                break
+        # stop everything that is still running or waiting
+        with lock:
+            stopped.set()
+            for proc in procs:
+                proc.kill()
+
+    if answer is not None:
+        report(*answer)
 
 def findInOutput(output, *args):
     lines = output.split('\n')
@@ -97,6 +168,8 @@ def readSettings():
             boolGroup.add_argument('--no-' + setting, dest=setting.replace('-', '_'), action='store_false', default=None)
         elif type(settings[setting]) is list:
             overrides.add_argument('--' + setting, nargs='*', metavar='OPTION')
+        elif type(settings[setting]) is int:
+            overrides.add_argument('--' + setting, type=positive_int)
         else:
             overrides.add_argument('--' + setting)
     args = parser.parse_args()
@@ -133,16 +206,11 @@ if __name__ == '__main__':
         print('\tConfig:', settings)
 
     # uses loaded settings, exits when gets some result
-    mleancop("[cut,scut,comp(7)]",      True,  20)
-    mleancop("[def,cut]",               False, 20)
-    mleancop("[nodef]",                 True,  10)
-    mleancop("[reo(23),cut,scut]",      False, 10)
-    mleancop("[reo(31),cut,scut]",      False, 10)
-    mleancop("[reo(47),cut,scut]",      False, 10)
-    mleancop("[reo(25),def,cut,scut]",  False,  5)
-    mleancop("[reo(42),conj,cut,scut]", False,  5)
-    mleancop("[conj,def,cut,scut]",     False,  5)
-    mleancop("[def]",                   True,  99)
+    if settings['portfolio'] > 1:
+        portfolio(settings['portfolio'])
+    else:
+        for strategy in strategies:
+            mleancop(*strategy)
 
     print('Timeout')
     sys.exit(2) # tried everything and everything timed out
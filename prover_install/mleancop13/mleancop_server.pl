@@ -0,0 +1,85 @@
+%% File: mleancop_server.pl
+%%
+%% Purpose: Keeps MleanCoP loaded and runs the whole strategy schedule of
+%%          mleancop.sh (mleancop.py) inside one Prolog session for every
+%%          formula read from the standard input
+%%
+%% Usage:   swipl --no-debug --stack-limit=340m
+%%                -g "assert((print(A):-write(A)))." -g "assert(prolog(swi))."
+%%                -g "['mleancop_main.pl']." -g "asserta(logic(s5))."
+%%                -g "asserta(domain('\$const'))." -g "['mleancop_server.pl']."
+%%                -g serve -t halt.
+%%
+%%          Every request is a term  prove_request(Name,F,T).  where F is
+%%          the formula and T is the time limit in seconds (0 for the
+%%          default of mleancop.py). Reply is what mleancop.py would print
+%%          for the formula, followed by the line  % MLEANCOP END
+%%          SIGINT stops the running schedule (reply is then Cancelled), the
+%%          server then goes on with the next request.
+
+:- use_module(library(time)).
+
+% strategy settings, completeness of the strategy and its share of the
+% time limit (out of 194, as in mleancop.sh)
+
+schedule([ ([cut,scut,comp(7)],      comp, 20),
+           ([def,cut],               incomp, 20),
+           ([nodef],                 comp, 10),
+           ([reo(23),cut,scut],      incomp, 10),
+           ([reo(31),cut,scut],      incomp, 10),
+           ([reo(47),cut,scut],      incomp, 10),
+           ([reo(25),def,cut,scut],  incomp,  5),
+           ([reo(42),conj,cut,scut], incomp,  5),
+           ([conj,def,cut,scut],     incomp,  5),
+           ([def],                   comp, 99) ]).
+
+default_time_limit(200).
+
+serve :-
+    on_signal(int, _, cancel_request),
+    repeat,
+    catch(serve_request(Stop), request_cancelled, Stop=false),
+    Stop == true, !.
+
+% SIGINT coming when no schedule runs (reply was already written) is ignored
+
+serve_request(Stop) :-
+    read_term(user_input, Request, []),
+    ( Request == end_of_file -> Stop=true
+    ; answer(Request), Stop=false ).
+
+cancel_request(_) :- throw(request_cancelled).
+
+answer(prove_request(Name,F,T)) :-
+    ( T =:= 0 -> default_time_limit(Limit) ; Limit=T ),
+    catch(run_schedule(Name,F,Limit,Reply), request_cancelled,
+          Reply='Cancelled\n'),
+    sig_atomic(( write(Reply), write('% MLEANCOP END'), nl,
+                 flush_output )).
+
+run_schedule(Name,F,Limit,Reply) :-
+    schedule(Schedule),
+    ( member((Set,Comp,Pc),Schedule),
+      PartialLimit is Limit/194*Pc,
+      catch(call_with_time_limit(PartialLimit,
+                                 run_strategy(Name,F,Set,Output,Result)),
+            E, ( E == request_cancelled -> throw(E) ; fail )),
+      conclusive(Result,Comp) ->
+      Reply=Output
+    ; Reply='Timeout\n' ).
+
+% non-theorems are trusted only from complete strategies
+
+conclusive('Theorem',_).
+conclusive('Non-Theorem',comp).
+
+% same as mleancop_main/3, with formula given directly instead of a file
+
+run_strategy(Name,F,Set,Output,Result) :-
+    with_output_to(string(Output), prove_formula(Name,F,Set,Result)).
+
+prove_formula(Name,F,Set,Result) :-
+    Conj=mleancop_format,
+    ( F=[_|_] -> Matrix=F ; make_matrix_modal(F,Set,Matrix) ),
+    ( prove2(Matrix,Set,Proof) -> Result='Theorem' ; Result='Non-Theorem' ),
+    output_result(Name,Proof,Result,Conj).
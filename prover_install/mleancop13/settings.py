@@ -26,6 +26,8 @@ settings = {
     'logic': 's5',
     # set domain to constant, cumulative or varying [const|cumul|vary]
     'domain': 'const',
+    # number of strategies run at once, 1 runs them one after another as mleancop.sh does
+    'portfolio': 1,
 }
 
 def validateSettings():
@@ -39,3 +41,5 @@ def validateSettings():
         raise RuntimeError("Invalid logic setting value, expected [d|t|s4|s5|multi], got " + settings['logic'])
     if settings['domain'] not in ['const', 'cumul', 'vary']:
         raise RuntimeError("Invalid domain setting value, expected [const|cumul|vary], got " + settings['domain'])
+    if type(settings['portfolio']) is not int or settings['portfolio'] < 1:
+        raise RuntimeError("Invalid portfolio setting value, expected positive integer, got " + str(settings['portfolio']))
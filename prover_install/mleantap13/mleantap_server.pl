@@ -0,0 +1,46 @@
+%% File: mleantap_server.pl
+%%
+%% Purpose: Keeps MleanTAP loaded and proves formulas read from the
+%%          standard input, so that a new Prolog process does not have
+%%          to be started for every formula
+%%
+%% Usage:   swipl -g "['mleantap13_swi.pl']." -g "asserta(logic(s5))."
+%%                -g "asserta(domain(const))." -g "['mleantap_server.pl']."
+%%                -g serve -t halt.
+%%
+%%          Every request is a term  prove_request(F,T).  where F is the
+%%          formula and T is the time limit in seconds (0 for none).
+%%          Whatever MleanTAP prints is followed by the line
+%%              % MLEANTAP RESULT <Result>
+%%          where Result is theorem, non-theorem, timeout, cancelled or
+%%          error. SIGINT stops the running proof (result cancelled), the
+%%          server then goes on with the next request.
+
+:- use_module(library(time)).
+
+serve :-
+    on_signal(int, _, cancel_request),
+    repeat,
+    catch(serve_request(Stop), request_cancelled, Stop=false),
+    Stop == true, !.
+
+% SIGINT coming when no proof runs (reply was already written) is ignored
+
+serve_request(Stop) :-
+    read_term(user_input, Request, []),
+    ( Request == end_of_file -> Stop=true
+    ; answer(Request), Stop=false ).
+
+cancel_request(_) :- throw(request_cancelled).
+
+answer(prove_request(F,T)) :-
+    ( catch(prove_with_limit(F,T), E, true) ->
+      ( var(E) -> Result=theorem ;
+        E==time_limit_exceeded -> Result=timeout ;
+        E==request_cancelled -> Result=cancelled ; Result=error )
+    ; Result='non-theorem' ),
+    sig_atomic(( nl, write('% MLEANTAP RESULT '), write(Result), nl,
+                 flush_output )).
+
+prove_with_limit(F,0) :- !, prove(F).
+prove_with_limit(F,T) :- call_with_time_limit(T, prove(F)).
@@ -39,7 +39,8 @@ function translateAccessibility(constraints) {
 
 var prover = null;
 var painter = null;
-function startProof(input, constraints, quiet) {
+// onResult(status, proof) is called once the proof is finished, returns the prover (null if input could not be parsed)
+function startProof(input, constraints, quiet, onResult) {
     var parser = new Parser();
     try {
 	var parsedInput = parser.parseInput(input);
@@ -49,7 +50,7 @@ function startProof(input, constraints, quiet) {
     }
     catch (e) {
 	console.error(e);
-	return false;
+	return null;
     }
     // Now a free-variable tableau is created. When the proof is finished,
     // prover.finished() is called.
@@ -70,40 +71,131 @@ function startProof(input, constraints, quiet) {
 	    
 	    const painter = new XmlPainter(sentree);
 	    proof = painter.paintTree();
-	    process.exitCode = 0;
 	}
 	else {
 	    status = "Non-Theorem"
 	    for(let k in this.countermodel) { console.log(k); }
 	    proof = this.counterModel.toXML();
-	    process.exitCode = 1
 	}
-	// output result and proof
-	console.log(`STATUS: ${status}`);
-	console.log('PROOF START');
-	console.log(proof);
-	console.log('PROOF END');
+	onResult(status, proof);
     }
     prover.status = function(txt) {
 	// console.error(`[INFO] Status: ${txt}`);
     }
     prover.start();
-    return false;
+    return prover;
+}
+
+function printResult(status, proof) {
+    process.exitCode = status == "Theorem" ? 0 : 1;
+    // output result and proof
+    console.log(`STATUS: ${status}`);
+    console.log('PROOF START');
+    console.log(proof);
+    console.log('PROOF END');
+}
+
+// Long-running mode: every line of stdin is a request
+//     {"formula": "...", "accessibility": "rmt", "timeout": <seconds, 0 for none>}
+// answered (in order) by a single line
+//     TPG-REPLY {"status": "Theorem" | "Non-Theorem" | "Timeout" | "Cancelled" | "Error", "proof": "..."}
+// SIGINT stops the running proof (status Cancelled), the server then goes on with the next request
+const REPLY_MARKER = 'TPG-REPLY ';
+
+function serve() {
+    const readline = require('readline');
+    const requests = [];
+    let busy = false;
+    // stops the running proof, null when no proof runs
+    let cancel = null;
+
+    function reply(status, proof) {
+	process.stdout.write(REPLY_MARKER + JSON.stringify({ status: status, proof: proof }) + '\n');
+	busy = false;
+	cancel = null;
+	next();
+    }
+
+    function next() {
+	if (busy || requests.length == 0)
+	    return;
+	busy = true;
+	let request;
+	try {
+	    request = JSON.parse(requests.shift());
+	}
+	catch (e) {
+	    console.error(e);
+	    return reply("Error", null);
+	}
+	let done = false;
+	let timer = null;
+	const finish = function(status, proof) {
+	    if (done)
+		return;
+	    done = true;
+	    if (timer)
+		clearTimeout(timer);
+	    reply(status, proof);
+	};
+	let proofProver;
+	try {
+	    proofProver = startProof(request.formula, (request.accessibility || "").split(""), true, finish);
+	}
+	catch (e) {
+	    console.error(e);
+	    proofProver = null;
+	}
+	if (proofProver == null)
+	    return finish("Error", null);
+	if (!done) {
+	    cancel = function() {
+		proofProver.stop();
+		finish("Cancelled", null);
+	    };
+	}
+	if (request.timeout && !done) {
+	    timer = setTimeout(function() {
+		proofProver.stop();
+		finish("Timeout", null);
+	    }, request.timeout * 1000);
+	}
+    }
+
+    process.on('SIGINT', function() {
+	if (cancel)
+	    cancel();
+    });
+
+    const input = readline.createInterface({ input: process.stdin, terminal: false });
+    input.on('line', function(line) {
+	if (line.trim()) {
+	    requests.push(line);
+	    next();
+	}
+    });
+    input.on('close', function() {
+	// finish the queued requests, process exits when nothing is left to do
+	process.exitCode = 0;
+    });
 }
 
 process.exitCode = 10;
 try {
-    if (process.argv.length >= 5) {
-	startProof(process.argv[3], process.argv[4].split(""), process.argv[2] == "-q"); // -q formula accesibility
+    if (process.argv.length == 3 && process.argv[2] == "--serve") {
+	serve();
+    }
+    else if (process.argv.length >= 5) {
+	startProof(process.argv[3], process.argv[4].split(""), process.argv[2] == "-q", printResult); // -q formula accesibility
     }
     else if (process.argv.length == 4 && process.argv[2] != "-q") { // formula accessibility
-	startProof(process.argv[2], process.argv[3].split(""), false)
+	startProof(process.argv[2], process.argv[3].split(""), false, printResult)
     }
     else if (process.argv.length == 4) { // -q formula
-	startProof(process.argv[3], [], process.argv[2])
+	startProof(process.argv[3], [], process.argv[2], printResult)
     }
     else if (process.argv.length == 3) { // formula
-	startProof(process.argv[2], [], false)
+	startProof(process.argv[2], [], false, printResult)
     }
     else {
 	console.error("Please provide formula")
@@ -6,11 +6,87 @@ settings = {
     'java_path': '/usr/bin/java',
     'swipl_path': '/usr/bin/swipl',
     'node_path': '/usr/bin/node',
+    # where formulas come from: 'pickle' – formula_pickle_path read by the master, formulas are sent to the groups,
+    # 'uids' – formula_uid_path with one syllogism UID per line, 'binary' – formula_binary_path written by
+    # generate.py -b and memory-mapped by every rank, 'syllogisms' – syllogisms selected by syllogism_slice
+    # (start, stop, step) from all of them. Except for 'pickle' only indices are sent and ranks build formulas locally
+    'formula_source': 'pickle',
     'formula_pickle_path': 'formulas.pickle',
+    'formula_uid_path': 'formulas.uids',
+    'formula_binary_path': 'formulas.corpus',
+    'syllogism_slice': (None, None, None),
     'output_file_path': 'results.csv',
+    # order of rows in the output: None – as results come (differs from run to run), 'index' – order of the formulas
+    # in the corpus, the same for every scheduler and backend (rows are sorted when the run ends). Per prover columns
+    # still differ when early cancellation stops some provers (mpi-prover.py only, local-prover.py never cancels)
+    'output_order': None,
+    # prove structurally equal formulas (e.g. different syllogisms sharing a template) once, every one of them
+    # still gets its row in the output. 'auto' – only for the 'pickle' source, finding duplicates makes the master
+    # build every formula of the other sources (which it otherwise never does)
+    'deduplicate': 'auto',
+    # SQLite file with results of previous runs reused by all provers, None disables the cache
+    'cache_path': 'results.cache.sqlite',
+    # SQLite journal mode of the cache. 'WAL' does not block readers while ranks write and commits do not wait for the
+    # disk, but it needs shared memory of all the processes using the file, so only for a cache on a node-local disk
+    # (not on NFS, Lustre or other network file system, which is safe only with the default 'DELETE')
+    'cache_journal_mode': 'DELETE',
+    # directory where work groups record finished results, run with --resume to continue an interrupted run.
+    # None disables the journal
+    'journal_dir': 'results.journal',
+    # JSON lines file with a record of every prove call (timings of its phases, verdict, ...) from all ranks,
+    # see trace-summary.py. None disables tracing
+    'trace_path': None,
     'logic': 's5',
     'domain': 'const',
     'timeout': 10,
+    # per prover timeout learned from conclusive results in the result cache: the given quantile of their times
+    # (at least 1 s, at most timeout). Provers with fewer than adaptiveTimeoutMinSamples cached conclusive results
+    # (all provers when None or without the cache) use timeout scaled by a static modifier
+    'adaptiveTimeout': 0.99,
+    'adaptiveTimeoutMinSamples': 50,
     'theoremThreshold': 2,
     'nonTheoremThreshold': 2,
+    # 'static' – formulas are split into one fixed chunk per work group (works with any MPI thread support level)
+    # 'dynamic' – work groups pull batches of formulas from the master on demand (needs MPI_THREAD_MULTIPLE, as 'pools')
+    # 'pools' – every prover has its own pool of ranks (see proverRanks) pulling batches of the prover's queue,
+    # master joins results per formula (no early cancellation)
+    'scheduler': 'dynamic',
+    # ranks of every prover (in the order of proverBuilders) with 'pools' scheduler, None – proportional to the mean
+    # time of the prover in the result cache (the same number for all provers when some of them have no history)
+    'proverRanks': None,
+    # number of processes local-prover.py runs the provers in (split among provers like ranks of the 'pools'
+    # scheduler), None – number of CPUs (or the sum of proverRanks when given)
+    'localProcesses': None,
+    # order in which formulas are proved: None – as they come, 'cost' – longest expected first according to
+    # cached times and size and modal depth of the formulas (static scheduler also balances chunks by expected cost),
+    # 'auto' – 'cost' for the 'pickle' source, None for the others (costs would make the master build every formula)
+    'ordering': 'auto',
+    # number of formulas a work group proves before consolidating them (and getting more from the master when
+    # scheduling dynamically)
+    'batchSize': 8,
+    # number of formulas of the batch every rank (or local process) proves at once in its threads, persistent provers
+    # start a worker process for each of them
+    'proverConcurrency': 1,
+    # stand-ins of the provers for benchmarks of the orchestration (see benchmark.py): dictionary prover name ->
+    # parameters of prover.SimulatedProver (e.g. {'latency': 'exponential', 'mean': 0.05, 'timeoutRate': 0.01}),
+    # provers with no parameters answer at once (prover.NoProver). None – real provers
+    'simulatedProvers': None,
+    # stopping provers once consolidated result of the formula is decided:
+    # None – all provers always run till the end (when proofs of all provers are needed)
+    # 'strict' – only when no result of the remaining provers can change the consolidated result
+    # 'threshold' – as soon as threshold is reached (contradictions which might still come are ignored) or when
+    # 'strict' would stop them
+    'earlyCancellation': 'strict',
+    # keep one LEO-III JVM per rank instead of starting java for every formula (needs JDK 12 to 23,
+    # see prover_install/leo3/Leo3Worker.java)
+    'leo3_persistent': False,
+    # keep one swipl with MleanTAP loaded per rank (see prover_install/mleantap13/mleantap_server.pl)
+    'mleantap_persistent': True,
+    # keep one swipl with MleanCoP loaded per rank, running the whole strategy schedule of mleancop.py in it
+    # (see prover_install/mleancop13/mleancop_server.pl)
+    'mleancop_persistent': True,
+    # number of MleanCoP strategies run at once by mleancop.py when not persistent, 1 runs them one after another
+    'mleancop_portfolio': 1,
+    # keep one node process running the TPG prover per rank (index.js --serve)
+    'tpg_persistent': True,
 }
@@ -0,0 +1,36 @@
+from orchestrator.Consolidation import consolidateVerdicts, isDecided
+from settings import settings
+
+allResults = (True, False, None)
+theoremOnly = (True, None)
+
+def test_consolidate_verdicts(monkeypatch):
+    monkeypatch.setitem(settings, 'theoremThreshold', 2)
+    monkeypatch.setitem(settings, 'nonTheoremThreshold', 2)
+    assert consolidateVerdicts([True, True, None, None]) == 'Theorem'
+    assert consolidateVerdicts([False, None, False, None]) == 'Non-Theorem'
+    assert consolidateVerdicts([True, None, None, None]) == 'Unknown'
+    assert consolidateVerdicts([True, True, False, None]) == 'Contradiction'
+
+def test_strict_waits_for_provers_which_could_contradict(monkeypatch):
+    monkeypatch.setitem(settings, 'theoremThreshold', 2)
+    monkeypatch.setitem(settings, 'nonTheoremThreshold', 2)
+    monkeypatch.setitem(settings, 'earlyCancellation', 'strict')
+    possible = [allResults, allResults, theoremOnly, allResults]
+    # remaining provers could still make it a contradiction
+    assert not isDecided({0: True, 2: True}, possible)
+    # nothing the remaining prover says changes the result (contradiction counts as unknown)
+    assert isDecided({0: True, 1: False, 2: None}, possible)
+    assert not isDecided({0: None}, possible)
+    assert isDecided({0: None, 1: None, 2: None}, possible)
+
+def test_threshold_decides_once_reached(monkeypatch):
+    monkeypatch.setitem(settings, 'theoremThreshold', 2)
+    monkeypatch.setitem(settings, 'nonTheoremThreshold', 2)
+    monkeypatch.setitem(settings, 'earlyCancellation', 'threshold')
+    possible = [allResults, allResults, theoremOnly, allResults]
+    assert isDecided({0: True, 2: True}, possible)
+    assert isDecided({0: False, 3: False}, possible)
+    assert not isDecided({0: True, 3: None}, possible)
+    # contradiction stays one whatever comes
+    assert isDecided({0: True, 3: False}, possible)
@@ -0,0 +1,42 @@
+import pickle
+
+from generator.generate import formulaAt, uidAt
+from orchestrator.Corpus import PickleCorpus, SyllogismCorpus, UIDCorpus
+
+syllogisms = range(100, 400, 7)
+
+def corpora(tmp_path) -> list:
+    picklePath = tmp_path / 'formulas.pickle'
+    with open(picklePath, 'wb') as f:
+        pickle.dump([formulaAt(k) for k in syllogisms], f)
+    pickleCorpus = PickleCorpus(str(picklePath))
+    pickleCorpus.load()
+    uidPath = tmp_path / 'formulas.uids'
+    uidPath.write_text(''.join(uidAt(k) + '\n' for k in syllogisms), encoding='utf-8')
+    return [pickleCorpus, SyllogismCorpus(syllogisms), UIDCorpus(str(uidPath))]
+
+def test_sources_give_the_same_formulas(tmp_path):
+    for corpus in corpora(tmp_path):
+        assert len(corpus) == len(syllogisms)
+        for i, k in enumerate(syllogisms):
+            assert corpus.uid(i) == uidAt(k)
+            assert corpus.formula(i) == formulaAt(k)
+            assert corpus.formula(i).constructionInfo == formulaAt(k).constructionInfo
+
+def test_batches_unpack_to_indexed_formulas(tmp_path):
+    for corpus in corpora(tmp_path):
+        batch = corpus.pack(range(3, 8))
+        assert [(i, f.uid) for i, f in corpus.unpack(batch)] == [(i, uidAt(syllogisms[i])) for i in range(3, 8)]
+
+def test_duplicates():
+    corpus = SyllogismCorpus(range(0, 2000))
+    duplicates = corpus.duplicates()
+    assert duplicates
+    grouped = set()
+    for first, others in duplicates.items():
+        assert others and all(first < i for i in others)
+        assert all(corpus.formula(i) == corpus.formula(first) for i in others)
+        grouped.update(others)
+    # every formula not in a group is the first one of its structure
+    firsts = [i for i in range(len(corpus)) if i not in grouped]
+    assert len(set(corpus.formula(i) for i in firsts)) == len(firsts)
@@ -0,0 +1,58 @@
+import pytest
+
+from generator.CorpusFile import CorpusFile, CorpusFileError, writeCorpusFile
+from generator.generate import formulaAt
+from orchestrator.Corpus import BinaryCorpus
+
+def write(path, fs, stringFormats=()) -> str:
+    with open(path, 'wb') as f:
+        writeCorpusFile(f, fs, stringFormats)
+    return str(path)
+
+def test_round_trip(tmp_path):
+    fs = [formulaAt(k) for k in range(0, 5000, 13)]
+    corpus = CorpusFile(write(tmp_path / 'formulas.corpus', iter(fs), ['unicode', 'prolog']))
+    assert len(corpus) == len(fs)
+    for i, f in enumerate(fs):
+        assert corpus.uid(i) == f.uid
+        assert corpus.text(i, 'prolog') == f.toPrologTerm()
+        assert corpus.text(i, 'unicode') == f.toUnicodeString()
+        assert corpus.text(i, 'thf') is None
+        g = corpus.formula(i)
+        assert g == f and g.uid == f.uid and g.constructionInfo == f.constructionInfo
+    corpus.close()
+
+def test_without_string_tables(tmp_path):
+    fs = [formulaAt(k) for k in range(10)]
+    corpus = CorpusFile(write(tmp_path / 'formulas.corpus', fs))
+    assert [corpus.formula(i) for i in range(len(corpus))] == fs
+    assert corpus.text(0, 'prolog') is None
+    corpus.close()
+
+def test_empty(tmp_path):
+    corpus = CorpusFile(write(tmp_path / 'formulas.corpus', [], ['thf']))
+    assert len(corpus) == 0
+    corpus.close()
+
+def test_index_out_of_range(tmp_path):
+    corpus = CorpusFile(write(tmp_path / 'formulas.corpus', [formulaAt(0)], ['thf']))
+    for index in [-1, 1]:
+        with pytest.raises(IndexError):
+            corpus.uid(index)
+        with pytest.raises(IndexError):
+            corpus.text(index, 'thf')
+    corpus.close()
+
+def test_errors(tmp_path):
+    with pytest.raises(CorpusFileError):
+        write(tmp_path / 'formulas.corpus', [formulaAt(0)], ['latex'])
+    path = tmp_path / 'other'
+    path.write_bytes(b'not a corpus file of formulas')
+    with pytest.raises(CorpusFileError):
+        CorpusFile(str(path))
+
+def test_binary_corpus(tmp_path):
+    fs = [formulaAt(k) for k in range(50)]
+    corpus = BinaryCorpus(write(tmp_path / 'formulas.corpus', fs, ['thf']))
+    assert [corpus.uid(i) for i in range(len(corpus))] == [f.uid for f in fs]
+    assert [corpus.formula(i) for i in corpus.pack(range(len(corpus)))] == fs
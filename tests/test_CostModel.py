@@ -0,0 +1,39 @@
+from generator.generate import formulaAt
+from orchestrator.Corpus import SyllogismCorpus
+from orchestrator.CostModel import CostModel
+from prover.ResultCache import ResultCache
+
+def test_order_and_partition():
+    costs = {0: 1, 1: 5, 2: 3, 3: 4, 4: 2}
+    assert CostModel.order(range(5), costs) == [1, 3, 2, 4, 0]
+    parts = CostModel.partition(range(5), costs, 2)
+    assert sorted(i for part in parts for i in part) == list(range(5))
+    assert sorted(sum(costs[i] for i in part) for part in parts) == [7, 8]
+    # longest first within every part
+    assert all(part == CostModel.order(part, costs) for part in parts)
+
+def test_costs_without_history():
+    corpus = SyllogismCorpus(range(100))
+    costs = CostModel(None, {'TPG': ('s5', 'const', 10)}).costs(corpus, range(100))
+    assert costs == {i: CostModel.heuristic(formulaAt(i).metrics()) for i in range(100)}
+
+def test_costs_from_history(tmp_path):
+    cache = ResultCache(str(tmp_path / 'results.cache.sqlite'))
+    for k in range(10):
+        cache.add(formulaAt(k), 'TPG', 's5', 'const', 10, True, None, k)
+        cache.add(formulaAt(k), 'LEO-III', 's5', 'const', 10, True, None, 2)
+    # no time of LEO-III
+    cache.add(formulaAt(10), 'TPG', 's5', 'const', 10, True, None, 1)
+    cache.flush()
+    costModel = CostModel(cache, {'TPG': ('s5', 'const', 5), 'LEO-III': ('s5', 'const', 10)})
+    costs = costModel.costs(SyllogismCorpus(range(20)), range(20))
+    cache.close()
+    # slowest prover, limited by its current timeout
+    assert [costs[k] for k in range(10)] == [2, 2, 2, 3, 4, 5, 5, 5, 5, 5]
+    assert sorted(costModel.known) == list(range(10))
+    # unknown formulas cost the mean of known ones with the same features or the heuristic scaled to seconds
+    scale = sum(costs[i] for i in range(10)) / sum(CostModel.heuristic(formulaAt(i).metrics()) for i in range(10))
+    for k in range(10, 20):
+        features = formulaAt(k).metrics()
+        same = [costs[i] for i in range(10) if formulaAt(i).metrics() == features]
+        assert costs[k] == (sum(same) / len(same) if same else CostModel.heuristic(features) * scale)
@@ -0,0 +1,80 @@
+import copyreg
+import io
+import pickle
+
+import pytest
+
+from generator.Formula import Formula, pred, impl, conj, necs, neg
+from generator.generate import formulaAt
+
+def test_structurally_equal_nodes_are_interned():
+    assert impl(pred('a'), necs(pred('b'))) is impl(pred('a'), necs(pred('b')))
+    assert impl(pred('a'), pred('b')) is not impl(pred('b'), pred('a'))
+    f = conj(pred('a'), pred('b'))
+    assert hash(f) == hash(conj(pred('a'), pred('b')))
+
+def test_formula_is_immutable():
+    f = pred('a')
+    with pytest.raises(AttributeError):
+        f._name = 'b'
+    with pytest.raises(AttributeError):
+        f.uid = 'uid'
+
+def test_annotated_copy():
+    f = impl(pred('a'), pred('b'))
+    annotated = f.annotate(uid='uid', constructionInfo={'figure': 1})
+    assert annotated is not f and annotated == f and hash(annotated) == hash(f)
+    assert annotated.uid == 'uid' and f.uid is None
+    assert annotated.canonical() is f
+    # children of nodes built from annotated ones are interned
+    assert neg(annotated).canonical()._rhs is f
+
+def test_rename_shares_unchanged_subtrees():
+    f = conj(necs(pred('a')), pred('b'))
+    renamed = f.renamePreds('b', 'c')
+    assert renamed is conj(necs(pred('a')), pred('c'))
+    assert renamed._lhs is f._lhs
+    assert f.renamePreds('x', 'y') is f
+
+def test_rendering():
+    f = impl(necs(pred('a')), neg(pred('b')))
+    assert f.toUnicodeString() == '(□Ax→¬Bx)'
+    assert f.toPrologTerm() == '((# a(X)) => (~ b(X)))'
+    assert f.toTHF() == '( ( $box @ (a @ X) ) => (~ (b @ X)) )'
+    assert f.metrics() == (5, 1)
+    # text of every node is kept, also in the shared subtrees
+    assert f._lhs._rendered['unicode'] == '□Ax'
+
+def test_cached_rendering():
+    # text is kept by the interned node, so a formula no other test uses
+    f = necs(pred('cached'))
+    f.cacheRendering('thf', 'pre-rendered')
+    assert f.toTHF() == 'pre-rendered'
+    assert f.annotate(uid='uid').toTHF() == 'pre-rendered'
+
+def test_pickle_round_trip():
+    f = formulaAt(123)
+    g = pickle.loads(pickle.dumps(f))
+    assert g == f and g.canonical() is f.canonical()
+    assert g.uid == f.uid and g.constructionInfo == f.constructionInfo
+    assert pickle.loads(pickle.dumps(f.canonical())) is f.canonical()
+
+class OldPickler(pickle.Pickler):
+    # pickles formulas as instances of the Formula class before nodes were interned: plain objects with __dict__
+    def reducer_override(self, obj):
+        if not isinstance(obj, Formula):
+            return NotImplemented
+        state = {'_kind': obj._kind, '_lhs': obj._lhs, '_rhs': obj._rhs, '_name': obj._name}
+        state.update((attribute, getattr(obj, attribute)) for attribute in Formula._annotations)
+        return copyreg.__newobj__, (Formula,), state
+
+def test_old_pickle():
+    fs = [formulaAt(k) for k in range(0, 1000, 97)]
+    stream = io.BytesIO()
+    OldPickler(stream, protocol=2).dump(fs)
+    old = pickle.loads(stream.getvalue())
+    assert old == fs
+    for f, g in zip(fs, old):
+        assert g.canonical() is f.canonical()
+        assert g.uid == f.uid and g.constructionInfo == f.constructionInfo
+        assert g.toPrologTerm() == f.toPrologTerm()
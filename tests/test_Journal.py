@@ -0,0 +1,54 @@
+from orchestrator.Journal import Journal
+
+def test_records_of_all_writers(tmp_path):
+    directory = str(tmp_path)
+    for name, records in [('a', [(0, '1AaAaAa', ('Theorem', 'Theorem', 'proof'))]),
+                          ('b', [(1, '1AaAaAe', ('Unknown', 'Unknown', None)), (2, '1AaAaAi', ('Non-Theorem',))])]:
+        journal = Journal(directory, name)
+        journal.append(records)
+        journal.close()
+    assert sorted(Journal.records(directory)) == [(0, '1AaAaAa', ('Theorem', 'Theorem', 'proof')),
+                                                  (1, '1AaAaAe', ('Unknown', 'Unknown', None)),
+                                                  (2, '1AaAaAi', ('Non-Theorem',))]
+
+def test_append_continues_the_file(tmp_path):
+    directory = str(tmp_path)
+    for index in range(2):
+        journal = Journal(directory, 'a')
+        journal.append([(index, 'uid', ('Theorem',))])
+        journal.close()
+    assert [index for index, _, _ in Journal.records(directory)] == [0, 1]
+
+def test_torn_line_is_skipped_and_dropped_on_resume(tmp_path):
+    directory = str(tmp_path)
+    journal = Journal(directory, 'a')
+    journal.append([(0, 'uid', ('Theorem',))])
+    journal.close()
+    # run killed while writing the second record
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"index": 1, "uid": "u')
+    assert [index for index, _, _ in Journal.records(directory)] == [0]
+
+    journal = Journal(directory, 'a')
+    journal.append([(2, 'uid', ('Unknown',))])
+    journal.close()
+    assert [index for index, _, _ in Journal.records(directory)] == [0, 2]
+    with open(journal.path, encoding='utf-8') as f:
+        assert len(f.read().splitlines()) == 2
+
+def test_file_with_only_a_torn_line(tmp_path):
+    directory = str(tmp_path)
+    journal = Journal(directory, 'a')
+    with open(journal.path, 'w', encoding='utf-8') as f:
+        f.write('{"ind')
+    journal.append([(0, 'uid', ('Theorem',))])
+    journal.close()
+    assert list(Journal.records(directory)) == [(0, 'uid', ('Theorem',))]
+
+def test_clear(tmp_path):
+    directory = str(tmp_path)
+    journal = Journal(directory, 'a')
+    journal.append([(0, 'uid', ('Theorem',))])
+    journal.close()
+    Journal.clear(directory)
+    assert list(Journal.records(directory)) == []
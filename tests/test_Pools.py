@@ -0,0 +1,27 @@
+import pytest
+
+from orchestrator.Pools import allocateRanks, assignRanks, ResultJoiner
+
+def test_ranks_are_proportional_to_weights():
+    assert allocateRanks(10, [1, 1, 3, 5]) == [1, 1, 3, 5]
+    assert allocateRanks(8, [1, 1, 1, 1]) == [2, 2, 2, 2]
+    assert allocateRanks(8, [0, 0, 0, 0]) == [2, 2, 2, 2]
+    for size in range(4, 40):
+        counts = allocateRanks(size, [0.1, 2, 7, 30])
+        assert sum(counts) == size and min(counts) >= 1
+        assert counts == sorted(counts)
+
+def test_every_prover_gets_a_rank():
+    assert allocateRanks(4, [100, 1, 1, 1]) == [1, 1, 1, 1]
+    with pytest.raises(AssertionError):
+        allocateRanks(3, [1, 1, 1, 1])
+
+def test_assign_ranks():
+    assert assignRanks([1, 3, 2]) == [0, 1, 1, 1, 2, 2]
+
+def test_joiner():
+    joiner = ResultJoiner(2)
+    assert joiner.add([(0, 1, 'b0'), (1, 0, 'a1')]) == []
+    assert joiner.add([(0, 0, 'a0')]) == [(0, ['a0', 'b0'])]
+    assert joiner.add([(1, 1, 'b1'), (2, 0, 'a2'), (2, 1, 'b2')]) == [(1, ['a1', 'b1']), (2, ['a2', 'b2'])]
+    assert joiner.partial == {}
@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from prover.Processes import GroupPopen
+from prover.Prover import NoProver, ProofCancelled
+
+def alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # zombie of a process reaped by init later
+    with open('/proc/%d/stat' % (pid,)) as f:
+        return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+
+def test_output_and_usage():
+    prover = NoProver(0)
+    burn = 'import sys, time\nend = time.process_time() + 0.2\nwhile time.process_time() < end: pass\n'\
+           'print("out"); print("err", file=sys.stderr); sys.exit(3)'
+    result = prover.runProcess([sys.executable, '-c', burn], universal_newlines=True, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+    assert (result.returncode, result.stdout, result.stderr) == (3, 'out\n', 'err\n')
+    assert prover.stats['timeCPU'] >= 0.15
+    assert prover.stats['peakRSS'] > 0
+    with pytest.raises(subprocess.CalledProcessError):
+        prover.runProcess([sys.executable, '-c', 'exit(1)'], check=True)
+
+def test_large_output():
+    prover = NoProver(0)
+    result = prover.runProcess([sys.executable, '-c', 'print("x" * 1000000)'], stdout=subprocess.PIPE)
+    assert result.stdout == b'x' * 1000000 + b'\n'
+
+def test_timeout_kills_the_process_group(tmp_path):
+    pidFile = tmp_path / 'pid'
+    # child started by the prover process outlives it unless the group is killed
+    script = 'import subprocess, sys, time\n'\
+             'child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])\n'\
+             'open(%r, "w").write(str(child.pid))\n'\
+             'time.sleep(60)' % (str(pidFile),)
+    prover = NoProver(0)
+    start = time.perf_counter()
+    with pytest.raises(subprocess.TimeoutExpired):
+        prover.runProcess([sys.executable, '-c', script], timeout=1)
+    assert time.perf_counter() - start < 10
+    child = int(pidFile.read_text())
+    for _ in range(100):
+        if not alive(child):
+            break
+        time.sleep(0.05)
+    assert not alive(child)
+
+def test_cancellation():
+    prover = NoProver(0)
+    cancelAt = time.perf_counter() + 0.3
+    prover.cancelCheck = lambda: time.perf_counter() > cancelAt
+    with pytest.raises(ProofCancelled):
+        prover.runProcess([sys.executable, '-c', 'import time; time.sleep(60)'])
+    assert time.perf_counter() - cancelAt < 5
+
+def test_reap():
+    with GroupPopen([sys.executable, '-c', 'import time; time.sleep(0.2)']) as proc:
+        assert proc.reap(block=False) is None
+        assert proc.reap() == 0
+        cpu, peakRSS = proc.usage()
+        assert cpu >= 0 and peakRSS > 0
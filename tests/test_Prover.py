@@ -0,0 +1,66 @@
+import os
+import threading
+
+from generator.generate import formulaAt
+from prover.Prover import NoProver
+from prover.SimulatedProver import SimulatedProver
+
+fs = [formulaAt(k) for k in range(40)]
+
+def test_prove_many_keeps_the_order():
+    prover = SimulatedProver(0, 'TPG', latency='uniform', mean=0.005)
+    sequential = [r[1] for r in prover.proveMany(fs, 10)]
+    concurrent = prover.proveMany(fs, 10, concurrency=8)
+    assert [r[0] for r in concurrent] == fs
+    assert [r[1] for r in concurrent] == sequential
+    assert prover.stats['processed'] == 2 * len(fs)
+    prover.close()
+
+def test_prove_many_runs_formulas_at_once():
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    class Waiting(NoProver):
+        def proveFormula(self, formula, timeout=None):
+            with lock:
+                running.append(formula)
+                peak.append(len(running))
+            threading.Event().wait(0.02)
+            with lock:
+                running.remove(formula)
+            return formula, None, None
+
+    prover = Waiting(0)
+    prover.proveMany(fs, concurrency=4)
+    assert max(peak) == 4
+    prover.close()
+
+def test_cancelled_and_done():
+    prover = SimulatedProver(0, 'TPG', latency='constant', mean=0)
+    done = {}
+    results = prover.proveMany(fs, 10, concurrency=4, cancelled=lambda position: position % 2 == 1,
+                               done=lambda position, result: done.setdefault(position, result))
+    assert done == dict(enumerate(results))
+    assert all(results[position][1] is None for position in range(1, len(fs), 2))
+    assert prover.stats['skipped'] == len(fs) // 2
+    prover.close()
+
+def test_one_problem_file_per_thread():
+    files = []
+
+    class Writing(NoProver):
+        def proveFormula(self, formula, timeout=None):
+            problemFile = self.writeProblemFile(formula.toTHF())
+            with open(problemFile, encoding='utf-8') as f:
+                assert f.read() == formula.toTHF()
+            files.append(problemFile)
+            return formula, None, None
+
+    prover = Writing(0)
+    prover.proveMany(fs, concurrency=4)
+    assert 1 <= len(set(files)) <= 4
+    assert prover.stats['problemFiles'] == len(fs)
+    assert all(os.path.exists(problemFile) for problemFile in files)
+    prover.close()
+    assert not any(os.path.exists(problemFile) for problemFile in files)
@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from generator.generate import formulaAt
+from prover.Prover import Prover
+from prover.ResultCache import ResultCache
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResultCache(str(tmp_path / 'results.cache.sqlite'))
+    yield cache
+    cache.close()
+
+def test_entries_are_visible_after_flush(cache):
+    f = formulaAt(0)
+    cache.add(f, 'TPG', 's5', 'const', 10, True, 'proof', 1.5)
+    assert cache.lookup(f, 'TPG', 's5', 'const', 10) is None
+    cache.flush()
+    assert cache.lookup(f, 'TPG', 's5', 'const', 10) == (True, 'proof')
+    # key includes prover, logic and domain
+    assert cache.lookup(f, 'LEO-III', 's5', 'const', 10) is None
+    assert cache.lookup(f, 'TPG', 'd', 'const', 10) is None
+    assert cache.lookup(formulaAt(1), 'TPG', 's5', 'const', 10) is None
+
+def test_conclusive_result_is_reused_within_timeout(cache):
+    f = formulaAt(0)
+    cache.add(f, 'TPG', 's5', 'const', 10, False, None, 4)
+    cache.flush()
+    assert cache.lookup(f, 'TPG', 's5', 'const', 5) == (False, None)
+    assert cache.lookup(f, 'TPG', 's5', 'const', 3) is None
+    assert cache.lookup(f, 'TPG', 's5', 'const', None) == (False, None)
+
+def test_unknown_result_is_reused_only_with_lower_timeout(cache):
+    f = formulaAt(0)
+    cache.add(f, 'TPG', 's5', 'const', 10, None, None, 10)
+    cache.flush()
+    assert cache.lookup(f, 'TPG', 's5', 'const', 10) == (None, None)
+    assert cache.lookup(f, 'TPG', 's5', 'const', 5) == (None, None)
+    assert cache.lookup(f, 'TPG', 's5', 'const', 20) is None
+    assert cache.lookup(f, 'TPG', 's5', 'const', None) is None
+
+def test_close_flushes(tmp_path):
+    path = str(tmp_path / 'results.cache.sqlite')
+    cache = ResultCache(path)
+    cache.add(formulaAt(0), 'TPG', 's5', 'const', 10, True, None, 1)
+    cache.close()
+    cache = ResultCache(path)
+    assert cache.lookup(formulaAt(0), 'TPG', 's5', 'const', 10) == (True, None)
+    cache.close()
+
+def test_journal_mode(tmp_path):
+    for mode in ['DELETE', 'WAL']:
+        cache = ResultCache(str(tmp_path / mode), mode)
+        assert cache.db.execute('PRAGMA journal_mode').fetchone()[0] == mode.lower()
+        cache.close()
+
+def test_proof_times(cache):
+    for k in range(3):
+        cache.add(formulaAt(k), 'TPG', 's5', 'const', 10, True, None, k + 1)
+    # shorter time of the same formula, unknown result and run with lower timeout do not count
+    cache.add(formulaAt(0), 'TPG', 's5', 'const', 20, True, None, 0.5)
+    cache.add(formulaAt(3), 'TPG', 's5', 'const', 10, None, None, 10)
+    cache.add(formulaAt(4), 'TPG', 's5', 'const', 5, False, None, 4)
+    cache.add(formulaAt(5), 'MleanTAP', 's5', 'const', 10, True, None, 1)
+    cache.flush()
+    assert sorted(cache.proofTimes('TPG', 's5', 'const', 10)) == [0.5, 2, 3]
+    assert sorted(cache.proofTimes('TPG', 's5', 'const')) == [0.5, 2, 3, 4]
+    assert cache.proofTimes('TPG', 's5', 'const', float('inf')) == []
+
+class FailingProver(Prover):
+    def __init__(self):
+        super().__init__(0, 'Failing')
+        self.logic = 's5'
+        self.domain = 'const'
+
+    # fails on even timeouts, times out on odd ones
+    def proveFormula(self, formula, timeout=None):
+        if timeout % 2 == 0:
+            self.markFailed()
+        return formula, None, None
+
+def test_failed_proofs_are_not_cached(cache):
+    prover = FailingProver()
+    prover.cache = cache
+    prover.proveMany([formulaAt(0), formulaAt(1)], 2)
+    assert prover.stats['failed'] == 2
+    assert cache.lookup(formulaAt(0), 'Failing', 's5', 'const', 2) is None
+    prover.proveMany([formulaAt(0)], 3)
+    assert prover.stats['failed'] == 2
+    assert cache.lookup(formulaAt(0), 'Failing', 's5', 'const', 3) == (None, None)
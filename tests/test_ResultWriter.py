@@ -0,0 +1,56 @@
+import csv
+import os
+
+from generator.generate import formulaAt
+from orchestrator.ResultWriter import ResultWriter
+
+def result(index: int) -> tuple:
+    return (formulaAt(index), 'Theorem', 'Theorem', 'proof %d' % (index,), 'Unknown', None)
+
+def rows(path: str) -> list:
+    with open(path, newline='') as f:
+        return list(csv.reader(f))
+
+def test_rows_are_streamed(tmp_path):
+    path = str(tmp_path / 'results.csv')
+    writer = ResultWriter(path)
+    writer.write([(3, result(3)), (1, result(1))])
+    # written before close
+    assert len(rows(path)) == 3
+    writer.write([(2, result(2))])
+    writer.close()
+    written = rows(path)
+    assert tuple(written[0]) == ResultWriter.header
+    assert [row[-3] for row in written[1:]] == ['proof 3', 'proof 1', 'proof 2']
+    assert writer.count == 3
+
+def test_row_starts_with_syllogism_information(tmp_path):
+    path = str(tmp_path / 'results.csv')
+    writer = ResultWriter(path)
+    writer.write([(0, result(0))])
+    writer.close()
+    info = formulaAt(0).constructionInfo
+    assert rows(path)[1][:9] == [str(info['figure']), info['major'], info['majorModal'], info['minor'],
+                                 info['minorModal'], info['conclusion'], info['conclusionModal'],
+                                 str(formulaAt(0)), 'Theorem']
+
+def test_ordered_rows(tmp_path):
+    path = str(tmp_path / 'results.csv')
+    writer = ResultWriter(path, ordered=True)
+    writer.write([(3, result(3)), (0, result(0))])
+    writer.write([(2, result(2)), (1, result(1))])
+    assert os.path.exists(path + '.unordered')
+    writer.close()
+    assert [row[-3] for row in rows(path)[1:]] == ['proof 0', 'proof 1', 'proof 2', 'proof 3']
+    assert not os.path.exists(path + '.unordered')
+
+def test_ordered_rows_are_the_same_as_streamed_ones(tmp_path):
+    order = [5, 2, 7, 0, 1, 6, 3, 4]
+    streamed = ResultWriter(str(tmp_path / 'streamed.csv'))
+    streamed.write([(i, result(i)) for i in sorted(order)])
+    streamed.close()
+    ordered = ResultWriter(str(tmp_path / 'ordered.csv'), ordered=True)
+    for i in order:
+        ordered.write([(i, result(i))])
+    ordered.close()
+    assert rows(str(tmp_path / 'ordered.csv')) == rows(str(tmp_path / 'streamed.csv'))
@@ -0,0 +1,35 @@
+import pytest
+
+from generator.generate import formulaAt
+from prover.Prover import ProverConfigError
+from prover.SimulatedProver import SimulatedProver
+
+fs = [formulaAt(k) for k in range(200)]
+
+def test_runs_are_repeatable():
+    first = SimulatedProver(0, 'TPG', latency='constant', mean=0, unknownRate=0.3).proveMany(fs, 10)
+    second = SimulatedProver(3, 'TPG', latency='constant', mean=0, unknownRate=0.3).proveMany(fs, 10)
+    assert [r[1] for r in first] == [r[1] for r in second]
+    assert 0 < sum(r[1] is None for r in first) < len(fs)
+
+def test_provers_do_not_contradict():
+    results = [SimulatedProver(0, name, latency='constant', mean=0, unknownRate=0.5).proveMany(fs, 10)
+               for name in ['TPG', 'LEO-III']]
+    for a, b in zip(*results):
+        assert a[1] is None or b[1] is None or a[1] == b[1]
+
+def test_timeouts():
+    prover = SimulatedProver(0, 'TPG', latency='constant', mean=0.001, timeoutRate=0.5, timeoutAfter=0)
+    assert 0 < sum(r[1] is None for r in prover.proveMany(fs, 1)) < len(fs)
+    # latency longer than the timeout is cut by it
+    prover = SimulatedProver(0, 'TPG', latency='constant', mean=60)
+    assert all(r[1] is None for r in prover.proveMany(fs[:2], 0.01))
+
+def test_possible_results():
+    prover = SimulatedProver(0, 'LEO-III', latency='constant', mean=0)
+    prover.possibleResults = (True, None)
+    assert all(r[1] is not False for r in prover.proveMany(fs, 10))
+
+def test_unknown_latency():
+    with pytest.raises(ProverConfigError):
+        SimulatedProver(0, 'TPG', latency='gamma')
@@ -0,0 +1,26 @@
+import os
+import shutil
+
+import pytest
+
+from generator.Formula import impl, necs, pred
+from generator.generate import formulaAt
+from prover.TPGProver import TPGProver
+
+tpgDir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'prover_install', 'ntpg') + os.sep
+pytestmark = pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+
+formulas = [impl(necs(pred('p')), pred('p')), formulaAt(0), formulaAt(77)]
+
+def test_worker_answers_like_the_process():
+    byProcess = TPGProver(0, tpg_dir=tpgDir)
+    byWorker = TPGProver(0, tpg_dir=tpgDir, persistent=True)
+    for formula in formulas:
+        expected = byProcess.prove(formula, 10)
+        assert byWorker.prove(formula, 10) == expected
+        if expected[1]:
+            assert expected[2].startswith('<proof>') and expected[2].endswith('</proof>')
+    assert byWorker.stats['restarts'] == 0
+    assert byProcess.stats['failed'] == byWorker.stats['failed'] == 0
+    byProcess.close()
+    byWorker.close()
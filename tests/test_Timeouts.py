@@ -0,0 +1,53 @@
+from generator.generate import formulaAt
+from orchestrator.Provers import chooseTimeouts, timeoutModifiers
+from orchestrator.Timeouts import quantile, adaptiveTimeout
+from prover.ResultCache import ResultCache
+from settings import settings
+
+def test_quantile():
+    values = list(range(1, 101))
+    assert quantile(values, 0.5) == 50
+    assert quantile(values, 0.99) == 99
+    assert quantile(values, 1) == 100
+    assert quantile(values, 0) == 1
+    assert quantile([7], 0.9) == 7
+
+def test_adaptive_timeout():
+    times = [0.1 * k for k in range(1, 101)]
+    # p90 is 9 s
+    assert adaptiveTimeout(times, 0.9, 50, 1, 20) == 9
+    # rounded up to whole seconds
+    assert adaptiveTimeout(times, 0.85, 50, 1, 20) == 9
+    # limited by minimum and maximum
+    assert adaptiveTimeout(times, 0.05, 50, 1, 20) == 1
+    assert adaptiveTimeout(times, 0.9, 50, 1, 5) == 5
+    # too few samples
+    assert adaptiveTimeout(times, 0.9, 101, 1, 20) is None
+    assert adaptiveTimeout([], 0.9, 0, 1, 20) is None
+
+def test_timeouts_are_learned_from_runs_with_static_timeout(tmp_path, monkeypatch):
+    path = str(tmp_path / 'results.cache.sqlite')
+    monkeypatch.setitem(settings, 'cache_path', path)
+    monkeypatch.setitem(settings, 'timeout', 10)
+    monkeypatch.setitem(settings, 'adaptiveTimeout', 0.9)
+    monkeypatch.setitem(settings, 'adaptiveTimeoutMinSamples', 20)
+    cache = ResultCache(path)
+    for k in range(30):
+        # provers ran with their static timeouts (LEO-III and MleanTAP below the base one)
+        for name in ['LEO-III', 'MleanTAP', 'MleanCoP']:
+            cache.add(formulaAt(k), name, 'd', 'const', int(10 * timeoutModifiers[name]), True, None, 1 + k / 10)
+        # runs capped by a learned timeout do not count
+        cache.add(formulaAt(k), 'TPG', 'd', 'const', 3, True, None, 1 + k / 10)
+    cache.close()
+
+    timeouts = chooseTimeouts([(name, 'd', 'const') for name in ['LEO-III', 'MleanTAP', 'MleanCoP', 'TPG']])
+    for name in ['LEO-III', 'MleanTAP', 'MleanCoP']:
+        assert timeouts[name][0] == 4
+        assert 'cached' in timeouts[name][1]
+    assert timeouts['TPG'] == (10, 'static')
+
+def test_static_timeouts_without_cache(monkeypatch):
+    monkeypatch.setitem(settings, 'cache_path', None)
+    monkeypatch.setitem(settings, 'timeout', 10)
+    timeouts = chooseTimeouts([('LEO-III', 'd', 'const'), ('TPG', 'd', 'const')])
+    assert timeouts == {'LEO-III': (6, 'static'), 'TPG': (10, 'static')}
@@ -0,0 +1,38 @@
+import json
+
+from generator.generate import formulaAt
+from orchestrator.Trace import TraceWriter
+from prover.SimulatedProver import SimulatedProver
+
+def test_prove_calls_are_traced():
+    prover = SimulatedProver(0, 'TPG', latency='constant', mean=0.01)
+    prover.trace = []
+    prover.proveMany([formulaAt(k) for k in range(4)], 10, concurrency=2, cancelled=lambda position: position == 3)
+    records = sorted(prover.takeTrace(), key=lambda record: record['uid'])
+    assert prover.takeTrace() == []
+    assert [record['uid'] for record in records] == sorted(formulaAt(k).uid for k in range(4))
+    outcomes = {record['uid']: record['outcome'] for record in records}
+    assert outcomes[formulaAt(3).uid] == 'skipped'
+    assert all(outcomes[formulaAt(k).uid] == 'proved' for k in range(3))
+    for record in records:
+        assert record['prover'] == 'TPG' and record['rank'] == 0 and record['timeout'] == 10
+        assert record['end'] >= record['start']
+        if record['outcome'] == 'proved':
+            assert record['prove'] >= 0.009
+
+def test_parts_are_merged(tmp_path):
+    path = str(tmp_path / 'trace.jsonl')
+    for part in range(3):
+        writer = TraceWriter(path, part)
+        writer.write([{'uid': '%d-%d' % (part, i)} for i in range(part + 1)])
+        writer.close()
+    assert TraceWriter.merge(path) == 6
+    with open(path, encoding='utf-8') as f:
+        assert sorted(json.loads(line)['uid'] for line in f) == ['0-0', '1-0', '1-1', '2-0', '2-1', '2-2']
+    assert list(tmp_path.glob('*.part')) == []
+
+def test_clear(tmp_path):
+    path = str(tmp_path / 'trace.jsonl')
+    TraceWriter(path, 0).close()
+    TraceWriter.clear(path)
+    assert list(tmp_path.glob('*.part')) == []
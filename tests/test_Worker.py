@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+import subprocess
+import sys
+import time
+
+import pytest
+
+from prover.Prover import ProofCancelled
+from prover.Worker import Worker, WorkerPool, WorkerError
+
+# answers every request line with the line and the end marker, 'sleep' hangs (until SIGINT, which ends the reply
+# early), 'die' exits
+server = '''
+import os, sys, time
+for line in sys.stdin:
+    request = line.strip()
+    try:
+        if request == 'sleep':
+            time.sleep(60)
+        elif request == 'die':
+            sys.exit(1)
+        print('reply', request)
+        print('END', os.getpid())
+    except KeyboardInterrupt:
+        print('END interrupted')
+    sys.stdout.flush()
+'''
+
+def makeWorker(**kwargs) -> Worker:
+    return Worker('Test', 0, [sys.executable, '-c', server], endMarker='END', **kwargs)
+
+def test_process_serves_all_requests():
+    worker = makeWorker()
+    first = worker.request('a\n')
+    second = worker.request('b\n')
+    assert first[0] == 'reply a' and second[0] == 'reply b'
+    # the same process
+    assert first[1] == second[1]
+    assert worker.restarts == 0
+    worker.close()
+
+def test_restarted_after_timeout():
+    worker = makeWorker()
+    worker.request('a\n')
+    with pytest.raises(subprocess.TimeoutExpired):
+        worker.request('sleep\n', timeout=0.3)
+    assert worker.restarts == 1
+    assert worker.request('b\n')[0] == 'reply b'
+    worker.close()
+
+def test_died():
+    worker = makeWorker()
+    with pytest.raises(WorkerError):
+        worker.request('die\n', timeout=10)
+    assert worker.request('b\n')[0] == 'reply b'
+    worker.close()
+
+@pytest.mark.parametrize('interruptible', [False, True])
+def test_cancelled(interruptible):
+    worker = makeWorker(interruptible=interruptible)
+    pid = worker.request('a\n')[1]
+    cancelAt = time.perf_counter() + 0.3
+    with pytest.raises(ProofCancelled):
+        worker.request('sleep\n', timeout=30, cancelled=lambda: time.perf_counter() > cancelAt, pollInterval=0.05)
+    # interruptible process stops the proof and keeps serving
+    assert (worker.request('b\n')[1] == pid) == interruptible
+    assert worker.restarts == (0 if interruptible else 1)
+    worker.close()
+
+def test_usage():
+    worker = makeWorker()
+    usage = []
+    worker.request('a\n', usage=lambda *args: usage.append(args))
+    wall, cpu, peakRSS, spawn, restarts = usage[0]
+    assert wall >= spawn >= 0 and cpu >= 0 and peakRSS > 0 and restarts == 0
+    worker.close()
+
+def test_pool_starts_a_process_per_concurrent_request():
+    pool = WorkerPool('Test', 0, [sys.executable, '-c', server], endMarker='END')
+    with ThreadPoolExecutor(3) as executor:
+        replies = list(executor.map(lambda i: pool.request('%d\n' % (i,)), range(3)))
+    assert [reply[0] for reply in replies] == ['reply 0', 'reply 1', 'reply 2']
+    assert 1 <= len(pool.workers) <= 3
+    assert pool.request('x\n')[1] in set(reply[1] for reply in replies)
+    pool.close()
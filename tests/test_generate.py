@@ -0,0 +1,58 @@
+import itertools
+
+import pytest
+
+from generator.generate import (syllogismAt, formulaAt, uidAt, syllogismCount, iterFormulas, generateSingle,
+                                parseUID, letters, modalTypes, UIDParseError)
+
+# syllogisms in the order of the nested loops the index math stands for
+def nestedLoops():
+    for fig in range(1, 5):
+        for major, minor, conclusion in itertools.product(letters, repeat=3):
+            for majorModal, minorModal, conclusionModal in itertools.product(modalTypes, repeat=3):
+                yield fig, major, majorModal, minor, minorModal, conclusion, conclusionModal
+
+def test_index_math_matches_nested_loops():
+    syllogisms = list(nestedLoops())
+    assert len(syllogisms) == syllogismCount
+    for k in list(range(0, syllogismCount, 101)) + [syllogismCount - 1]:
+        assert syllogismAt(k) == syllogisms[k]
+
+def test_index_out_of_range():
+    for k in [-1, syllogismCount]:
+        with pytest.raises(IndexError):
+            syllogismAt(k)
+
+def test_uid_round_trip():
+    for k in range(0, syllogismCount, 37):
+        uid = uidAt(k)
+        assert parseUID(uid) == syllogismAt(k)
+        assert generateSingle(uid) == formulaAt(k)
+        assert formulaAt(k).uid == uid
+
+def test_invalid_uid():
+    for uid in ['', '1AaAaA', '5AaAaAa', 'xAaAaAa']:
+        with pytest.raises(UIDParseError):
+            parseUID(uid)
+
+def test_lazy_selection():
+    # s skipped, every m-th taken, n at most
+    assert [f.uid for f in iterFormulas(5, 3, 10, False)] == [uidAt(k) for k in range(10, 25, 3)]
+    assert len(list(iterFormulas(None, 1000, 0, False))) == len(range(0, syllogismCount, 1000))
+    assert [f.uid for f in iterFormulas(3, 1, syllogismCount - 2, False)] == [uidAt(syllogismCount - 2),
+                                                                            uidAt(syllogismCount - 1)]
+
+def test_selection_without_duplicates():
+    fs = list(iterFormulas(300, 1, 0, True))
+    assert len(set(fs)) == 300
+    # first occurrences, in the order of the indices
+    seen = set()
+    firsts = []
+    for k in range(syllogismCount):
+        if formulaAt(k) not in seen:
+            seen.add(formulaAt(k))
+            firsts.append(uidAt(k))
+            if len(firsts) == 310:
+                break
+    assert [f.uid for f in fs] == firsts[:300]
+    assert [f.uid for f in iterFormulas(3, 2, 4, True)] == [firsts[4], firsts[6], firsts[8]]
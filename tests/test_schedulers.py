@@ -0,0 +1,45 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+provers = ['MleanCoP', 'MleanTAP', 'LEO-III', 'TPG']
+
+def run(tmp_path, name: str, command: list, **overrides) -> str:
+    settings = {
+        'formula_source': 'syllogisms',
+        'syllogism_slice': [0, 200, 1],
+        'output_file_path': str(tmp_path / (name + '.csv')),
+        'output_order': 'index',
+        'cache_path': None,
+        'journal_dir': None,
+        'adaptiveTimeout': None,
+        'earlyCancellation': None,
+        'batchSize': 16,
+        'simulatedProvers': {prover: {'latency': 'constant', 'mean': 0, 'unknownRate': 0.2} for prover in provers},
+    }
+    settings.update(overrides)
+    settingsPath = tmp_path / (name + '.json')
+    settingsPath.write_text(json.dumps(settings), encoding='utf-8')
+    env = dict(os.environ, OMPI_ALLOW_RUN_AS_ROOT='1', OMPI_ALLOW_RUN_AS_ROOT_CONFIRM='1')
+    subprocess.run(command + ['--settings', str(settingsPath)], cwd=here, env=env, check=True, timeout=300,
+                   stdout=subprocess.DEVNULL)
+    with open(settings['output_file_path'], encoding='utf-8') as f:
+        return f.read()
+
+def test_local_backend(tmp_path):
+    command = [sys.executable, 'local-prover.py']
+    expected = run(tmp_path, 'one', command, localProcesses=4, ordering=None, deduplicate=False)
+    assert len(expected.splitlines()) == 201
+    assert run(tmp_path, 'other', command, localProcesses=6, proverConcurrency=2) == expected
+
+@pytest.mark.skipif(shutil.which('mpirun') is None, reason='MPI is not installed')
+@pytest.mark.parametrize('scheduler', ['static', 'dynamic', 'pools'])
+def test_mpi_schedulers(tmp_path, scheduler):
+    expected = run(tmp_path, 'local', [sys.executable, 'local-prover.py'], localProcesses=4)
+    command = ['mpirun', '--oversubscribe', '-np', '8', sys.executable, 'mpi-prover.py']
+    assert run(tmp_path, scheduler, command, scheduler=scheduler) == expected
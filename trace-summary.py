@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import math
+import sys
+
+from orchestrator.Timeouts import quantile
+
+# Summary of a trace written by mpi-prover.py or local-prover.py (settings['trace_path']): outcomes, latency
+# histogram and mean durations of the phases of proofs of every prover, and utilization of its ranks over time
+
+# latency histogram buckets double from this width (in seconds)
+smallestBucket = 0.01
+# utilization levels from idle to fully busy
+levels = ' .:-=+*#%@'
+
+def readTrace(path: str) -> list:
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # trace of a killed run may end with an incomplete line
+                continue
+    return records
+
+def bucketOf(latency: float) -> int:
+    # 0 – shorter than smallestBucket, k – from smallestBucket * 2^(k-1) to smallestBucket * 2^k
+    if latency < smallestBucket:
+        return 0
+    return int(math.log2(latency / smallestBucket)) + 1
+
+def bucketLabel(bucket: int) -> str:
+    if bucket == 0:
+        return '< %g s' % (smallestBucket,)
+    return '%g-%g s' % (smallestBucket * 2 ** (bucket - 1), smallestBucket * 2 ** bucket)
+
+def printHistogram(latencies: list, width: int):
+    counts = {}
+    for latency in latencies:
+        bucket = bucketOf(latency)
+        counts[bucket] = counts.get(bucket, 0) + 1
+    most = max(counts.values())
+    for bucket in range(min(counts), max(counts) + 1):
+        count = counts.get(bucket, 0)
+        print('    %16s |%-*s %d' % (bucketLabel(bucket), width, '#' * math.ceil(width * count / most), count))
+
+# busy fraction of the ranks of the prover in each of the intervals between start and end
+def utilization(records: list, start: float, end: float, intervals: int) -> list:
+    length = (end - start) / intervals
+    busy = [0.0] * intervals
+    for record in records:
+        first = min(int((record['start'] - start) / length), intervals - 1)
+        last = min(int((record['end'] - start) / length), intervals - 1)
+        for i in range(first, last + 1):
+            busy[i] += min(record['end'], start + (i + 1) * length) - max(record['start'], start + i * length)
+    ranks = len(set(record['rank'] for record in records))
+    return [min(b / (length * ranks), 1.0) for b in busy]
+
+def printProver(name: str, records: list, start: float, end: float, args):
+    ranks = len(set(record['rank'] for record in records))
+    print('%s (%d ranks, %d records)' % (name, ranks, len(records)))
+
+    outcomes = {}
+    verdicts = {}
+    for record in records:
+        outcomes[record['outcome']] = outcomes.get(record['outcome'], 0) + 1
+        verdict = {True: 'theorem', False: 'non-theorem', None: 'unknown'}[record['verdict']]
+        verdicts[verdict] = verdicts.get(verdict, 0) + 1
+    print('  outcomes:    ', ', '.join('%s %d' % o for o in sorted(outcomes.items())))
+    print('  verdicts:    ', ', '.join('%s %d' % v for v in sorted(verdicts.items())))
+    print('  timeouts:    ', ', '.join('%s s' % (t,) for t in sorted(set(record['timeout'] or 0 for record in records))))
+
+    # prover actually ran only for proved, cancelled and failed records
+    ran = [record for record in records if record['outcome'] in ['proved', 'cancelled', 'failed']]
+    if ran:
+        latencies = sorted(record['end'] - record['start'] for record in ran)
+        print('  latency:      mean %.3f s, p50 %.3f s, p90 %.3f s, p99 %.3f s, max %.3f s'
+              % (sum(latencies) / len(latencies), quantile(latencies, 0.5), quantile(latencies, 0.9),
+                 quantile(latencies, 0.99), latencies[-1]))
+        print('  phases (mean):', ', '.join('%s %.3f s' % (phase, sum(record[phase] for record in ran) / len(ran))
+                                          for phase in ['spawn', 'serialize', 'prove', 'parse', 'cpu']))
+        print('  peak RSS:     %d kB' % (max(record['peakRSS'] for record in ran),))
+        printHistogram(latencies, args.width)
+
+    busy = utilization(records, start, end, args.intervals)
+    print('  utilization:  mean %.0f %%, %g s per character' % (100 * sum(busy) / len(busy), (end - start) / len(busy)))
+    print('    |%s|' % (''.join(levels[min(int(b * len(levels)), len(levels) - 1)] for b in busy),))
+    print()
+
+def parseArgs():
+    parser = argparse.ArgumentParser(allow_abbrev=False)
+    parser.add_argument('trace', help='trace file (JSON lines)')
+    parser.add_argument('--intervals', help='number of intervals of the utilization timeline', type=int, default=60)
+    parser.add_argument('--width', help='width of the histogram bars', type=int, default=40)
+    return parser.parse_args()
+
+def main():
+    args = parseArgs()
+    records = readTrace(args.trace)
+    if not records:
+        print('No records in', args.trace, file=sys.stderr)
+        sys.exit(1)
+
+    start = min(record['start'] for record in records)
+    end = max(record['end'] for record in records)
+    byProver = {}
+    for record in records:
+        byProver.setdefault(record['prover'], []).append(record)
+    print('Records: %d, provers: %d, ranks: %d, span: %.2f s'
+          % (len(records), len(byProver), len(set((r['prover'], r['rank']) for r in records)), end - start))
+    print()
+    for name, proverRecords in byProver.items():
+        printProver(name, proverRecords, start, max(end, start + 1e-9), args)
+
+if __name__ == '__main__':
+    main()